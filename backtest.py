@@ -0,0 +1,452 @@
+# backtest.py - backtest das heurísticas (heuristics_football) sobre um arquivo histórico colunar
+#
+#   python backtest.py build --from historico.json --out arquivo/      (JSON da API-Sports -> colunas .npy)
+#   python backtest.py synth --rows 5000000 --out arquivo/             (arquivo sintético, só para medir desempenho)
+#   python backtest.py run arquivo/ --workers 8 --json relatorio.json
+#
+# Formato: arquivo/part-00000/{manifest.json, <coluna>.npy}. Uma linha = um jogo num instante:
+# estatísticas e placar até o minuto `elapsed` (0 = pré-jogo), resultado final e odds de
+# fechamento (melhor odd das casas preferidas, como o /analyze anexa em best_odd).
+# As colunas são abertas com mmap e processadas em fatias de --chunk linhas por processo,
+# então a memória não cresce com o tamanho do arquivo.
+import argparse, json, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+import sports_betting_analyzer as sba
+
+ARCHIVE_VERSION = 1
+STAT_COLUMNS = list(sba._BATCH_COLUMNS)  # estatísticas + placar no instante da previsão
+OUTCOME_COLUMNS = ("ft_h_goals", "ft_a_goals", "ht_h_goals", "ht_a_goals", "ft_h_corners", "ft_a_corners", "ht_corners", "ft_cards")
+CONFIDENCE_BINS = 21  # faixas de 0.05 (as confianças das heurísticas são múltiplos de 0.05)
+
+# mercado -> seleções como o heuristics_football escreve a recomendação ({home}/{away} = nomes dos times).
+# O código da seleção é a posição na tupla; a odd de cada uma fica em odds__<mercado>__<código>.npy
+SELECTIONS: Dict[str, Tuple[str, ...]] = {
+    "moneyline": ("Vitória Casa", "Vitória Visitante"),
+    "dnb": ("Casa (DNB)", "Fora (DNB)"),
+    "double_chance": ("Casa ou Empate", "Fora ou Empate"),
+    "over_1_5": ("OVER 1.5", "UNDER 1.5"),
+    "over_2_5": ("OVER 2.5", "UNDER 2.5"),
+    "over_3_5": ("OVER 3.5", "UNDER 3.5"),
+    "btts": ("SIM", "NAO"),
+    "over_2_5_ht": ("OVER 1.0",),
+    "corners_ht_over": ("OVER 4.5",),
+    "corners_ft_over": ("OVER 9.5",),
+    "corners_ft_under": ("UNDER 9.5",),
+    "cards_over": ("OVER 3.5", "UNDER 3.5"),
+    "asian_handicap_home": ("{home} -1.0", "{home} -0.5"),
+    "asian_handicap_away": ("{away} -1.0", "{away} -0.5"),
+    "handicap_european": ("{home} -1", "{away} -1"),
+    "ht_ft": ("{home} / {home}", "{away} / {away}"),
+    "corners_asian_ft": ("{home} -1.5", "{away} -1.5"),
+}
+ODDS_COLUMNS = [f"odds__{market}__{code}" for market, sels in SELECTIONS.items() for code in range(len(sels))]
+# linhas do acumulador por mercado (somáveis entre fatias e processos)
+ACC_ROWS = ("picks", "wins", "pushes", "conf_sum", "brier_sum", "staked", "profit")
+
+# ------------- Arquivo colunar -------------
+def open_archive(root: str) -> List[Tuple[str, int]]:
+    """Partes do arquivo: [(diretório, linhas)]."""
+    parts = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        manifest = os.path.join(path, "manifest.json")
+        if name.startswith("part-") and os.path.isfile(manifest):
+            with open(manifest) as f:
+                meta = json.load(f)
+            if meta.get("version") != ARCHIVE_VERSION:
+                raise ValueError(f"{path}: versão de arquivo {meta.get('version')} não suportada")
+            parts.append((path, int(meta["rows"])))
+    if not parts:
+        raise FileNotFoundError(f"nenhuma parte em {root}")
+    return parts
+
+def write_part(root: str, columns: Dict[str, np.ndarray]) -> str:
+    """Grava uma parte nova (uma .npy por coluna + manifest) depois das existentes."""
+    os.makedirs(root, exist_ok=True)
+    rows = {len(v) for v in columns.values()}
+    if len(rows) != 1:
+        raise ValueError("colunas com tamanhos diferentes")
+    idx = sum(1 for name in os.listdir(root) if name.startswith("part-"))
+    path = os.path.join(root, f"part-{idx:05d}")
+    os.makedirs(path)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(values))
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump({"version": ARCHIVE_VERSION, "rows": rows.pop(), "columns": sorted(columns)}, f)
+    return path
+
+def _empty_columns(n: int) -> Dict[str, np.ndarray]:
+    cols = {"fixture_id": np.zeros(n, np.int64), "elapsed": np.zeros(n, np.int16)}
+    cols.update({name: np.zeros(n, np.int32) for name in STAT_COLUMNS})
+    cols.update({name: np.full(n, -1, np.int16) for name in OUTCOME_COLUMNS})
+    cols.update({name: np.full(n, np.nan, np.float32) for name in ODDS_COLUMNS})
+    return cols
+
+# ------------- Previsões e liquidação vetorizadas -------------
+def _pick(n: int, *cases) -> Tuple[np.ndarray, np.ndarray]:
+    """(código, confiança) por linha; `cases` = (máscara, código, confiança) em ordem de prioridade; -1 = sem aposta."""
+    code = np.full(n, -1, np.int8)
+    conf = np.zeros(n)
+    free = np.ones(n, bool)
+    for mask, c, p in cases:
+        hit = free & mask
+        code[hit] = c
+        conf[hit] = p
+        free &= ~hit
+    return code, conf
+
+def predict(col: Dict[str, np.ndarray], elapsed: np.ndarray) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Mercado -> (seleção, confiança) de cada linha, com as mesmas regras e
+    confianças do heuristics_football (sinais de sba.heuristic_signals).
+    """
+    n = len(elapsed)
+    sig = sba.heuristic_signals(col)
+    pre = elapsed == 0
+    every = np.ones(n, bool)
+    strong, pdiff, btts = sig["strong"], sig["power_diff"], sig["btts"]
+    open_game = ~sig["balanced"]
+    no_goals = sig["total_goals"] == 0
+    return {
+        "moneyline": _pick(n, (strong == 1, 0, 0.85), (strong == -1, 1, 0.85)),
+        "dnb": _pick(n, (strong == 1, 0, 0.7), (strong == -1, 1, 0.7),
+                     (sig["dnb_mid"] & (pdiff > 0), 0, 0.65), (sig["dnb_mid"], 1, 0.65)),
+        "double_chance": _pick(n, (strong == 1, 0, 0.6), (strong == -1, 1, 0.6),
+                               (open_game & sig["leans_home"], 0, 0.5), (open_game, 1, 0.5)),
+        "over_1_5": _pick(n, (pre, 0, 0.65), (sig["over_1_5"], 0, 0.7), (every, 1, 0.4)),
+        "over_2_5": _pick(n, (pre, 0, 0.55), (sig["over_2_5"], 0, 0.75), (every, 1, 0.45)),
+        "over_3_5": _pick(n, (pre, -1, 0.0), (sig["over_3_5"], 0, 0.65), (every, 1, 0.45)),
+        "btts": _pick(n, (pre, 0, 0.55), (btts == 2, 0, 0.8), (btts == 1, 0, 0.6), (every, 1, 0.45)),
+        "over_2_5_ht": _pick(n, (sig["combined_shots"] >= 5, 0, 0.6)),
+        "corners_ht_over": _pick(n, (sig["corners_ht"] >= 3, 0, 0.65)),
+        "corners_ft_over": _pick(n, (pre, 0, 0.6), (sig["total_corners"] >= 7, 0, 0.7)),
+        "corners_ft_under": _pick(n, (pre, -1, 0.0), (sig["total_corners"] < 7, 0, 0.45)),
+        "cards_over": _pick(n, (pre, 0, 0.55), (sig["cards"], 0, 0.6), (every, 1, 0.45)),
+        "asian_handicap_home": _pick(n, (sig["ah_home"] == 2, 0, 0.7), (sig["ah_home"] == 1, 1, 0.6)),
+        "asian_handicap_away": _pick(n, (sig["ah_away"] == 2, 0, 0.7), (sig["ah_away"] == 1, 1, 0.6)),
+        "handicap_european": _pick(n, (sig["eh"] == 1, 0, 0.6), (sig["eh"] == -1, 1, 0.6)),
+        "ht_ft": _pick(n, ((strong == 1) & no_goals, 0, 0.7), ((strong == -1) & no_goals, 1, 0.7)),
+        "corners_asian_ft": _pick(n, (sig["corners_asian"] == 1, 0, 0.65), (sig["corners_asian"] == -1, 1, 0.65)),
+    }
+
+def _wl(win: np.ndarray) -> np.ndarray:
+    return np.where(win, 1, -1).astype(np.int8)
+
+def _line(diff: np.ndarray) -> np.ndarray:
+    # linha asiática inteira: acima ganha, exato devolve a aposta, abaixo perde
+    return np.sign(diff).astype(np.int8)
+
+def settle(o: Dict[str, np.ndarray]) -> Dict[str, Tuple[List[np.ndarray], np.ndarray]]:
+    """Mercado -> (resultado por seleção: 1 ganhou, 0 devolvida, -1 perdeu; máscara de resultado conhecido)."""
+    h, a = o["ft_h_goals"].astype(np.int64), o["ft_a_goals"].astype(np.int64)
+    hh, ha = o["ht_h_goals"].astype(np.int64), o["ht_a_goals"].astype(np.int64)
+    hc, ac = o["ft_h_corners"].astype(np.int64), o["ft_a_corners"].astype(np.int64)
+    margin, total, ht_margin = h - a, h + a, hh - ha
+    corners, corners_margin, ht_corners, cards = hc + ac, hc - ac, o["ht_corners"], o["ft_cards"]
+    known = (h >= 0) & (a >= 0)
+    ht_known = known & (hh >= 0) & (ha >= 0)
+    corners_known = known & (hc >= 0) & (ac >= 0)
+    return {
+        "moneyline": ([_wl(margin > 0), _wl(margin < 0)], known),
+        "dnb": ([_line(margin), _line(-margin)], known),
+        "double_chance": ([_wl(margin >= 0), _wl(margin <= 0)], known),
+        "over_1_5": ([_wl(total > 1.5), _wl(total < 1.5)], known),
+        "over_2_5": ([_wl(total > 2.5), _wl(total < 2.5)], known),
+        "over_3_5": ([_wl(total > 3.5), _wl(total < 3.5)], known),
+        "btts": ([_wl((h > 0) & (a > 0)), _wl((h == 0) | (a == 0))], known),
+        "over_2_5_ht": ([_line(hh + ha - 1)], ht_known),
+        "corners_ht_over": ([_wl(ht_corners > 4.5)], known & (ht_corners >= 0)),
+        "corners_ft_over": ([_wl(corners > 9.5)], corners_known),
+        "corners_ft_under": ([_wl(corners < 9.5)], corners_known),
+        "cards_over": ([_wl(cards > 3.5), _wl(cards < 3.5)], known & (cards >= 0)),
+        "asian_handicap_home": ([_line(margin - 1), _wl(margin >= 1)], known),
+        "asian_handicap_away": ([_line(-margin - 1), _wl(-margin >= 1)], known),
+        "handicap_european": ([_wl(margin >= 2), _wl(-margin >= 2)], known),
+        "ht_ft": ([_wl((ht_margin > 0) & (margin > 0)), _wl((ht_margin < 0) & (margin < 0))], ht_known),
+        "corners_asian_ft": ([_wl(corners_margin >= 2), _wl(-corners_margin >= 2)], corners_known),
+    }
+
+def score_chunk(cols: Dict[str, np.ndarray], acc: Dict[str, np.ndarray]):
+    """Soma no acumulador (mercado -> ACC_ROWS x CONFIDENCE_BINS) as apostas de uma fatia."""
+    elapsed = np.asarray(cols["elapsed"], dtype=np.int64)
+    n = len(elapsed)
+    rows = np.arange(n)
+    predictions = predict({name: np.asarray(cols[name], dtype=np.int64) for name in STAT_COLUMNS}, elapsed)
+    results = settle(cols)
+    for market, (code, conf) in predictions.items():
+        outcomes, known = results[market]
+        mask = (code >= 0) & known
+        if not mask.any():
+            continue
+        sel = np.maximum(code, 0)
+        res = np.stack(outcomes)[sel, rows][mask]
+        odds = np.stack([np.asarray(cols[f"odds__{market}__{c}"], dtype=np.float64) for c in range(len(outcomes))])[sel, rows][mask]
+        p = conf[mask]
+        bins = np.rint(p * (CONFIDENCE_BINS - 1)).astype(np.int64)
+        win = (res == 1).astype(np.float64)
+        decided = res != 0
+        priced = ~np.isnan(odds) & (odds > 1.0)
+        profit = np.where(res == 1, odds - 1.0, np.where(res == -1, -1.0, 0.0))
+        weights = (np.ones_like(p), win, (~decided).astype(np.float64), p,
+                   np.where(decided, (p - win) ** 2, 0.0), priced.astype(np.float64), np.where(priced, profit, 0.0))
+        out = acc.setdefault(market, np.zeros((len(ACC_ROWS), CONFIDENCE_BINS)))
+        for k, w in enumerate(weights):
+            out[k] += np.bincount(bins, weights=w, minlength=CONFIDENCE_BINS)
+
+# ------------- Execução paralela -------------
+PHASES = {"all": None, "pregame": (0, 0), "live": (1, 1 << 15)}
+
+def run_slice(path: str, start: int, stop: int, chunk: int, phase: str = "all") -> Tuple[int, Dict[str, np.ndarray]]:
+    """Processa as linhas [start, stop) de uma parte (roda num processo do pool)."""
+    names = ["elapsed", *STAT_COLUMNS, *OUTCOME_COLUMNS, *ODDS_COLUMNS]
+    mm = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+    bounds = PHASES[phase]
+    acc: Dict[str, np.ndarray] = {}
+    rows = 0
+    for lo in range(start, stop, chunk):
+        hi = min(lo + chunk, stop)
+        cols = {name: arr[lo:hi] for name, arr in mm.items()}
+        if bounds is not None:
+            keep = (cols["elapsed"] >= bounds[0]) & (cols["elapsed"] <= bounds[1])
+            cols = {name: values[keep] for name, values in cols.items()}
+        rows += len(cols["elapsed"])
+        if len(cols["elapsed"]):
+            score_chunk(cols, acc)
+    return rows, acc
+
+def run(root: str, workers: int = 0, chunk: int = 262144, task_rows: int = 2_000_000, phase: str = "all") -> Dict[str, Any]:
+    """Roda o backtest no arquivo inteiro; com workers > 1 as fatias vão para um ProcessPool."""
+    t0 = time.perf_counter()
+    tasks = [(path, lo, min(lo + task_rows, rows), chunk, phase)
+             for path, rows in open_archive(root) for lo in range(0, rows, task_rows)]
+    workers = workers or os.cpu_count() or 1
+    total_rows = 0
+    acc: Dict[str, np.ndarray] = {}
+
+    def merge(res: Tuple[int, Dict[str, np.ndarray]]):
+        nonlocal total_rows
+        total_rows += res[0]
+        for market, values in res[1].items():
+            if market in acc:
+                acc[market] += values
+            else:
+                acc[market] = values
+
+    if workers == 1 or len(tasks) == 1:
+        for task in tasks:
+            merge(run_slice(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            for fut in as_completed([pool.submit(run_slice, *task) for task in tasks]):
+                merge(fut.result())
+    seconds = time.perf_counter() - t0
+    return {"rows": total_rows, "seconds": round(seconds, 3), "rows_per_second": round(total_rows / seconds) if seconds else 0,
+            "workers": workers, "phase": phase, "markets": report(acc)}
+
+def _ratio(a: float, b: float) -> Optional[float]:
+    return round(a / b, 4) if b else None
+
+def report(acc: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Taxa de acerto, calibração da confiança e ROI contra best_odd por mercado."""
+    out: Dict[str, Any] = {}
+    for market in SELECTIONS:
+        if market not in acc:
+            continue
+        picks, wins, pushes, conf_sum, brier_sum, staked, profit = acc[market]
+        n, w, pu = picks.sum(), wins.sum(), pushes.sum()
+        decided = n - pu
+        calibration = [
+            {"confidence": round(b / (CONFIDENCE_BINS - 1), 2), "picks": int(picks[b]),
+             "hit_rate": _ratio(wins[b], picks[b] - pushes[b])}
+            for b in range(CONFIDENCE_BINS) if picks[b]
+        ]
+        hit_rate = _ratio(w, decided)
+        avg_conf = _ratio(conf_sum.sum(), n)
+        out[market] = {
+            "picks": int(n), "wins": int(w), "pushes": int(pu), "losses": int(decided - w),
+            "hit_rate": hit_rate, "avg_confidence": avg_conf,
+            "calibration_gap": round(avg_conf - hit_rate, 4) if hit_rate is not None and avg_conf is not None else None,
+            "brier": _ratio(brier_sum.sum(), decided),
+            "bets_with_odds": int(staked.sum()), "roi": _ratio(profit.sum(), staked.sum()),
+            "calibration": calibration,
+        }
+    return out
+
+def print_report(res: Dict[str, Any]):
+    print(f"{res['rows']} linhas em {res['seconds']}s ({res['rows_per_second']}/s, {res['workers']} processos, fase={res['phase']})")
+    print(f"{'mercado':>20} {'apostas':>10} {'acerto':>8} {'conf.':>7} {'brier':>7} {'c/ odd':>10} {'ROI':>8}")
+    fmt = lambda v, pct=True: "-" if v is None else (f"{v:.1%}" if pct else f"{v:.3f}")
+    for market, r in res["markets"].items():
+        print(f"{market:>20} {r['picks']:>10} {fmt(r['hit_rate']):>8} {fmt(r['avg_confidence']):>7} "
+              f"{fmt(r['brier'], False):>7} {r['bets_with_odds']:>10} {fmt(r['roi']):>8}")
+
+# ------------- Construção do arquivo -------------
+def _outcomes(fixture: dict, final_stats: Dict[int, Dict[str, Any]]) -> Dict[str, int]:
+    goals = fixture.get("goals") or {}
+    score = fixture.get("score") or {}
+    ht = score.get("halftime") or {}
+    teams = fixture.get("teams") or {}
+    side = [final_stats.get((teams.get(s) or {}).get("id")) for s in ("home", "away")]
+
+    def num(v):
+        return -1 if v is None else sba.safe_int(v)
+
+    def stat(st, *keys):
+        if not st:
+            return -1
+        for k in keys:
+            if k in st:
+                return sba.safe_int(st[k])
+        return -1
+
+    out = {"ft_h_goals": num(goals.get("home")), "ft_a_goals": num(goals.get("away")),
+           "ht_h_goals": num(ht.get("home")), "ht_a_goals": num(ht.get("away")),
+           "ft_h_corners": stat(side[0], "Corner Kicks", "Corners"), "ft_a_corners": stat(side[1], "Corner Kicks", "Corners")}
+    ht_keys = ("Corners 1st Half", "Corners Half Time", "Corner Kicks 1H")
+    h_ht, a_ht = stat(side[0], *ht_keys), stat(side[1], *ht_keys)
+    out["ht_corners"] = h_ht + a_ht if h_ht >= 0 and a_ht >= 0 else -1
+    h_y, a_y = stat(side[0], "Yellow Cards"), stat(side[1], "Yellow Cards")
+    out["ft_cards"] = h_y + a_y if h_y >= 0 and a_y >= 0 else -1
+    return out
+
+def _closing_odds(fixture: dict, odds_response: list) -> Dict[str, float]:
+    # mesma busca do /analyze: recomendação -> value da API -> melhor odd das casas preferidas
+    index = sba.compile_odds_index({"response": odds_response}) if odds_response else None
+    if not index:
+        return {}
+    teams = fixture.get("teams") or {}
+    names = {"home": (teams.get("home") or {}).get("name"), "away": (teams.get("away") or {}).get("name")}
+    out = {}
+    for market, sels in SELECTIONS.items():
+        for code, template in enumerate(sels):
+            api_val = sba.odds_value_for(market, template.format(**names))
+            found = index.get((market, api_val)) if api_val else None
+            if found:
+                out[f"odds__{market}__{code}"] = found[0]
+    return out
+
+def build(src: Dict[str, Any], mode: str = "pregame") -> Tuple[Dict[str, np.ndarray], int]:
+    """
+    Converte um histórico no formato da API-Sports ({"fixtures", "statistics", "odds"
+    e opcionalmente "snapshots": {id: [{"elapsed", "goals", "statistics"}]}}) em colunas.
+    Sem snapshots cada jogo vira uma linha: "pregame" (sem estatísticas, como o
+    /analyze antes do jogo) ou "final" (estatísticas finais; vaza o resultado,
+    serve só para conferência). Retorna (colunas, jogos descartados).
+    """
+    rows: List[Tuple[int, int, List[int], Dict[str, int], Dict[str, float]]] = []
+    skipped = 0
+    statistics = src.get("statistics") or {}
+    odds = src.get("odds") or {}
+    snapshots = src.get("snapshots") or {}
+    for fixture in src.get("fixtures") or []:
+        fid = (fixture.get("fixture") or {}).get("id")
+        final_stats = sba.build_stats_map({"response": statistics.get(str(fid)) or []})
+        outcome = _outcomes(fixture, final_stats)
+        closing = _closing_odds(fixture, odds.get(str(fid)) or [])
+        if str(fid) in snapshots:
+            moments = [(s.get("elapsed") or 0, s.get("goals") or {}, sba.build_stats_map({"response": s.get("statistics") or []}))
+                       for s in snapshots[str(fid)]]
+        elif mode == "final":
+            moments = [(((fixture.get("fixture") or {}).get("status") or {}).get("elapsed") or 90, fixture.get("goals") or {}, final_stats)]
+        else:
+            moments = [(0, {"home": 0, "away": 0}, {})]
+        for elapsed, goals, stats_map in moments:
+            row = sba._fixture_row({"teams": fixture.get("teams"), "goals": goals, "status": {"elapsed": elapsed}}, stats_map)
+            if row is None:
+                skipped += 1
+                continue
+            rows.append((fid, elapsed, row[3], outcome, closing))
+
+    cols = _empty_columns(len(rows))
+    for i, (fid, elapsed, values, outcome, closing) in enumerate(rows):
+        cols["fixture_id"][i] = fid
+        cols["elapsed"][i] = elapsed
+        for name, v in zip(STAT_COLUMNS, values):
+            cols[name][i] = v
+        for name, v in outcome.items():
+            cols[name][i] = v
+        for name, v in closing.items():
+            cols[name][i] = v
+    return cols, skipped
+
+def synth(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Linhas sintéticas plausíveis (odds aleatórias): para medir throughput e memória, não para tirar conclusões."""
+    rng = np.random.default_rng(seed)
+    cols = _empty_columns(n)
+    cols["fixture_id"][:] = np.arange(n) + seed * n
+    elapsed = np.where(rng.random(n) < 0.2, 0, rng.integers(5, 90, n))
+    cols["elapsed"][:] = elapsed
+    frac = elapsed / 90.0
+    strength = rng.normal(0, 0.35, n)
+    for side, sign in (("h", 1), ("a", -1)):
+        rate = np.exp(sign * strength)
+        shots = rng.poisson(12 * rate * frac)
+        sot = rng.binomial(shots, 0.35)
+        cols[f"{side}_shots"][:] = shots
+        cols[f"{side}_sot"][:] = sot
+        cols[f"{side}_corners"][:] = rng.poisson(5 * rate * frac)
+        cols[f"{side}_corners_ht"][:] = rng.poisson(2.4 * rate * np.minimum(frac, 0.5))
+        cols[f"{side}_fouls"][:] = rng.poisson(11 * frac)
+        cols[f"{side}_attacks"][:] = rng.poisson(100 * rate * frac)
+        cols[f"{side}_danger"][:] = rng.poisson(50 * rate * frac)
+        cols[f"{side}_yellow"][:] = rng.poisson(2 * frac)
+        goals_now = rng.binomial(sot, 0.3)
+        cols[f"{side}_goals"][:] = goals_now
+        ht = np.where(elapsed >= 45, np.minimum(goals_now, rng.poisson(0.6 * rate)), goals_now + rng.poisson(0.6 * rate * (1 - np.minimum(frac * 2, 1))))
+        cols[f"ht_{side}_goals"][:] = ht
+        cols[f"ft_{side}_goals"][:] = np.maximum(goals_now + rng.poisson(1.35 * rate * (1 - frac)), ht)
+        cols[f"ft_{side}_corners"][:] = cols[f"{side}_corners"] + rng.poisson(5 * rate * (1 - frac))
+    cols["h_pos"][:] = np.clip(np.rint(50 + strength * 15 + rng.normal(0, 5, n)), 20, 80)
+    cols["a_pos"][:] = 100 - cols["h_pos"]
+    cols["h_pos"][elapsed == 0] = 50
+    cols["a_pos"][elapsed == 0] = 50
+    cols["ht_corners"][:] = cols["h_corners_ht"] + cols["a_corners_ht"] + rng.poisson(0.5, n)
+    cols["ft_cards"][:] = cols["h_yellow"] + cols["a_yellow"] + rng.poisson(4 * (1 - frac))
+    for name in ODDS_COLUMNS:
+        cols[name][:] = np.where(rng.random(n) < 0.9, np.round(rng.uniform(1.2, 5.0, n), 2), np.nan)
+    return cols
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest das heurísticas sobre um arquivo histórico colunar")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="roda o backtest")
+    p.add_argument("archive")
+    p.add_argument("--workers", type=int, default=0, help="processos (padrão: núcleos da máquina)")
+    p.add_argument("--chunk", type=int, default=262144, help="linhas por fatia dentro de cada processo")
+    p.add_argument("--task-rows", type=int, default=2_000_000, help="linhas por tarefa do pool")
+    p.add_argument("--phase", choices=sorted(PHASES), default="all", help="pregame (elapsed=0), live ou all")
+    p.add_argument("--json", help="grava o relatório neste arquivo")
+    p = sub.add_parser("build", help="histórico JSON da API-Sports -> arquivo colunar (acrescenta uma parte)")
+    p.add_argument("--from", dest="src", required=True)
+    p.add_argument("--out", required=True)
+    p.add_argument("--mode", choices=("pregame", "final"), default="pregame", help="linha por jogo quando não há snapshots")
+    p = sub.add_parser("synth", help="gera um arquivo sintético")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--part-rows", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    if args.cmd == "run":
+        res = run(args.archive, args.workers, args.chunk, args.task_rows, args.phase)
+        print_report(res)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(res, f, indent=2)
+    elif args.cmd == "build":
+        with open(args.src) as f:
+            src = json.load(f)
+        cols, skipped = build(src, args.mode)
+        path = write_part(args.out, cols)
+        print(f"{len(cols['elapsed'])} linhas em {path} ({skipped} descartadas)")
+    else:
+        for i, lo in enumerate(range(0, args.rows, args.part_rows)):
+            path = write_part(args.out, synth(min(args.part_rows, args.rows - lo), seed=args.seed + i))
+            print(path)
+
+if __name__ == "__main__":
+    main()
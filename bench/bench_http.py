@@ -0,0 +1,121 @@
+# bench_http.py - throughput e latência (p50/p95/p99) dos endpoints contra a API fake
+# python bench/bench_http.py --requests 500 --concurrency 1,10,50
+import argparse, asyncio, os, sys, time
+from typing import Dict, Any, List, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+
+import fake_api
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(min(int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1, len(sorted_values) - 1), 0)
+    return sorted_values[k]
+
+async def run_scenario(client: httpx.AsyncClient, url_for: Callable[[int], str], n: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(n))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            r = await client.get(url_for(i))
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "requests": n, "concurrency": concurrency, "errors": errors,
+        "rps": round(n / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def _forget_analyses(m, ids: List[int]):
+    # /analyze "frio": tira do cache o resultado e as chamadas upstream desses jogos
+    for gid in ids:
+        m._cache.pop(m._analyze_key(gid))
+        m._cache.pop(m._api_cache_key("fixtures", {"id": gid}))
+        m._cache.pop(m._api_cache_key("fixtures/statistics", {"fixture": gid}))
+        m._cache.pop(m._api_cache_key("odds", {"fixture": gid}))
+
+async def _bench(m, api: fake_api.FakeAPISports, args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    ids = sorted(api.by_id)
+    snap_leagues: List[int] = []
+    countries: List[str] = []
+    transport = httpx.ASGITransport(app=m.app)
+    async with m.app.router.lifespan_context(m.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # aquece o snapshot (primeira chamada paga o upstream)
+            await client.get("/countries")
+            snap = await m.get_fixtures_snapshot()
+            snap_leagues = sorted(l for l in snap.games_by_league if l is not None)
+            countries = snap.countries
+            scenarios = {
+                "countries": lambda i: "/countries",
+                "leagues": lambda i: f"/leagues?country={countries[i % len(countries)]}",
+                "games": lambda i: f"/games?league={snap_leagues[i % len(snap_leagues)]}",
+                "games_all": lambda i: "/games",
+                "analyze_warm": lambda i: f"/analyze?game_id={ids[i % 20]}",
+                "analyze_cold": lambda i: f"/analyze?game_id={ids[i % len(ids)]}",
+            }
+            for name, url_for in scenarios.items():
+                if args.only and name not in args.only:
+                    continue
+                for c in args.concurrency:
+                    n = min(args.requests, len(ids)) if name == "analyze_cold" else args.requests
+                    if name == "analyze_cold":
+                        _forget_analyses(m, ids)
+                    elif name == "analyze_warm":
+                        await asyncio.gather(*(client.get(url_for(i)) for i in range(20)))
+                    before = sum(v for k, v in api.calls.items() if k != "errors")
+                    res = await run_scenario(client, url_for, n, c)
+                    res["upstream_calls"] = sum(v for k, v in api.calls.items() if k != "errors") - before
+                    results[f"{name}@{c}"] = res
+                    print(f"{name:>14} c={c:<4} rps={res['rps']:>9} p50={res['p50_ms']:>8}ms "
+                          f"p95={res['p95_ms']:>8}ms p99={res['p99_ms']:>8}ms errors={res['errors']} upstream={res['upstream_calls']}")
+    return results
+
+def configure_env(url: str, args):
+    # precisa vir antes do import do app (config lida no import)
+    os.environ["API_URL_BASE"] = url
+    os.environ.setdefault("SCHEDULER_ENABLED", "1" if args.scheduler else "0")
+    os.environ.setdefault("QUOTA_ENABLED", "1" if args.quota else "0")
+    os.environ.setdefault("PERSISTENT_CACHE_PATH", "")
+    # logs por requisição distorcem a medida
+    os.environ.setdefault("LOG_LEVEL", "INFO" if args.verbose else "WARNING")
+
+def run(args) -> Dict[str, Any]:
+    api = fake_api.from_args(args)
+    with fake_api.FakeServer(api, port=args.port) as server:
+        configure_env(server.url, args)
+        import sports_betting_analyzer as m
+        if m.API_URL_BASE != server.url:
+            raise RuntimeError(f"app importado antes de apontar para a API fake (API_URL_BASE={m.API_URL_BASE})")
+        return asyncio.run(_bench(m, api, args))
+
+def add_arguments(parser: argparse.ArgumentParser):
+    fake_api.add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 10, 50])
+    parser.add_argument("--only", type=lambda s: s.split(","), default=None, help="cenários (ex.: games,analyze_warm)")
+    parser.add_argument("--scheduler", action="store_true", help="liga o scheduler de refresh durante o bench")
+    parser.add_argument("--quota", action="store_true", help="liga o controle de cota (API_RATE_*)")
+    parser.add_argument("--verbose", action="store_true", help="mostra os logs do app durante as medidas")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark HTTP dos endpoints contra a API-Sports fake")
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -0,0 +1,91 @@
+# bench_memory.py - memória do snapshot de jogos: layout de dicts (normalize_game) x compacto (GameRecord)
+# python bench/bench_memory.py --fixtures 1500 --copies 3
+# Cada layout roda num processo novo, a partir da mesma resposta JSON gravada em disco.
+import argparse, gc, importlib, json, os, subprocess, sys, tempfile, tracemalloc
+from typing import Dict, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dataset
+
+LAYOUTS = ("dict", "compact")
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _build(layout: str, body: bytes, copies: int):
+    import sports_betting_analyzer as m
+    kept = []
+    # uma cópia por chave de cache (ex.: vários days_forward no mesmo worker)
+    for _ in range(copies):
+        data = json.loads(body)  # como o httpx entrega a resposta
+        if layout == "dict":
+            games = sorted((m.normalize_game(r) for r in data["response"]), key=m._game_sort_key)
+            kept.append((data, games))
+        else:
+            by_id = m._fixtures_by_id(data)
+            kept.append((by_id, m.FixturesSnapshot([m.GameRecord(raw) for raw in by_id.values()])))
+        del data
+    return kept
+
+def child(layout: str, path: str, copies: int):
+    importlib.import_module("sports_betting_analyzer")  # import fora da medida
+    with open(path, "rb") as f:
+        body = f.read()
+    gc.collect()
+    rss0 = rss_bytes()
+    tracemalloc.start()
+    kept = _build(layout, body, copies)
+    gc.collect()
+    py_bytes, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    rss1 = rss_bytes()
+    print(json.dumps({"rss_bytes": rss1 - rss0, "py_bytes": py_bytes, "objects": len(kept)}))
+
+def run(args) -> Dict[str, Any]:
+    data = dataset.load(args.data, seed=args.seed, n_fixtures=args.fixtures, n_live=args.live)
+    n = len(data["fixtures"])
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        f.write(json.dumps({"response": data["fixtures"]}).encode())
+        path = f.name
+    results: Dict[str, Any] = {}
+    try:
+        for layout in LAYOUTS:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", layout, path, str(args.copies)],
+                                 capture_output=True, text=True, check=True, env={**os.environ, "SCHEDULER_ENABLED": "0"})
+            rec = json.loads(out.stdout.strip().splitlines()[-1])
+            results[layout] = {
+                "rss_mb": round(rec["rss_bytes"] / 2**20, 2),
+                "py_mb": round(rec["py_bytes"] / 2**20, 2),
+                "bytes_per_fixture": round(rec["py_bytes"] / (n * args.copies)),
+            }
+            r = results[layout]
+            print(f"{layout:>8} jogos={n} cópias={args.copies} rss={r['rss_mb']:>8} MB python={r['py_mb']:>8} MB "
+                  f"({r['bytes_per_fixture']} B/jogo)")
+    finally:
+        os.unlink(path)
+    if results["dict"]["py_mb"]:
+        print(f"compacto usa {results['compact']['py_mb'] / results['dict']['py_mb']:.0%} da memória do layout de dicts")
+    return results
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--data", help="dataset gravado (JSON); sem ele usa o sintético")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixtures", type=int, default=1500, help="jogos de um dia cheio")
+    parser.add_argument("--live", type=int, default=60)
+    parser.add_argument("--copies", type=int, default=3, help="snapshots no mesmo processo (chaves de cache)")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        parser = argparse.ArgumentParser(description="Memória do snapshot: dicts x compacto")
+        add_arguments(parser)
+        run(parser.parse_args())
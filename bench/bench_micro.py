@@ -0,0 +1,68 @@
+# bench_micro.py - microbenchmarks das funções puras do analisador (sem I/O)
+# python bench/bench_micro.py
+import argparse, os, sys, timeit
+from typing import Dict, Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dataset
+
+def measure(fn: Callable[[], Any], number: int, repeat: int) -> float:
+    """Melhor tempo por operação (µs) entre `repeat` rodadas de `number` chamadas."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+def run(args) -> Dict[str, Any]:
+    import sports_betting_analyzer as m
+
+    data = dataset.load(args.data, seed=args.seed, n_fixtures=args.fixtures, n_live=args.live)
+    fixtures = data["fixtures"][:args.sample]
+    stats_raw = [{"response": data["statistics"].get(str(f["fixture"]["id"]), [])} for f in fixtures]
+    odds_raw = [{"response": data["odds"].get(str(f["fixture"]["id"]), [])} for f in fixtures]
+    stats_maps = [m.build_stats_map(s) for s in stats_raw]
+    preds = [m.heuristics_football(f, sm)[0] for f, sm in zip(fixtures, stats_maps)]
+    raw_json = list(m._fixtures_by_id({"response": fixtures}).values())
+    n = len(fixtures)
+
+    def loop(fn):
+        # uma "operação" = processar o lote inteiro; o resultado é dividido por jogo
+        return lambda: [fn(i) for i in range(n)]
+
+    def enhance_cold(i):
+        m._odds_index_memo.clear()
+        return m.enhance_predictions_with_preferred_odds(preds[i], odds_raw[i])
+
+    benches = {
+        "build_stats_map": loop(lambda i: m.build_stats_map(stats_raw[i])),
+        "heuristics_football": loop(lambda i: m.heuristics_football(fixtures[i], stats_maps[i])),
+        "heuristics_football_batch": lambda: m.heuristics_football_batch(fixtures, stats_maps),
+        "compile_odds_index": loop(lambda i: m.compile_odds_index(odds_raw[i])),
+        "enhance_predictions": loop(lambda i: m.enhance_predictions_with_preferred_odds(preds[i], odds_raw[i])),
+        "enhance_predictions_cold": loop(enhance_cold),
+        "normalize_game": loop(lambda i: m.normalize_game(fixtures[i])),
+        "game_record": loop(lambda i: m.GameRecord(raw_json[i])),
+    }
+    results: Dict[str, Any] = {}
+    for name, fn in benches.items():
+        if args.only and name not in args.only:
+            continue
+        fn()  # aquece memos/índices
+        us = measure(fn, args.number, args.repeat) / n
+        results[name] = {"us_per_op": round(us, 3)}
+        print(f"{name:>26} {us:>10.3f} µs/jogo")
+    return results
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--data", help="dataset gravado (JSON); sem ele usa o sintético")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixtures", type=int, default=400)
+    parser.add_argument("--live", type=int, default=30)
+    parser.add_argument("--sample", type=int, default=200, help="jogos por operação")
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", type=lambda s: s.split(","), default=None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks das heurísticas/odds")
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -0,0 +1,130 @@
+# dataset.py - dados no formato da API-Sports para a API fake (bench/)
+# Gera um conjunto determinístico (seed) ou carrega/grava um dataset real (record).
+import json, os, random, sys
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+COUNTRIES = ["England", "Spain", "Brazil", "Italy", "Germany", "France", "Portugal", "Argentina"]
+BOOKMAKERS = [(8, "Bet365"), (32, "Betano"), (34, "Superbet"), (4, "Pinnacle"), (11, "1xBet"), (16, "Unibet")]
+LIVE_STATUSES = ["1H", "HT", "2H"]
+
+def _fixture(rng: random.Random, fid: int, league: dict, kickoff: datetime, live: bool) -> dict:
+    home, away = rng.sample(range(1, 2000), 2)
+    if live:
+        short = rng.choice(LIVE_STATUSES)
+        elapsed = {"1H": rng.randint(1, 45), "HT": 45, "2H": rng.randint(46, 90)}[short]
+        goals = {"home": rng.randint(0, 3), "away": rng.randint(0, 3)}
+    else:
+        short, elapsed = "NS", None
+        goals = {"home": None, "away": None}
+    return {
+        "fixture": {"id": fid, "date": kickoff.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+                    "status": {"long": short, "short": short, "elapsed": elapsed},
+                    "venue": {"id": rng.randint(1, 900), "name": f"Stadium {fid}", "city": league["country"]}},
+        "league": league,
+        "teams": {"home": {"id": home, "name": f"Team {home}", "logo": f"https://media.api-sports.io/football/teams/{home}.png"},
+                  "away": {"id": away, "name": f"Team {away}", "logo": f"https://media.api-sports.io/football/teams/{away}.png"}},
+        "goals": goals,
+        "score": {"halftime": dict(goals), "fulltime": {"home": None, "away": None}},
+    }
+
+def _statistics(rng: random.Random, fixture: dict) -> List[dict]:
+    out = []
+    pos = rng.randint(30, 70)
+    for side, possession in (("home", pos), ("away", 100 - pos)):
+        team = fixture["teams"][side]
+        shots = rng.randint(0, 25)
+        out.append({"team": {"id": team["id"], "name": team["name"]}, "statistics": [
+            {"type": "Shots on Goal", "value": rng.randint(0, shots)},
+            {"type": "Total Shots", "value": shots},
+            {"type": "Fouls", "value": rng.randint(0, 20)},
+            {"type": "Corner Kicks", "value": rng.randint(0, 12)},
+            {"type": "Ball Possession", "value": f"{possession}%"},
+            {"type": "Yellow Cards", "value": rng.randint(0, 5) or None},
+            {"type": "Attacks", "value": rng.randint(20, 120)},
+            {"type": "Dangerous Attacks", "value": rng.randint(5, 80)},
+            {"type": "Passes %", "value": f"{rng.randint(60, 92)}%"},
+        ]})
+    return out
+
+def _odd(rng: random.Random, low: float = 1.2, high: float = 5.0) -> str:
+    return f"{rng.uniform(low, high):.2f}"
+
+def _odds(rng: random.Random, fixture: dict) -> List[dict]:
+    bookmakers = []
+    for bid, name in rng.sample(BOOKMAKERS, rng.randint(2, len(BOOKMAKERS))):
+        bets = [
+            {"id": 1, "name": "Match Winner", "values": [{"value": v, "odd": _odd(rng)} for v in ("Home", "Draw", "Away")]},
+            {"id": 5, "name": "Goals Over/Under", "values": [{"value": f"{s} {l}", "odd": _odd(rng, 1.3, 3.5)}
+                                                             for l in ("1.5", "2.5", "3.5") for s in ("Over", "Under")]},
+            {"id": 8, "name": "Both Teams Score", "values": [{"value": v, "odd": _odd(rng, 1.5, 2.5)} for v in ("Yes", "No")]},
+            {"id": 12, "name": "Double Chance", "values": [{"value": v, "odd": _odd(rng, 1.05, 2.0)} for v in ("Home/Draw", "Home/Away", "Draw/Away")]},
+            {"id": 4, "name": "Asian Handicap", "values": [{"value": f"{s} {l}", "odd": _odd(rng, 1.6, 2.4)}
+                                                           for l in ("-1", "-0.5", "+0.5", "+1") for s in ("Home", "Away")]},
+            {"id": 45, "name": "Corners Over Under", "values": [{"value": f"{s} 9.5", "odd": _odd(rng, 1.6, 2.4)} for s in ("Over", "Under")]},
+        ]
+        if rng.random() < 0.5:
+            bets.append({"id": 6, "name": "Goals Over/Under First Half",
+                         "values": [{"value": f"{s} 1.0", "odd": _odd(rng, 1.5, 2.5)} for s in ("Over", "Under")]})
+        bookmakers.append({"id": bid, "name": name, "bets": bets})
+    return [{"league": fixture["league"], "fixture": {"id": fixture["fixture"]["id"], "date": fixture["fixture"]["date"]},
+             "update": fixture["fixture"]["date"], "bookmakers": bookmakers}]
+
+def generate(seed: int = 42, n_fixtures: int = 400, n_live: int = 30, days: int = 3, today: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Dataset sintético determinístico: `n_fixtures` jogos espalhados pelos próximos
+    `days` dias (a partir de hoje, UTC) mais `n_live` jogos ao vivo hoje, com
+    estatísticas e odds de cada um.
+    """
+    rng = random.Random(seed)
+    today = (today or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    leagues = []
+    for i in range(40):
+        country = COUNTRIES[i % len(COUNTRIES)]
+        leagues.append({"id": 39 + i, "name": f"{country} League {i // len(COUNTRIES) + 1}", "country": country,
+                        "logo": f"https://media.api-sports.io/football/leagues/{39 + i}.png", "season": today.year})
+    fixtures = []
+    for n in range(n_fixtures + n_live):
+        live = n >= n_fixtures
+        day = 0 if live else rng.randrange(days)
+        kickoff = today + timedelta(days=day, hours=rng.randint(10, 22), minutes=rng.choice((0, 15, 30, 45)))
+        fixtures.append(_fixture(rng, 1_000_000 + n, rng.choice(leagues), kickoff, live))
+    return {
+        "fixtures": fixtures,
+        "statistics": {str(f["fixture"]["id"]): _statistics(rng, f) for f in fixtures},
+        "odds": {str(f["fixture"]["id"]): _odds(rng, f) for f in fixtures},
+    }
+
+def load(path: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    """Dataset gravado em `path` (JSON) ou, sem arquivo, o sintético de generate()."""
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return generate(**kwargs)
+
+def record(path: str, api_key: str, date: str, limit: int = 100):
+    """Grava fixtures/estatísticas/odds reais de uma data (usa cota da API-Sports)."""
+    import httpx
+    headers = {"x-apisports-key": api_key}
+    with httpx.Client(base_url="https://v3.football.api-sports.io", headers=headers, timeout=30) as client:
+        fixtures = client.get("/fixtures", params={"date": date}).json().get("response", [])[:limit]
+        fixtures += client.get("/fixtures", params={"live": "all"}).json().get("response", [])[:limit]
+        data = {"fixtures": fixtures, "statistics": {}, "odds": {}}
+        for f in fixtures:
+            fid = str(f["fixture"]["id"])
+            data["statistics"][fid] = client.get("/fixtures/statistics", params={"fixture": fid}).json().get("response", [])
+            data["odds"][fid] = client.get("/odds", params={"fixture": fid}).json().get("response", [])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+    print(f"[dataset] {len(fixtures)} fixtures gravadas em {path}")
+
+if __name__ == "__main__":
+    # python bench/dataset.py record <YYYY-MM-DD> [arquivo]   (requer API_SPORTS_KEY)
+    if len(sys.argv) >= 3 and sys.argv[1] == "record":
+        out = sys.argv[3] if len(sys.argv) > 3 else os.path.join(DATA_DIR, f"recorded_{sys.argv[2]}.json")
+        record(out, os.environ["API_SPORTS_KEY"], sys.argv[2])
+    else:
+        print("uso: python bench/dataset.py record <YYYY-MM-DD> [arquivo]")
@@ -0,0 +1,150 @@
+# fake_api.py - API-Sports local para benchmarks (offline)
+# Responde /fixtures, /fixtures/statistics e /odds a partir de um dataset
+# (bench/dataset.py) com latência e taxa de erro configuráveis.
+import argparse, asyncio, random, threading, time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+import dataset
+
+ODDS_PAGE_SIZE = 10  # a API-Sports pagina /odds de 10 em 10
+
+def _rebase_dates(fixtures: List[dict]) -> List[dict]:
+    """Desloca as datas de um dataset gravado para que o primeiro dia seja hoje (UTC)."""
+    dates = [f["fixture"]["date"] for f in fixtures if f["fixture"].get("date")]
+    if not dates:
+        return fixtures
+    first = datetime.fromisoformat(min(dates)[:10])
+    shift = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - first
+    if shift.days == 0:
+        return fixtures
+    out = []
+    for f in fixtures:
+        f = dict(f, fixture=dict(f["fixture"]))
+        if f["fixture"].get("date"):
+            d = datetime.fromisoformat(f["fixture"]["date"][:19]) + timedelta(days=shift.days)
+            f["fixture"]["date"] = d.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+        out.append(f)
+    return out
+
+class FakeAPISports:
+    def __init__(self, data: Dict[str, Any], latency_ms: float = 20, jitter_ms: float = 0, error_rate: float = 0.0,
+                 seed: int = 1, rebase: bool = True):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        fixtures = _rebase_dates(data["fixtures"]) if rebase else data["fixtures"]
+        self.by_id = {f["fixture"]["id"]: f for f in fixtures}
+        self.live = [f for f in fixtures if (f["fixture"].get("status") or {}).get("elapsed")]
+        self.by_date: Dict[str, List[dict]] = {}
+        for f in fixtures:
+            self.by_date.setdefault((f["fixture"].get("date") or "")[:10], []).append(f)
+        self.statistics = {int(k): v for k, v in data.get("statistics", {}).items()}
+        self.odds = {int(k): v for k, v in data.get("odds", {}).items()}
+        self.app = self._build_app()
+
+    async def _respond(self, path: str, response: list, paging: Optional[dict] = None):
+        self.calls[path] += 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        headers = {"x-ratelimit-requests-limit": "1000000", "x-ratelimit-requests-remaining": "999999",
+                   "X-RateLimit-Limit": "100000", "X-RateLimit-Remaining": "99999"}
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.calls["errors"] += 1
+            return JSONResponse({"errors": {"requests": "fake upstream error"}}, status_code=500, headers=headers)
+        body = {"get": path, "errors": [], "results": len(response),
+                "paging": paging or {"current": 1, "total": 1}, "response": response}
+        return JSONResponse(body, headers=headers)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="API-Sports (fake)")
+
+        @app.get("/fixtures")
+        async def fixtures(request: Request):
+            q = request.query_params
+            if q.get("live"):
+                resp = self.live
+            elif q.get("id"):
+                resp = [f for f in [self.by_id.get(int(q["id"]))] if f]
+            elif q.get("ids"):
+                ids = [int(i) for i in q["ids"].split("-") if i]
+                resp = [dict(self.by_id[i], statistics=self.statistics.get(i, [])) for i in ids if i in self.by_id]
+            elif q.get("date"):
+                resp = self.by_date.get(q["date"], [])
+            else:
+                resp = []
+            return await self._respond("fixtures", resp)
+
+        @app.get("/fixtures/statistics")
+        async def statistics(fixture: int):
+            return await self._respond("fixtures/statistics", self.statistics.get(fixture, []))
+
+        @app.get("/odds")
+        async def odds(request: Request):
+            q = request.query_params
+            if q.get("fixture"):
+                return await self._respond("odds", self.odds.get(int(q["fixture"]), []))
+            items = [o for f in self.by_date.get(q.get("date", ""), []) for o in self.odds.get(f["fixture"]["id"], [])]
+            page = max(int(q.get("page", 1)), 1)
+            total = max((len(items) + ODDS_PAGE_SIZE - 1) // ODDS_PAGE_SIZE, 1)
+            chunk = items[(page - 1) * ODDS_PAGE_SIZE: page * ODDS_PAGE_SIZE]
+            return await self._respond("odds", chunk, {"current": page, "total": total})
+
+        @app.get("/_stats")
+        async def stats():
+            return dict(self.calls)
+
+        return app
+
+class FakeServer:
+    """Sobe a API fake com uvicorn numa thread (para os benchmarks)."""
+
+    def __init__(self, api: FakeAPISports, host: str = "127.0.0.1", port: int = 8765):
+        self.api = api
+        self.url = f"http://{host}:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(api.app, host=host, port=port, log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "FakeServer":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline or not self.thread.is_alive():
+                raise RuntimeError("API fake não subiu")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--data", help="dataset gravado (JSON); sem ele usa o sintético")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixtures", type=int, default=400)
+    parser.add_argument("--live", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+
+def from_args(args) -> FakeAPISports:
+    data = dataset.load(args.data, seed=args.seed, n_fixtures=args.fixtures, n_live=args.live)
+    return FakeAPISports(data, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, seed=args.seed)
+
+if __name__ == "__main__":
+    # python bench/fake_api.py --port 8765 --latency-ms 50 --error-rate 0.01
+    # API_URL_BASE=http://127.0.0.1:8765 uvicorn sports_betting_analyzer:app
+    parser = argparse.ArgumentParser(description="API-Sports fake para benchmarks")
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(from_args(args).app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,74 @@
+# run.py - roda a suíte de benchmarks (micro + HTTP) e compara com um baseline
+#
+#   python bench/run.py --json bench/results.json
+#   python bench/run.py --baseline bench/baseline.json --threshold 0.25   (CI: sai com 1 se regrediu)
+import argparse, json, platform, sys
+from typing import Dict, Any, List
+
+import bench_http
+import bench_memory
+import bench_micro
+
+# métrica -> True se "maior é melhor"
+METRICS = {"rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "us_per_op": False, "py_mb": False}
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Lista as métricas que pioraram mais que `threshold` (fração) em relação ao baseline."""
+    regressions = []
+    for suite in ("micro", "http", "memory"):
+        for name, cur in (current.get(suite) or {}).items():
+            base = (baseline.get(suite) or {}).get(name)
+            if not base:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                b, c = base.get(metric), cur.get(metric)
+                if not b or c is None:
+                    continue
+                change = (b - c) / b if higher_is_better else (c - b) / b
+                if change > threshold:
+                    regressions.append(f"{suite}/{name} {metric}: {b} -> {c} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks offline (API-Sports fake)")
+    bench_http.add_arguments(parser)
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--memory", action="store_true", help="inclui o benchmark de memória do snapshot")
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--baseline", help="resultados anteriores para comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="piora tolerada (fração)")
+    args = parser.parse_args()
+
+    # o app lê a config no import: aponta para a API fake antes de qualquer import dele
+    bench_http.configure_env(f"http://127.0.0.1:{args.port}", args)
+    results: Dict[str, Any] = {"python": platform.python_version(), "machine": platform.machine()}
+    if not args.skip_micro:
+        print("== micro")
+        micro_args = argparse.Namespace(**{**vars(args), "only": None})
+        results["micro"] = bench_micro.run(micro_args)
+    if args.memory:
+        print("== memória")
+        results["memory"] = bench_memory.run(argparse.Namespace(**{**vars(args), "fixtures": max(args.fixtures, 1500)}))
+    if not args.skip_http:
+        print("== http")
+        results["http"] = bench_http.run(args)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for r in regressions:
+            print("REGRESSÃO:", r)
+        if regressions:
+            sys.exit(1)
+        print(f"sem regressões acima de {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,48 @@
 # tipster.py (FastAPI) - VERSÃO FULL (CORS + Mercados completos + Preferência de casas)
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
-import requests, os, time, traceback
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Callable, Awaitable
+from collections import OrderedDict, deque
+from urllib.parse import urlencode
+import asyncio, base64, bisect, functools, gzip, hashlib, heapq, hmac, httpx, json, logging, logging.handlers, math, os, queue, random, socket, sqlite3, sys, threading, time, weakref, zlib
+import numpy as np
+import orjson
+
+try:
+    import brotli  # opcional: habilita Content-Encoding: br
+except ImportError:
+    brotli = None
 
 # ------------- Config -------------
-app = FastAPI(title="Tipster IA - Full API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_logging()
+    if PERSISTENT_CACHE_PATH:
+        # warm start: snapshot gravado por outro worker/deploy anterior
+        open_persistent_store(PERSISTENT_CACHE_PATH)
+        await load_snapshot_from_store(SNAPSHOT_DAYS_FORWARD)
+    if SCHEDULER_ENABLED:
+        start_refresh_scheduler()
+    yield
+    await scheduler.stop()
+    close_persistent_store()
+    # fecha o pool de conexões keep-alive com a API-Sports
+    await close_http_client()
+    stop_logging()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada com orjson."""
+
+    def render(self, content) -> bytes:
+        with STAGE_SECONDS.time("serialization"):
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(title="Tipster IA - Full API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Controle de CORS via env var (DEV=1 -> "*" ; PROD=0 -> lista restrita)
 DEBUG_ALLOW_ALL = os.environ.get("ALLOW_ALL_ORIGINS", "1") == "1"
@@ -32,7 +67,7 @@ app.add_middleware(
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     # log completo no servidor
-    print("UNHANDLED EXCEPTION:", traceback.format_exc())
+    log_event(logging.ERROR, "unhandled_exception", path=request.url.path, exc_info=(type(exc), exc, exc.__traceback__))
     # devolve JSON com header CORS (usa "*" para compatibilidade)
     headers = {"Access-Control-Allow-Origin": "*" if DEBUG_ALLOW_ALL else (allow_origins[0] if allow_origins else "*")}
     return JSONResponse(status_code=500, content={"detail": "Erro interno no servidor"}, headers=headers)
@@ -43,49 +78,1441 @@ def ping():
     return {"message": "pong", "utc": datetime.utcnow().isoformat()}
 
 API_SPORTS_KEY = os.environ.get("API_SPORTS_KEY", "7baa5e00c8ae57d0e6240f790c6840dd")
-API_URL_BASE = "https://v3.football.api-sports.io"
+API_URL_BASE = os.environ.get("API_URL_BASE", "https://v3.football.api-sports.io")  # bench/: aponta para a API fake local
 HEADERS = {"x-apisports-key": API_SPORTS_KEY}
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "25"))  # segundos
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "10"))
 
 PREFERRED_BOOKMAKERS = ["bet365", "betano", "superbet", "pinnacle"]
 
-CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))  # segundos
-_cache: Dict[str, Dict[str, Any]] = {}
+# Cota da API-Sports (token buckets por minuto e por dia) e prioridades
+QUOTA_ENABLED = os.environ.get("QUOTA_ENABLED", "1") == "1"
+API_RATE_PER_MINUTE = int(os.environ.get("API_RATE_PER_MINUTE", "300"))
+API_RATE_PER_DAY = int(os.environ.get("API_RATE_PER_DAY", "7500"))
+QUOTA_MAX_WAIT = float(os.environ.get("QUOTA_MAX_WAIT", "10"))  # segundos na fila antes de desistir
+# abaixo desta fração da cota diária a classe é descartada (live nunca é descartada)
+QUOTA_SHED_BELOW = {
+    "user": float(os.environ.get("QUOTA_SHED_USER", "0.05")),
+    "prefetch": float(os.environ.get("QUOTA_SHED_PREFETCH", "0.2")),
+}
+API_PRIORITIES = {"live": 0, "user": 1, "prefetch": 2}
+
+CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))  # segundos (default por namespace)
+# TTL por namespace (prefixo da chave antes de ":"); sobrescreva com CACHE_TTL_<NAMESPACE>
+CACHE_TTLS: Dict[str, int] = {
+    ns: int(os.environ.get(f"CACHE_TTL_{ns.upper()}", str(ttl)))
+    for ns, ttl in {
+        "snapshot": CACHE_TTL,
+        "live": 15,
+        "fixtures": CACHE_TTL,
+        "fixture": 30,
+        "stats": 30,
+        "odds": 300,
+    }.items()
+}
+# janela após o TTL em que o dado expirado ainda é servido enquanto revalida em background
+CACHE_STALE_TTL = int(os.environ.get("CACHE_STALE_TTL", "600"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Cache persistente compartilhado entre workers do host (SQLite em WAL); vazio = desligado
+PERSISTENT_CACHE_PATH = os.environ.get("PERSISTENT_CACHE_PATH", "")
+PERSISTENT_NAMESPACES = {"fixture", "stats", "odds"}
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Scheduler de refresh em background (mantém snapshot e jogos ao vivo aquecidos)
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "1") == "1"
+SNAPSHOT_DAYS_FORWARD = int(os.environ.get("SNAPSHOT_DAYS_FORWARD", "2"))
+LIVE_REFRESH_SECONDS = float(os.environ.get("LIVE_REFRESH_SECONDS", "15"))
+DATES_REFRESH_SECONDS = float(os.environ.get("DATES_REFRESH_SECONDS", "300"))
+REFRESH_JITTER = float(os.environ.get("REFRESH_JITTER", "0.1"))  # fração do intervalo
+REFRESH_MAX_BACKOFF = float(os.environ.get("REFRESH_MAX_BACKOFF", "600"))  # segundos
+
+# TTL do resultado do /analyze conforme o status do jogo (0 = não expira)
+ANALYZE_TTL_FINISHED = float(os.environ.get("ANALYZE_TTL_FINISHED", "0"))
+ANALYZE_TTL_SCHEDULED = float(os.environ.get("ANALYZE_TTL_SCHEDULED", "300"))
+ANALYZE_TTL_LIVE = float(os.environ.get("ANALYZE_TTL_LIVE", "10"))
+ANALYZE_TTL_DEGRADED = float(os.environ.get("ANALYZE_TTL_DEGRADED", "5"))  # análise parcial (sem odds/stats)
+
+# prazo total do /analyze (repassado a cada chamada upstream) e circuit breaker por path da API
+ANALYZE_DEADLINE = float(os.environ.get("ANALYZE_DEADLINE", "8"))  # segundos
+ANALYZE_DEADLINE_RESERVE = 0.25  # segundos do prazo guardados para montar a resposta parcial
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))  # falhas seguidas até abrir
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))  # segundos aberto antes da chamada de teste
+
+# respostas JSON: compressão acima deste tamanho e limite de variantes memoizadas por payload
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+VARIANT_MEMO_SIZE = int(os.environ.get("VARIANT_MEMO_SIZE", "64"))
+
+BATCH_MAX_FIXTURES = int(os.environ.get("BATCH_MAX_FIXTURES", "200"))
+
+# /games paginado (cursor): tamanho padrão e máximo da página
+GAMES_PAGE_SIZE = int(os.environ.get("GAMES_PAGE_SIZE", "100"))
+GAMES_PAGE_MAX = int(os.environ.get("GAMES_PAGE_MAX", "500"))
+
+# Agrupa buscas de fixture/estatística por id em chamadas fixtures?ids=a-b-c (máx. 20 ids)
+FIXTURE_BATCH_ENABLED = os.environ.get("FIXTURE_BATCH_ENABLED", "1") == "1"
+FIXTURE_BATCH_WINDOW = float(os.environ.get("FIXTURE_BATCH_WINDOW_MS", "20")) / 1000.0
+FIXTURE_BATCH_MAX_IDS = 20
+
+# Odds em lote: varredura paginada de odds?date= (janela do snapshot) para o store de
+# melhores odds por fixture; o /analyze só chama odds?fixture= para jogos fora dele
+ODDS_SWEEP_ENABLED = os.environ.get("ODDS_SWEEP_ENABLED", "1") == "1"
+ODDS_SWEEP_SECONDS = float(os.environ.get("ODDS_SWEEP_SECONDS", "900"))
+# datas depois de hoje mudam pouco: varridas com esta idade mínima (abaixo de ODDS_STORE_MAX_AGE)
+ODDS_SWEEP_FUTURE_SECONDS = float(os.environ.get("ODDS_SWEEP_FUTURE_SECONDS", "1800"))
+ODDS_SWEEP_CONCURRENCY = int(os.environ.get("ODDS_SWEEP_CONCURRENCY", "4"))  # páginas em paralelo
+ODDS_SWEEP_MAX_PAGES = int(os.environ.get("ODDS_SWEEP_MAX_PAGES", "200"))  # por data
+ODDS_STORE_MAX_AGE = float(os.environ.get("ODDS_STORE_MAX_AGE", "2700"))  # segundos; mais velho = busca por fixture
+
+# Stream de jogos ao vivo (SSE / WebSocket): fila por cliente, histórico para
+# reconexão (Last-Event-ID) e intervalo de keep-alive em segundos
+LIVE_STREAM_QUEUE = int(os.environ.get("LIVE_STREAM_QUEUE", "256"))
+LIVE_STREAM_BACKLOG = int(os.environ.get("LIVE_STREAM_BACKLOG", "512"))
+LIVE_STREAM_KEEPALIVE = float(os.environ.get("LIVE_STREAM_KEEPALIVE", "15"))
+
+# Logs estruturados (JSON por linha) gravados por uma thread separada
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")  # json | text
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))  # fração dos logs por requisição
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT_PER_MINUTE", "30"))  # warnings/erros por evento/minuto
+
+# Profiling por requisição (exige PROFILE_TOKEN: os profiles têm paths e query strings):
+# PROFILE_ENABLED=1 perfila uma fração das requisições das rotas em PROFILE_PATHS e o
+# header "X-Profile: <token>" perfila aquela requisição. Profiles ficam num ring
+# buffer, lido em /admin/profiles com o header X-Profile-Token.
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_PATHS = tuple(p for p in os.environ.get("PROFILE_PATHS", "/analyze,/analyze/batch").split(",") if p)
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "2")) / 1000.0
+PROFILE_BUFFER = int(os.environ.get("PROFILE_BUFFER", "50"))
+PROFILE_MAX_CONCURRENT = int(os.environ.get("PROFILE_MAX_CONCURRENT", "2"))
+
+# ------------- Métricas (Prometheus) -------------
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_str(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join('%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, Any] = {}
+        _metrics.append(self)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(nome, labels formatados, valor) de cada série."""
+        return [(self.name, _label_str(self.labels, k), v) for k, v in list(self._values.items())]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {value:g}")
+        return lines
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), fn: Optional[Callable[[], Dict[tuple, float]]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn  # gauge calculado na hora da coleta
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def samples(self):
+        if self.fn is not None:
+            try:
+                self._values = dict(self.fn())
+            except Exception:
+                pass
+        return super().samples()
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        rec = self._values.get(labels)
+        if rec is None:
+            rec = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]  # contagens por bucket, soma, total
+        rec[0][bisect.bisect_left(self.buckets, value)] += 1
+        rec[1] += value
+        rec[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def samples(self):
+        out = []
+        for labels, (counts, total, n) in list(self._values.items()):
+            cumulative = 0
+            for bound, c in zip((*self.buckets, math.inf), counts):
+                cumulative += c
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                out.append((f"{self.name}_bucket", _label_str((*self.labels, "le"), (*labels, le)), cumulative))
+            out.append((f"{self.name}_sum", _label_str(self.labels, labels), total))
+            out.append((f"{self.name}_count", _label_str(self.labels, labels), n))
+        return out
+
+_metrics: List[Metric] = []
+
+UPSTREAM_SECONDS = HistogramMetric("tipster_upstream_request_seconds", "Latência das chamadas à API-Sports", ("path",))
+UPSTREAM_REQUESTS = CounterMetric("tipster_upstream_requests_total", "Chamadas à API-Sports por resultado (2xx, 4xx, 5xx, error, timeout, shed, deadline, open)", ("path", "outcome"))
+CACHE_REQUESTS = CounterMetric("tipster_cache_requests_total", "Leituras do cache em memória por namespace (hit, stale, miss)", ("namespace", "result"))
+STAGE_SECONDS = HistogramMetric("tipster_stage_seconds", "Tempo por etapa do processamento", ("stage",))
+HTTP_SECONDS = HistogramMetric("tipster_http_request_seconds", "Latência das requisições HTTP do app", ("path", "method", "status"))
+HTTP_IN_FLIGHT = GaugeMetric("tipster_http_requests_in_flight", "Requisições HTTP em andamento", ("path",))
+ANALYZE_DEGRADED = CounterMetric("tipster_analyze_degraded_total", "Análises servidas sem uma das partes (stats, odds)", ("missing",))
+LOG_SUPPRESSED = CounterMetric("tipster_log_suppressed_total", "Logs descartados pelo limite por evento", ("event",))
+
+def timed_stage(stage: str):
+    """Decorator: registra o tempo da função em tipster_stage_seconds{stage=...}."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - t0, stage)
+        return wrapper
+    return decorator
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """Latência e requisições em andamento por rota (ASGI puro: não bufferiza streams)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._paths: Optional[set] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._paths is None:
+            self._paths = {getattr(r, "path", None) for r in app.routes}
+        # rotas desconhecidas num label só (evita cardinalidade alta)
+        path = scope["path"] if scope["path"] in self._paths else "other"
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(path)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(path)
+            HTTP_SECONDS.observe(time.perf_counter() - t0, path, scope["method"], str(status[0]))
+
+app.add_middleware(MetricsMiddleware)
+
+# ------------- Logging estruturado -------------
+class JSONLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower(), "event": record.getMessage()}
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+class TextLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        line = f"[{record.levelname.lower()}] {record.getMessage()} " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line.rstrip()
+
+class _LogRateLimiter:
+    """Até LOG_RATE_LIMIT registros por evento a cada minuto; o resto vira contador."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._windows: Dict[str, List[float]] = {}  # evento -> [início da janela, emitidos, suprimidos]
+
+    def allow(self, event: str) -> Tuple[bool, int]:
+        now = time.monotonic()
+        w = self._windows.get(event)
+        if w is None or now - w[0] >= 60:
+            suppressed = int(w[2]) if w else 0
+            self._windows[event] = [now, 1, 0]
+            return True, suppressed
+        if w[1] < self.per_minute:
+            w[1] += 1
+            return True, 0
+        w[2] += 1
+        LOG_SUPPRESSED.inc(event)
+        return False, 0
+
+logger = logging.getLogger("tipster")
+_log_limiter = _LogRateLimiter(LOG_RATE_LIMIT)
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def start_logging():
+    """Handler em fila: o event loop só enfileira, a escrita em stdout fica numa thread."""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    stream = logging.StreamHandler()
+    stream.setFormatter(JSONLogFormatter() if LOG_FORMAT == "json" else TextLogFormatter())
+    q: "queue.Queue" = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(q))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(q, stream)
+    _log_listener.start()
+
+def stop_logging():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def log_event(level: int, event: str, sample: float = 1.0, exc_info=None, **fields):
+    """
+    Log estruturado. `sample` < 1 registra só essa fração (logs do hot path);
+    warnings/erros passam pelo limite por evento para não inundar a saída.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample < 1.0 and random.random() >= sample:
+        return
+    if level >= logging.WARNING:
+        ok, suppressed = _log_limiter.allow(event)
+        if not ok:
+            return
+        if suppressed:
+            fields["suppressed"] = suppressed
+    logger.log(level, event, extra={"fields": fields}, exc_info=exc_info)
+
+# ------------- Profiling por requisição (flame graph) -------------
+# Amostragem da pilha do event loop numa thread, só nas requisições escolhidas
+# (fração de PROFILE_PATHS ou header X-Profile com o PROFILE_TOKEN). Sem token,
+# o middleware nem é registrado: custo zero no hot path.
+PROFILES_CAPTURED = CounterMetric("tipster_profiles_total", "Profiles de requisição capturados por gatilho (sample, header)", ("trigger",))
+
+_frame_labels: Dict[Any, str] = {}
+
+def _frame_label(code) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        label = _frame_labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+def _await_chain(task: asyncio.Task) -> List[Any]:
+    """
+    Frames que a tarefa está aguardando, de fora para dentro: desce por
+    coroutines, Tasks (ex.: single-flight) e asyncio.gather (primeiro filho
+    pendente). Lido de outra thread: no pior caso uma amostra sai incompleta.
+    """
+    out: List[Any] = []
+    obj: Any = task
+    while obj is not None and len(out) < 256:
+        if isinstance(obj, asyncio.Task):
+            obj = obj.get_coro()
+            continue
+        frame = getattr(obj, "cr_frame", None) or getattr(obj, "ag_frame", None) or getattr(obj, "gi_frame", None)
+        if frame is not None:
+            out.append(frame)
+            obj = getattr(obj, "cr_await", None) or getattr(obj, "ag_await", None) or getattr(obj, "gi_yieldfrom", None)
+            continue
+        children = getattr(obj, "_children", None)  # _GatheringFuture
+        obj = next((c for c in children if not c.done()), None) if children else None
+    return out
+
+# profiler da requisição; tasks criadas durante ela (single-flight, gather) herdam o contexto
+_profiler: ContextVar[Optional["RequestProfiler"]] = ContextVar("profiler", default=None)
+_prev_task_factory: Any = None
+
+def _profiling_task_factory(loop, coro, **kwargs):
+    """Task factory ativa só enquanto há profile: registra as tasks criadas no contexto da requisição."""
+    task = _prev_task_factory(loop, coro, **kwargs) if _prev_task_factory is not None else asyncio.Task(coro, loop=loop, **kwargs)
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.tasks.add(task)
+    return task
+
+def _profiling_begin(loop: asyncio.AbstractEventLoop):
+    global _prev_task_factory
+    if profiles.active == 0:
+        _prev_task_factory = loop.get_task_factory()
+        loop.set_task_factory(_profiling_task_factory)
+    profiles.active += 1
+
+def _profiling_end(loop: asyncio.AbstractEventLoop):
+    profiles.active -= 1
+    if profiles.active == 0:
+        loop.set_task_factory(_prev_task_factory)
+
+class RequestProfiler:
+    """
+    Amostra, a cada `interval`, onde está a requisição: rodando (pilha real do
+    event loop a partir da coroutine da task dela, ou de uma task criada por ela),
+    aguardando I/O (cadeia de awaits + "(aguardando I/O)") ou esperando o loop
+    rodar tarefas de outras requisições. Cada amostra vira uma pilha colapsada
+    ("a;b;c") com contagem.
+    """
+
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop, interval: float = PROFILE_INTERVAL):
+        self.task = task
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()  # tasks criadas pela requisição
+        self._related: Optional[asyncio.Task] = None  # última delas vista rodando
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                stack = self._sample()
+            except Exception:
+                continue
+            if stack:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def _sample(self) -> Optional[str]:
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None or self.task.done():
+            return None
+        running = asyncio.current_task(self.loop)
+        if running is not None and (running is self.task or running in self.tasks):
+            labels = []
+            if running is not self.task:
+                self._related = running
+                labels = [_frame_label(f.f_code) for f in _await_chain(self.task)]
+            root = running.get_coro().cr_frame
+            stack = []
+            while frame is not None and frame is not root:
+                stack.append(frame)
+                frame = frame.f_back
+            if frame is None:
+                return None
+            stack.append(root)
+            return ";".join(labels + [_frame_label(f.f_code) for f in reversed(stack)])
+        chain = _await_chain(self.task)
+        related = self._related
+        if related is not None and not related.done():
+            chain += _await_chain(related)
+        labels = [_frame_label(f.f_code) for f in chain]
+        if running is None and frame.f_code.co_filename.endswith("selectors.py"):
+            labels.append("(aguardando I/O)")
+        else:
+            labels.append("(outras tarefas)")
+            if running is not None:
+                labels.append(_frame_label(running.get_coro().cr_code))
+        return ";".join(labels)
+
+class ProfileStore:
+    """Últimos PROFILE_BUFFER profiles capturados (ring buffer em memória, por worker)."""
+
+    def __init__(self, size: int = PROFILE_BUFFER):
+        self._items: deque = deque(maxlen=size)
+        self._seq = 0
+        self.active = 0
+
+    def next_id(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def add(self, profile: Dict[str, Any]):
+        self._items.append(profile)
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        return next((p for p in self._items if p["id"] == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in reversed(self._items)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"stored": len(self._items), "captured": self._seq, "active": self.active,
+                "enabled": PROFILE_ENABLED and bool(PROFILE_TOKEN), "header": bool(PROFILE_TOKEN)}
+
+profiles = ProfileStore()
+
+def to_collapsed(profile: Dict[str, Any]) -> str:
+    """Formato de pilhas colapsadas (flamegraph.pl, speedscope, inferno)."""
+    return "".join(f"{stack} {n}\n" for stack, n in profile["stacks"].items())
+
+def to_speedscope(profile: Dict[str, Any]) -> Dict[str, Any]:
+    frames: List[dict] = []
+    index: Dict[str, int] = {}
+    samples, weights = [], []
+    for stack, n in profile["stacks"].items():
+        ids = []
+        for name in stack.split(";"):
+            i = index.get(name)
+            if i is None:
+                i = index[name] = len(frames)
+                frames.append({"name": name})
+            ids.append(i)
+        samples.append(ids)
+        weights.append(n * profile["interval_ms"])
+    name = f'{profile["method"]} {profile["path"]} #{profile["id"]}'
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "tipster-ia",
+        "shared": {"frames": frames},
+        "profiles": [{"type": "sampled", "name": name, "unit": "milliseconds", "startValue": 0,
+                      "endValue": sum(weights), "samples": samples, "weights": weights}],
+    }
+
+def _profile_trigger(scope) -> Optional[str]:
+    if PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return "header" if hmac.compare_digest(value, PROFILE_TOKEN.encode()) else None
+    if PROFILE_ENABLED and scope["path"] in PROFILE_PATHS and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+class ProfilingMiddleware:
+    """Perfila as requisições sorteadas/pedidas; a resposta leva X-Profile-Id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = _profile_trigger(scope)
+        if trigger is None or profiles.active >= PROFILE_MAX_CONCURRENT:
+            return await self.app(scope, receive, send)
+        pid = profiles.next_id()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", str(pid).encode())]
+            await send(message)
+
+        profiler = RequestProfiler(asyncio.current_task(), asyncio.get_running_loop())
+        token = _profiler.set(profiler)
+        _profiling_begin(profiler.loop)
+        started = time.time()
+        t0 = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _profiler.reset(token)
+            _profiling_end(profiler.loop)
+            duration_ms = round((time.perf_counter() - t0) * 1000, 2)
+            profiles.add({"id": pid, "method": scope["method"], "path": scope["path"],
+                          "query": scope.get("query_string", b"").decode("latin-1"), "status": status[0],
+                          "trigger": trigger, "started_at": started, "duration_ms": duration_ms,
+                          "samples": profiler.samples, "interval_ms": profiler.interval * 1000, "stacks": profiler.stacks})
+            PROFILES_CAPTURED.inc(trigger)
+            log_event(logging.INFO, "profile_captured", id=pid, path=scope["path"], duration_ms=duration_ms,
+                      samples=profiler.samples, trigger=trigger)
+
+# sem token não há como ler os profiles com segurança: nem registra o middleware
+if PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+def _require_profile_token(request: Request):
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Profiling desativado (defina PROFILE_TOKEN)")
+    if not hmac.compare_digest(request.headers.get("x-profile-token", ""), PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de profiling inválido")
+
+@app.get("/admin/profiles")
+def list_profiles(request: Request):
+    _require_profile_token(request)
+    return {"profiles": profiles.list(), **profiles.stats()}
+
+@app.get("/admin/profiles/{profile_id}")
+def download_profile(request: Request, profile_id: int, format: str = Query("speedscope")):
+    _require_profile_token(request)
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="format deve ser speedscope ou collapsed")
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} não está mais no buffer")
+    if format == "collapsed":
+        return Response(content=to_collapsed(profile), media_type="text/plain; charset=utf-8",
+                        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'})
+    return FastJSONResponse(to_speedscope(profile),
+                            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'})
 
 # ------------- Cache helpers -------------
+def _approx_size(data) -> int:
+    nbytes = getattr(data, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    try:
+        # tamanho do JSON compacto; orjson é rápido o bastante para rodar a cada set
+        return len(orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS))
+    except Exception:
+        return 1024
+
+class BoundedCache:
+    """
+    Cache LRU limitado por número de entradas e por bytes aproximados,
+    com TTL por namespace e janela de stale-while-revalidate.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttls: Dict[str, int], default_ttl: int, stale_ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[str, Tuple[float, int, Any, Optional[float]]]" = OrderedDict()  # key -> (ts, size, data, ttl)
+        self._bytes = 0
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "sets": 0}
+
+    def ttl_for(self, key: str) -> int:
+        ns = key.split(":", 1)[0]
+        return self.ttls.get(ns, self.default_ttl)
+
+    def get(self, key: str, allow_stale: bool = False, allow_expired: bool = False) -> Tuple[Any, bool]:
+        """
+        Retorna (data, fresh). (None, False) em miss ou se expirado e allow_stale=False.
+        allow_expired devolve o dado mesmo além da janela stale (upstream fora do ar).
+        """
+        rec = self._data.get(key)
+        ns = key.split(":", 1)[0]
+        if rec is None:
+            self._stats["misses"] += 1
+            CACHE_REQUESTS.inc(ns, "miss")
+            return None, False
+        ts, _size, data, ttl = rec
+        age = time.time() - ts
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        if age <= ttl:
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            CACHE_REQUESTS.inc(ns, "hit")
+            return data, True
+        if age > ttl + self.stale_ttl and not allow_expired:
+            self._remove(key)
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            CACHE_REQUESTS.inc(ns, "miss")
+            return None, False
+        if not allow_stale:
+            self._stats["misses"] += 1
+            CACHE_REQUESTS.inc(ns, "miss")
+            return None, False
+        self._data.move_to_end(key)
+        self._stats["stale_hits"] += 1
+        CACHE_REQUESTS.inc(ns, "stale")
+        return data, False
+
+    def set(self, key: str, data, size: Optional[int] = None, ttl: Optional[float] = None, ts: Optional[float] = None):
+        """
+        `ttl` sobrescreve o TTL do namespace só para esta entrada (math.inf = sem expiração).
+        `ts` preserva a idade de um dado vindo de fora (ex.: cache persistente).
+        """
+        if key in self._data:
+            self._remove(key)
+        size = size if size is not None else _approx_size(data)
+        self._data[key] = (ts if ts is not None else time.time(), size, data, ttl)
+        self._bytes += size
+        self._stats["sets"] += 1
+        # evicta o menos recente até caber nos limites (mantém ao menos a entrada nova)
+        while len(self._data) > 1 and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            old_key = next(iter(self._data))
+            self._remove(old_key)
+            self._stats["evictions"] += 1
+
+    def peek(self, key: str):
+        """Dado da entrada, vencido ou não, sem mexer em LRU nem estatísticas."""
+        rec = self._data.get(key)
+        return rec[2] if rec is not None else None
+
+    def pop(self, key: str) -> bool:
+        if key in self._data:
+            self._remove(key)
+            return True
+        return False
+
+    def _remove(self, key: str):
+        _ts, size, _data, _ttl = self._data.pop(key)
+        self._bytes -= size
+
+    def usage_by_namespace(self) -> Dict[str, Tuple[int, int]]:
+        """namespace -> (entradas, bytes aproximados)."""
+        usage: Dict[str, List[int]] = {}
+        for key, rec in list(self._data.items()):
+            u = usage.setdefault(key.split(":", 1)[0], [0, 0])
+            u[0] += 1
+            u[1] += rec[1]
+        return {ns: (u[0], u[1]) for ns, u in usage.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = {ns: n for ns, (n, _b) in self.usage_by_namespace().items()}
+        return {**self._stats, "entries": len(self._data), "bytes": self._bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes, "namespaces": namespaces}
+
+_cache = BoundedCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTLS, CACHE_TTL, CACHE_STALE_TTL)
+
+GaugeMetric("tipster_cache_entries", "Entradas no cache em memória por namespace", ("namespace",),
+            fn=lambda: {(ns,): n for ns, (n, _b) in _cache.usage_by_namespace().items()})
+GaugeMetric("tipster_cache_bytes", "Bytes aproximados no cache em memória por namespace", ("namespace",),
+            fn=lambda: {(ns,): b for ns, (_n, b) in _cache.usage_by_namespace().items()})
+
 def _cache_get(key: str):
-    rec = _cache.get(key)
-    if not rec:
-        return None
-    if time.time() - rec.get("ts", 0) > CACHE_TTL:
-        _cache.pop(key, None)
-        return None
-    return rec.get("data")
+    data, _fresh = _cache.get(key)
+    return data
+
+def _cache_get_entry(key: str, allow_expired: bool = False) -> Tuple[Any, bool]:
+    """Como _cache_get, mas aceita dado vencido dentro da janela stale: (data, fresh)."""
+    return _cache.get(key, allow_stale=True, allow_expired=allow_expired)
+
+def _cache_set(key: str, data, size: Optional[int] = None, ttl: Optional[float] = None):
+    _cache.set(key, data, size, ttl)
+
+# ------------- Persistent cache (SQLite compartilhado) -------------
+class SQLiteCacheStore:
+    """
+    Cache L2 num arquivo SQLite (modo WAL) compartilhado pelos workers do host.
+    Valores são gravados como JSON comprimido com zlib. Também guarda leases,
+    usadas para que só um worker por host faça o refresh upstream.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl REAL NOT NULL, value BLOB NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)")
+        self._stats = {"reads": 0, "hits": 0, "writes": 0, "bytes_written": 0, "purged": 0, "errors": 0}
+
+    @staticmethod
+    def encode(data) -> bytes:
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6)
+
+    @staticmethod
+    def decode(blob: bytes):
+        return json.loads(zlib.decompress(blob))
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Retorna (ts, data) ou None."""
+        self._stats["reads"] += 1
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT ts, value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._stats["hits"] += 1
+            return row[0], self.decode(row[1])
+        except Exception as e:
+            self._stats["errors"] += 1
+            log_event(logging.WARNING, "persistent_cache_error", op="get", key=key, error=str(e))
+            return None
+
+    def set(self, key: str, data, ts: Optional[float] = None, ttl: float = 0):
+        try:
+            blob = self.encode(data)
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO entries (key, ts, ttl, value) VALUES (?, ?, ?, ?)",
+                                   (key, ts if ts is not None else time.time(), ttl, blob))
+            self._stats["writes"] += 1
+            self._stats["bytes_written"] += len(blob)
+        except Exception as e:
+            self._stats["errors"] += 1
+            log_event(logging.WARNING, "persistent_cache_error", op="set", key=key, error=str(e))
+
+    def purge(self, grace: float) -> int:
+        """Remove entradas vencidas há mais de `grace` segundos."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM entries WHERE ts + ttl + ? < ?", (grace, time.time()))
+        self._stats["purged"] += cur.rowcount
+        return cur.rowcount
+
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """Pega ou renova a lease `name`; False se outro holder tem uma lease válida."""
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO leases (name, holder, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires = excluded.expires "
+                    "WHERE leases.holder = excluded.holder OR leases.expires < ?",
+                    (name, holder, now + ttl, now),
+                )
+                row = self._conn.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+            return bool(row) and row[0] == holder
+        except Exception as e:
+            self._stats["errors"] += 1
+            log_event(logging.WARNING, "persistent_cache_error", op="lease", key=name, error=str(e))
+            return False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, **self._stats}
+
+persistent_store: Optional[SQLiteCacheStore] = None
+
+def open_persistent_store(path: str) -> SQLiteCacheStore:
+    global persistent_store
+    if persistent_store is None:
+        persistent_store = SQLiteCacheStore(path)
+    return persistent_store
+
+def close_persistent_store():
+    global persistent_store
+    if persistent_store is not None:
+        persistent_store.close()
+        persistent_store = None
+
+def _persistent_key(key: str) -> bool:
+    return persistent_store is not None and key.split(":", 1)[0] in PERSISTENT_NAMESPACES
+
+async def _store_load(key: str, allow_expired: bool = False) -> Tuple[Any, bool]:
+    """Busca `key` no cache persistente e promove para o L1 mantendo a idade original: (data, fresh)."""
+    rec = await asyncio.to_thread(persistent_store.get, key)
+    if rec is None:
+        return None, False
+    ts, data = rec
+    ttl = _cache.ttl_for(key)
+    age = time.time() - ts
+    if age > ttl + CACHE_STALE_TTL and not allow_expired:
+        return None, False
+    _cache.set(key, data, ts=ts)
+    return data, age <= ttl
+
+def _store_save(key: str, data, ttl: float = 0):
+    """Grava no cache persistente em background (não bloqueia o event loop)."""
+    task = asyncio.ensure_future(asyncio.to_thread(persistent_store.set, key, data, time.time(), ttl))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+# ------------- Prazos (deadline por requisição) -------------
+# instante (time.monotonic) até quando as chamadas upstream do contexto atual podem rodar
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """O prazo da requisição acabou antes do resultado ficar pronto."""
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """
+    Define o prazo das chamadas upstream feitas dentro do bloco (herdado por tasks
+    filhas). Um prazo interno nunca estende o externo; None remove o prazo
+    (tarefas em background que não pertencem a uma requisição).
+    """
+    value = None
+    if seconds is not None:
+        value = time.monotonic() + seconds
+        outer = _deadline.get()
+        if outer is not None:
+            value = min(value, outer)
+    token = _deadline.set(value)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left() -> Optional[float]:
+    """Segundos restantes do prazo atual (None = sem prazo)."""
+    d = _deadline.get()
+    return None if d is None else d - time.monotonic()
+
+def deadline_passed() -> bool:
+    left = time_left()
+    return left is not None and left <= 0
+
+async def await_within_deadline(aw: Awaitable[Any], what: str = ""):
+    """Aguarda `aw` até o fim do prazo atual; DeadlineExceeded se estourar."""
+    left = time_left()
+    if left is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, max(left, 0.0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(what) from None
+
+# ------------- Single-flight -------------
+_inflight: Dict[str, asyncio.Task] = {}
+_singleflight_stats: Dict[str, Dict[str, int]] = {}
+
+def _sf_counter(key: str) -> Dict[str, int]:
+    kind = key.split("?", 1)[0]
+    return _singleflight_stats.setdefault(kind, {"leaders": 0, "coalesced": 0})
+
+def _sf_done(key: str, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        _inflight.pop(key, None)
+    # marca exceção como consumida caso nenhum chamador tenha aguardado
+    if not task.cancelled():
+        task.exception()
+
+async def singleflight(key: str, fn: Callable[[], Awaitable[Any]]):
+    """
+    Executa `fn` uma única vez por chave ao mesmo tempo.
+    Chamadas concorrentes com a mesma chave aguardam o resultado da primeira.
+    O fetch roda numa task própria: se o chamador líder for cancelado
+    (cliente desconectou), os demais continuam recebendo o resultado.
+    Cada chamador espera no máximo até o próprio prazo (DeadlineExceeded);
+    a task segue e o resultado fica para os próximos.
+    """
+    counter = _sf_counter(key)
+    task = _inflight.get(key)
+    if task is not None:
+        counter["coalesced"] += 1
+    else:
+        counter["leaders"] += 1
+        task = asyncio.ensure_future(fn())
+        _inflight[key] = task
+        task.add_done_callback(lambda t, k=key: _sf_done(k, t))
+    return await await_within_deadline(asyncio.shield(task), key)
+
+def singleflight_stats() -> Dict[str, Any]:
+    return {
+        "inflight": len(_inflight),
+        "leaders": sum(c["leaders"] for c in _singleflight_stats.values()),
+        "coalesced": sum(c["coalesced"] for c in _singleflight_stats.values()),
+        "by_key": {k: dict(v) for k, v in _singleflight_stats.items()},
+    }
+
+# ------------- Quota scheduler -------------
+# prioridade das chamadas upstream feitas no contexto atual (herdada por tasks filhas)
+_api_priority: ContextVar[str] = ContextVar("api_priority", default="user")
+
+@contextmanager
+def api_priority(priority: str):
+    token = _api_priority.set(priority)
+    try:
+        yield
+    finally:
+        _api_priority.reset(token)
+
+class TokenBucket:
+    def __init__(self, capacity: float, period: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period  # tokens por segundo
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def time_to_token(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def sync(self, limit: Optional[str], remaining: Optional[str]):
+        """Ajusta o bucket com os headers de cota devolvidos pela API."""
+        if limit:
+            try:
+                cap = float(limit)
+                if cap > 0 and cap != self.capacity:
+                    self.rate = self.rate * cap / self.capacity
+                    self.capacity = cap
+            except ValueError:
+                pass
+        if remaining is not None:
+            try:
+                self._refill()
+                # o remaining da API é a verdade: sobe ou desce o saldo local
+                self.tokens = min(self.capacity, float(remaining))
+            except ValueError:
+                pass
+
+class QuotaScheduler:
+    """
+    Controla a cota da API-Sports antes de cada chamada upstream.
+    Chamadas esperam por token numa fila por prioridade (live > user > prefetch);
+    com a cota diária baixa as classes menos prioritárias são descartadas.
+    """
+
+    def __init__(self, per_minute: int, per_day: int, max_wait: float = QUOTA_MAX_WAIT):
+        self.minute = TokenBucket(per_minute, 60)
+        self.day = TokenBucket(per_day, 86400)
+        self.max_wait = max_wait
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = 0
+        self._pump_task: Optional[asyncio.Task] = None
+        self._stats = {p: {"granted": 0, "shed": 0, "timeouts": 0} for p in API_PRIORITIES}
+        self._throttled = 0
+
+    def _should_shed(self, priority: str) -> bool:
+        floor = QUOTA_SHED_BELOW.get(priority)
+        return floor is not None and self.day.available() < floor * self.day.capacity
+
+    def _try_take(self) -> bool:
+        if self.minute.available() >= 1 and self.day.available() >= 1:
+            self.minute.take()
+            self.day.take()
+            return True
+        return False
+
+    async def acquire(self, priority: str = "user", max_wait: Optional[float] = None) -> bool:
+        """
+        True se a chamada pode seguir; False se foi descartada (cota baixa ou espera longa).
+        `max_wait` encurta a espera na fila (ex.: o que resta do prazo da requisição).
+        """
+        priority = priority if priority in API_PRIORITIES else "user"
+        if self._should_shed(priority):
+            self._stats[priority]["shed"] += 1
+            return False
+        if not self._waiters and self._try_take():
+            self._stats[priority]["granted"] += 1
+            return True
+
+        fut = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, (API_PRIORITIES[priority], self._seq, fut))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        try:
+            wait = self.max_wait if max_wait is None else max(min(self.max_wait, max_wait), 0.0)
+            ok = await asyncio.wait_for(asyncio.shield(fut), timeout=wait)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                ok = fut.result()
+            else:
+                fut.cancel()
+                self._stats[priority]["timeouts"] += 1
+                return False
+        self._stats[priority]["granted" if ok else "shed"] += 1
+        return ok
+
+    async def _pump(self):
+        priority_names = {v: k for k, v in API_PRIORITIES.items()}
+        while self._waiters:
+            prio, _seq, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._should_shed(priority_names[prio]):
+                heapq.heappop(self._waiters)
+                fut.set_result(False)
+                continue
+            if self._try_take():
+                heapq.heappop(self._waiters)
+                fut.set_result(True)
+                continue
+            await asyncio.sleep(max(self.minute.time_to_token(), self.day.time_to_token(), 0.01))
+
+    def observe(self, headers, status_code: int):
+        """Lê os headers de cota da resposta; 429 zera o bucket do minuto."""
+        self.day.sync(headers.get("x-ratelimit-requests-limit"), headers.get("x-ratelimit-requests-remaining"))
+        self.minute.sync(headers.get("x-ratelimit-limit"), headers.get("x-ratelimit-remaining"))
+        if status_code == 429:
+            self._throttled += 1
+            self.minute.tokens = min(self.minute.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": QUOTA_ENABLED,
+            "minute_remaining": round(self.minute.available(), 2), "minute_limit": self.minute.capacity,
+            "day_remaining": round(self.day.available(), 2), "day_limit": self.day.capacity,
+            "queue_depth": sum(1 for _p, _s, f in self._waiters if not f.done()),
+            "throttled": self._throttled,
+            "by_priority": {k: dict(v) for k, v in self._stats.items()},
+        }
+
+quota = QuotaScheduler(API_RATE_PER_MINUTE, API_RATE_PER_DAY)
+
+GaugeMetric("tipster_quota_remaining", "Tokens de cota disponíveis por janela", ("window",),
+            fn=lambda: {("minute",): quota.minute.available(), ("day",): quota.day.available()})
+GaugeMetric("tipster_upstream_in_flight", "Chamadas upstream em andamento (single-flight)", fn=lambda: {(): len(_inflight)})
+
+# ------------- Circuit breaker -------------
+class CircuitBreaker:
+    """
+    Breaker de um path da API. closed: tudo passa; após `failures` falhas seguidas
+    (erro de rede, timeout, 5xx) abre e as chamadas falham na hora durante
+    `cooldown`; depois deixa passar uma chamada de teste (half_open) que fecha
+    o breaker se der certo ou reabre se falhar.
+    """
 
-def _cache_set(key: str, data):
-    _cache[key] = {"ts": time.time(), "data": data}
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, path: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.path = path
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self._stats = {"opened": 0, "rejected": 0}
+
+    def is_open(self) -> bool:
+        """True enquanto chamadas são recusadas (aberto, ou teste em andamento)."""
+        return self.state != "closed" and time.monotonic() < self.open_until
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if now < self.open_until:
+            self._stats["rejected"] += 1
+            return False
+        # cooldown acabou: libera uma chamada de teste; se ela se perder (ex.: cota),
+        # outra é liberada depois de mais um cooldown
+        self.state = "half_open"
+        self.open_until = now + self.cooldown
+        return True
+
+    def record(self, ok: bool):
+        if ok:
+            if self.state != "closed":
+                log_event(logging.INFO, "circuit_closed", path=self.path)
+            self.state, self.failures = "closed", 0
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.max_failures:
+            if self.state != "open":
+                self._stats["opened"] += 1
+                log_event(logging.WARNING, "circuit_open", path=self.path, failures=self.failures, cooldown=self.cooldown)
+            self.state = "open"
+            self.open_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        left = self.open_until - time.monotonic() if self.state != "closed" else 0.0
+        return {"state": self.state, "failures": self.failures, "open_for": round(max(left, 0.0), 1), **self._stats}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def circuit_breaker(path: str) -> CircuitBreaker:
+    breaker = _breakers.get(path)
+    if breaker is None:
+        breaker = _breakers[path] = CircuitBreaker(path)
+    return breaker
+
+def circuit_open(path: str) -> bool:
+    breaker = _breakers.get(path)
+    return breaker is not None and breaker.is_open()
+
+def breaker_stats() -> Dict[str, Any]:
+    return {path: b.stats() for path, b in _breakers.items()}
+
+GaugeMetric("tipster_circuit_state", "Estado do circuit breaker por path (0 closed, 1 half_open, 2 open)", ("path",),
+            fn=lambda: {(path,): CircuitBreaker.STATES[b.state] for path, b in _breakers.items()})
 
 # ------------- HTTP helper -------------
-def api_get_raw(path: str, params: dict = None) -> Optional[Dict[str, Any]]:
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Cliente httpx compartilhado (pool keep-alive), criado sob demanda.
+    Reaproveita conexões TLS entre chamadas em vez de abrir uma por request.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=API_URL_BASE,
+            headers=HEADERS,
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def api_key(path: str, params: dict = None) -> str:
+    """Chave canônica (path + params ordenados) usada no single-flight/cache."""
+    return f"{path}?{urlencode(sorted((params or {}).items()))}"
+
+async def api_get_raw(path: str, params: dict = None) -> Optional[Dict[str, Any]]:
     """
     Faz GET para API-Sports e retorna parsed JSON ou None.
     Não lança exceção pro chamador — chamador precisa tratar None.
+    Chamadas idênticas simultâneas compartilham uma única requisição.
     """
+    try:
+        return await singleflight(api_key(path, params), lambda: _api_fetch(path, params))
+    except DeadlineExceeded:
+        return None
+
+async def _api_fetch(path: str, params: dict = None) -> Optional[Dict[str, Any]]:
     url = f"{API_URL_BASE}/{path}"
+    priority = _api_priority.get()
+    if deadline_passed():
+        UPSTREAM_REQUESTS.inc(path, "deadline")
+        return None
+    breaker = circuit_breaker(path)
+    if not breaker.allow():
+        # falha rápida: quem chamou serve o que houver em cache
+        UPSTREAM_REQUESTS.inc(path, "open")
+        return None
+    if QUOTA_ENABLED and not await quota.acquire(priority, max_wait=time_left()):
+        UPSTREAM_REQUESTS.inc(path, "shed")
+        log_event(logging.WARNING, "upstream_shed", path=path, params=params, priority=priority)
+        return None
+    # timeout da chamada = o que resta do prazo da requisição (limitado por HTTP_TIMEOUT)
+    left = time_left()
+    timeout = HTTP_TIMEOUT if left is None else max(min(HTTP_TIMEOUT, left), 0.001)
+    r = None
+    t0 = time.perf_counter()
     try:
-        r = requests.get(url, headers=HEADERS, params=params or {}, timeout=25)
+        r = await asyncio.wait_for(get_http_client().get(f"/{path}", params=params or {}, timeout=timeout), timeout)
+        UPSTREAM_SECONDS.observe(time.perf_counter() - t0, path)
+        UPSTREAM_REQUESTS.inc(path, f"{r.status_code // 100}xx")
+        quota.observe(r.headers, r.status_code)
+        breaker.record(r.status_code < 500)
         r.raise_for_status()
         return r.json()
     except Exception as e:
-        # log detalhado para debugging no Render
-        print(f"[api_get_raw] ERROR for {url} with params {params}: {e}")
-        try:
-            # cuidado: r pode não existir
-            print("preview:", getattr(r, "text", "")[:400])
-        except Exception:
-            pass
-        print(traceback.format_exc())
+        if r is None:
+            timed_out = isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException))
+            UPSTREAM_SECONDS.observe(time.perf_counter() - t0, path)
+            UPSTREAM_REQUESTS.inc(path, "timeout" if timed_out else "error")
+            # timeout encurtado pelo prazo do chamador não diz nada sobre a saúde da API
+            if not (timed_out and timeout < HTTP_TIMEOUT):
+                breaker.record(False)
+        # log detalhado para debugging no Render (r pode não existir)
+        log_event(logging.WARNING, "upstream_error", url=url, params=params, error=str(e),
+                  status=getattr(r, "status_code", None), preview=(r.text[:400] if r is not None else None))
         return None
 
+# ------------- Cached fetch (stale-while-revalidate) -------------
+_background_tasks: set = set()
+
+async def cached_call(key: str, loader: Callable[[], Awaitable[Any]], path: Optional[str] = None):
+    """
+    Lê `key` do cache; em miss executa `loader` (single-flight) e guarda o resultado.
+    Se o dado estiver vencido mas dentro da janela stale, devolve na hora e
+    dispara a revalidação em background. Resultado None nunca é cacheado.
+    Com o circuit breaker de `path` aberto serve o dado de qualquer idade, sem
+    revalidar; se o prazo da requisição acabar antes do loader, devolve None.
+    """
+    async def fill():
+        data = await loader()
+        if data is not None:
+            _cache_set(key, data)
+            if _persistent_key(key):
+                _store_save(key, data, _cache.ttl_for(key))
+        return data
+
+    upstream_down = path is not None and circuit_open(path)
+    data, fresh = _cache_get_entry(key, allow_expired=upstream_down)
+    if data is None and _persistent_key(key):
+        # outro worker do host pode já ter buscado
+        data, fresh = await _store_load(key, allow_expired=upstream_down)
+    if data is not None:
+        if not fresh and not upstream_down and key not in _inflight:
+            # revalidação não pertence à requisição atual: sem o prazo dela
+            with api_priority("prefetch"), deadline(None):
+                task = asyncio.ensure_future(singleflight(key, fill))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return data
+    try:
+        return await singleflight(key, fill)
+    except DeadlineExceeded:
+        return None
+
+def _api_namespace(path: str, params: dict = None) -> str:
+    params = params or {}
+    if path == "fixtures":
+        if params.get("live"):
+            return "live"
+        if "id" in params or "ids" in params:
+            return "fixture"
+        return "fixtures"
+    if path == "fixtures/statistics":
+        return "stats"
+    if path == "odds":
+        return "odds"
+    return path.replace("/", "_")
+
+def _api_cache_key(path: str, params: dict = None) -> str:
+    return f"{_api_namespace(path, params)}:{api_key(path, params)}"
+
+async def api_get_cached(path: str, params: dict = None) -> Optional[Dict[str, Any]]:
+    """api_get_raw com cache LRU por namespace + stale-while-revalidate."""
+    loader = lambda: _api_fetch(path, params)
+    if FIXTURE_BATCH_ENABLED and _batchable_fixture_id(path, params) is not None:
+        loader = lambda: _api_fetch_batched(path, params)
+    return await cached_call(_api_cache_key(path, params), loader, path)
+
+# ------------- Fixture batching -------------
+class FixtureBatcher:
+    """
+    Junta as buscas por fixture id pendentes numa janela curta e faz uma
+    única chamada fixtures?ids=a-b-c por grupo de até 20 ids. A resposta
+    multi-id já traz as estatísticas embutidas de cada jogo.
+    """
+
+    def __init__(self, window: float, max_ids: int = FIXTURE_BATCH_MAX_IDS):
+        self.window = window
+        self.max_ids = max_ids
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._in_flight: Dict[int, asyncio.Future] = {}  # ids já enviados, aguardando resposta
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._pending_deadline: Optional[float] = None
+        self._tasks: set = set()
+        self._stats = {"lookups": 0, "upstream_calls": 0, "ids_requested": 0, "errors": 0}
+
+    async def get(self, fixture_id: int) -> Tuple[bool, Optional[dict]]:
+        """Retorna (ok, item). ok=False se a chamada falhou; item=None se o jogo não existe."""
+        self._stats["lookups"] += 1
+        fut = self._pending.get(fixture_id) or self._in_flight.get(fixture_id)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            self._extend_deadline()
+            fut = self._pending[fixture_id] = loop.create_future()
+            if len(self._pending) >= self.max_ids:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        elif fixture_id in self._pending:
+            self._extend_deadline()
+        try:
+            return await await_within_deadline(asyncio.shield(fut), f"fixture {fixture_id}")
+        except DeadlineExceeded:
+            return False, None
+
+    def _extend_deadline(self):
+        # o lote roda com o prazo mais folgado entre os chamadores (None se algum não tem prazo)
+        d = _deadline.get()
+        if not self._pending:
+            self._pending_deadline = d
+        elif self._pending_deadline is not None:
+            self._pending_deadline = None if d is None else max(self._pending_deadline, d)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = list(self._pending.items()), {}
+        self._in_flight.update(pending)
+        token = _deadline.set(self._pending_deadline)
+        try:
+            for i in range(0, len(pending), self.max_ids):
+                task = asyncio.ensure_future(self._fetch(dict(pending[i:i + self.max_ids])))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            _deadline.reset(token)
+
+    async def _fetch(self, group: Dict[int, asyncio.Future]):
+        self._stats["upstream_calls"] += 1
+        self._stats["ids_requested"] += len(group)
+        found: Dict[int, dict] = {}
+        data = None
+        try:
+            data = await _api_fetch("fixtures", params={"ids": "-".join(str(fid) for fid in group)})
+            for item in (data or {}).get("response") or []:
+                fid = (item.get("fixture") or {}).get("id")
+                if fid is not None:
+                    found[fid] = item
+        except Exception as e:
+            log_event(logging.ERROR, "fixture_batch_error", ids=list(group), error=str(e), exc_info=True)
+            data = None
+        if data is None:
+            self._stats["errors"] += 1
+        for fid, fut in group.items():
+            if self._in_flight.get(fid) is fut:
+                self._in_flight.pop(fid, None)
+            if not fut.done():
+                fut.set_result((data is not None, found.get(fid)))
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self._stats["upstream_calls"]
+        return {**self._stats, "pending": len(self._pending),
+                "avg_ids_per_call": round(self._stats["ids_requested"] / calls, 2) if calls else 0}
+
+fixture_batcher = FixtureBatcher(FIXTURE_BATCH_WINDOW)
+
+def _batchable_fixture_id(path: str, params: dict = None) -> Optional[int]:
+    params = params or {}
+    if path == "fixtures" and set(params) == {"id"}:
+        return safe_int(params["id"]) or None
+    if path == "fixtures/statistics" and set(params) == {"fixture"}:
+        return safe_int(params["fixture"]) or None
+    return None
+
+async def _api_fetch_batched(path: str, params: dict) -> Optional[Dict[str, Any]]:
+    """
+    Resolve fixtures?id= / fixtures/statistics?fixture= via FixtureBatcher e grava
+    as duas entradas de cache do jogo (fixture e stats) a partir da mesma resposta.
+    """
+    fid = _batchable_fixture_id(path, params)
+    ok, item = await fixture_batcher.get(fid)
+    if not ok:
+        # lote falhou -> tenta a chamada individual
+        return await _api_fetch(path, params)
+    fixture_data = {"response": [item] if item else []}
+    stats_data = {"response": (item or {}).get("statistics") or []}
+    fixture_key = _api_cache_key("fixtures", {"id": fid})
+    stats_key = _api_cache_key("fixtures/statistics", {"fixture": fid})
+    if path == "fixtures":
+        _cache_set(stats_key, stats_data)
+        return fixture_data
+    _cache_set(fixture_key, fixture_data)
+    return stats_data
+
 # ------------- Fixtures helpers -------------
 def normalize_game(raw: dict) -> dict:
     fixture = raw.get("fixture", {})
@@ -102,59 +1529,856 @@ def normalize_game(raw: dict) -> dict:
         "raw": raw
     }
 
-def get_fixtures_for_dates(days_forward: int = 2) -> List[dict]:
-    ck = f"all_fixtures_v4_{days_forward}"
-    cached = _cache_get(ck)
-    if cached:
-        return cached
+# dicts pequenos repetidos entre jogos (liga, time, status) -> uma instância compartilhada
+INTERN_MAX_ENTRIES = 100_000
+_interned: Dict[bytes, dict] = {}
+
+def _intern_dict(obj: Any) -> Any:
+    """Instância compartilhada de um dict raso (strings internadas). Trate como imutável."""
+    if not isinstance(obj, dict):
+        return obj
+    key = orjson.dumps(obj)
+    found = _interned.get(key)
+    if found is None:
+        if len(_interned) >= INTERN_MAX_ENTRIES:
+            _interned.clear()
+        found = _interned[compact_bytes(key)] = {sys.intern(k): (sys.intern(v) if isinstance(v, str) else v) for k, v in obj.items()}
+    return found
+
+_MISSING = object()
+_RawFragment = getattr(orjson, "Fragment", None)  # orjson >= 3.9.16: embute JSON já serializado
+
+class GameRecord:
+    """
+    Jogo normalizado compacto, com os mesmos campos de normalize_game (acesso
+    por g["campo"] / g.get("campo")). Liga, times e status são dicts
+    compartilhados entre jogos; o payload bruto fica guardado uma vez como
+    bytes JSON e só é decodificado quando pedido (include_raw, heurísticas).
+    """
+
+    __slots__ = ("game_id", "date", "league", "home", "away", "status", "raw_json")
+
+    FIELDS = ("game_id", "date", "league", "teams", "status", "type", "raw")
+
+    def __init__(self, raw_json: bytes, raw: Optional[dict] = None):
+        if raw is None:
+            raw = orjson.loads(raw_json)
+        fixture = raw.get("fixture", {})
+        teams = raw.get("teams", {}) or {}
+        date = fixture.get("date")
+        self.game_id = fixture.get("id")
+        self.date = sys.intern(date) if isinstance(date, str) else date
+        self.league = _intern_dict(raw.get("league", {}) or {})
+        self.home = _intern_dict(teams.get("home", _MISSING)) if "home" in teams else _MISSING
+        self.away = _intern_dict(teams.get("away", _MISSING)) if "away" in teams else _MISSING
+        self.status = _intern_dict(fixture.get("status", {}) or {})
+        self.raw_json = raw_json
+
+    @property
+    def teams(self) -> dict:
+        return {k: v for k, v in (("home", self.home), ("away", self.away)) if v is not _MISSING}
+
+    @property
+    def type(self) -> str:
+        return "live" if self.status.get("elapsed") else "scheduled"
+
+    @property
+    def raw(self) -> dict:
+        return orjson.loads(self.raw_json)
+
+    # --- interface de leitura de dict (mesmo formato do normalize_game) ---
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.FIELDS]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def view(self, fields: Optional[Tuple[str, ...]], include_raw: bool) -> dict:
+        """
+        Dict para serializar, igual a project() sobre o normalize_game; o raw
+        entra como JSON pronto (orjson.Fragment), sem decodificar e recodificar.
+        """
+        keys = [k for k in fields if k in self.FIELDS] if fields else [k for k in self.FIELDS if include_raw or k != "raw"]
+        out = {}
+        for k in keys:
+            if k == "raw" and _RawFragment is not None:
+                out[k] = _RawFragment(self.raw_json)
+            else:
+                out[k] = getattr(self, k)
+        return out
+
+# status.short da API-Sports para jogos encerrados (dados não mudam mais)
+FINISHED_STATUSES = {"FT", "AET", "PEN", "AWD", "WO", "CANC", "ABD"}
+
+def game_state(status: Optional[dict]) -> str:
+    """Estado do jogo a partir do status da fixture: finished, live ou scheduled."""
+    status = status or {}
+    if status.get("short") in FINISHED_STATUSES:
+        return "finished"
+    return "live" if status.get("elapsed") else "scheduled"
+
+GAME_STATES = ("live", "scheduled", "finished")
+
+def _json_default(obj):
+    if isinstance(obj, GameRecord):
+        return obj.view(None, True)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps_json(content) -> bytes:
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+def compact_bytes(data: bytes) -> bytes:
+    """
+    Cópia no tamanho exato. O orjson devolve bytes com folga no buffer
+    (mínimo de ~4 KB), o que pesa em tudo que fica guardado por muito tempo.
+    """
+    return memoryview(data).tobytes()
+
+# ------------- Response encoding (projeção, compressão, ETag) -------------
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    if not fields:
+        return None
+    out = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    return out or None
+
+def project(item: dict, fields: Optional[Tuple[str, ...]], include_raw: bool, raw_keys: Tuple[str, ...]) -> dict:
+    """Mantém só `fields` (se informado) e remove os campos raw, a menos que pedidos."""
+    if fields:
+        return {k: item[k] for k in fields if k in item and (include_raw or k not in raw_keys or k in fields)}
+    if include_raw:
+        return item
+    return {k: v for k, v in item.items() if k not in raw_keys}
+
+class VariantMemo:
+    """
+    Memoiza (variante, encoding) -> bytes de um payload imutável, com limite de
+    entradas. A chave (variante, "etag") guarda o ETag da variante.
+    """
+
+    __slots__ = ("_data", "max_entries")
+
+    def __init__(self, max_entries: int = VARIANT_MEMO_SIZE):
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self.max_entries = max_entries
+
+    def carry_over(self, other: "VariantMemo", keep: Callable[[Any], bool]):
+        """Copia de `other` as entradas cuja variante continua válida."""
+        for key, value in other._data.items():
+            if keep(key[0]):
+                self._data[key] = value
+
+    def get(self, key, build: Callable[[], Any]) -> Any:
+        data = self._data.get(key)
+        if data is None:
+            data = build()
+            if isinstance(data, bytes):
+                data = compact_bytes(data)
+            self._data[key] = data
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return data
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {part.split(";", 1)[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=10)
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else repr(p).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def send_json(request: Request, memo: VariantMemo, variant, build: Callable[[], bytes], etag: Optional[str] = None) -> Response:
+    """
+    Responde bytes JSON memoizados por variante, com ETag / If-None-Match (304)
+    e gzip/brotli conforme Accept-Encoding (comprimido uma vez por variante).
+    Sem `etag`, usa o digest do próprio corpo (memoizado junto com a variante).
+    """
+    def serialize() -> bytes:
+        with STAGE_SECONDS.time("serialization"):
+            return build()
+
+    if etag is None:
+        etag = memo.get((variant, "etag"), lambda: f'W/"{_digest(memo.get((variant, None), serialize))}"')
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    body = memo.get((variant, None), serialize)
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        body = memo.get((variant, encoding), lambda: _compress(memo.get((variant, None), serialize), encoding))
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+_snapshot_seq = 0
+
+def _game_sort_key(g: dict) -> tuple:
+    # ordem estável: horário do jogo, depois fixture id
+    return (g.get("date") or "", g.get("game_id") or 0)
+
+def _bisect_games(games: List[dict], key: tuple) -> int:
+    """Posição do primeiro jogo com _game_sort_key > key numa lista já ordenada."""
+    lo, hi = 0, len(games)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _game_sort_key(games[mid]) <= key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _game_digest(g: GameRecord) -> Tuple[int, int]:
+    """(digest de 64 bits, tamanho em bytes) do payload bruto do jogo (todo o resto deriva dele)."""
+    body = g.raw_json
+    return int.from_bytes(hashlib.blake2b(body, digest_size=8).digest(), "big"), len(body)
+
+class FixtureChanges:
+    """Change set de um refresh: jogos adicionados, atualizados (com os campos) e removidos."""
+
+    __slots__ = ("added", "updated", "removed", "leagues", "countries")
+
+    def __init__(self):
+        self.added: set = set()
+        self.updated: Dict[int, Tuple[str, ...]] = {}
+        self.removed: set = set()
+        self.leagues: set = set()     # ligas com algum jogo alterado
+        self.countries: set = set()   # países com alguma liga alterada
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def touch(self, game: Optional[dict]):
+        if game:
+            league = game.get("league") or {}
+            self.leagues.add(league.get("id"))
+            self.countries.add(league.get("country"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"added": sorted(self.added), "updated": {str(k): list(v) for k, v in self.updated.items()},
+                "removed": sorted(self.removed)}
+
+class FixturesSnapshot:
+    """
+    Snapshot imutável dos jogos, montado a cada refresh (do zero ou derivado
+    do anterior + change set). Guarda os índices usados pelos endpoints de
+    listagem e memoiza o JSON serializado de cada view, então /countries,
+    /leagues e /games viram lookups O(1) que devolvem bytes prontos.
+    Os índices por (liga, estado), (país, estado) e estado mantêm a ordem de
+    `games` e servem as páginas do /games com cursor (page()).
+    """
+
+    __slots__ = ("version", "digest", "built_at", "games", "countries", "leagues_by_country",
+                 "games_by_league", "games_by_id", "game_digests", "views", "nbytes", "_xor",
+                 "games_by_state", "games_by_league_state", "games_by_country_state")
+
+    def __init__(self, games: List[GameRecord]):
+        self._init_meta()
+        self.games = sorted(games, key=_game_sort_key)
+        self.games_by_id = {g.get("game_id"): g for g in self.games}
+        self.game_digests = {gid: _game_digest(g) for gid, g in self.games_by_id.items()}
+        self._xor = 0
+        self.nbytes = 0
+        for d, size in self.game_digests.values():
+            self._xor ^= d
+            self.nbytes += size
+        self._index(self.games, None, None)
+        self.views = VariantMemo()
+
+    def _init_meta(self):
+        global _snapshot_seq
+        _snapshot_seq += 1
+        self.version = _snapshot_seq
+        self.built_at = time.time()
+
+    def _index(self, games: List[dict], leagues: Optional[set], countries: Optional[set]):
+        """(Re)monta os índices por liga/país; com `leagues`/`countries` só os afetados."""
+        games_by_league: Dict[int, List[dict]] = {} if leagues is None else {l: [] for l in leagues}
+        league_maps: Dict[str, Dict[Any, dict]] = {} if countries is None else {c: {} for c in countries if c}
+        games_by_state: Dict[str, List[dict]] = {s: [] for s in GAME_STATES}
+        league_states: Dict[tuple, List[dict]] = {}
+        country_states: Dict[tuple, List[dict]] = {}
+        for g in games:
+            league = g.get("league", {})
+            lid = league.get("id")
+            country = league.get("country")
+            state = game_state(g.get("status"))
+            games_by_state[state].append(g)
+            if leagues is None or lid in leagues:
+                games_by_league.setdefault(lid, []).append(g)
+                league_states.setdefault((lid, state), []).append(g)
+            if country and (countries is None or country in countries):
+                league_maps.setdefault(country, {})[lid] = league
+                country_states.setdefault((country, state), []).append(g)
+        self.games_by_state = games_by_state
+        if leagues is None:
+            self.games_by_league = games_by_league
+            self.leagues_by_country = {c: list(m.values()) for c, m in league_maps.items()}
+            self.games_by_league_state = league_states
+            self.games_by_country_state = country_states
+        else:
+            # estado muda junto com o jogo, e o jogo alterado já marcou a liga/país dele
+            for key in [k for k in self.games_by_league_state if k[0] in leagues]:
+                del self.games_by_league_state[key]
+            self.games_by_league_state.update(league_states)
+            for key in [k for k in self.games_by_country_state if k[0] in countries]:
+                del self.games_by_country_state[key]
+            self.games_by_country_state.update(country_states)
+            for lid, items in games_by_league.items():
+                if items:
+                    self.games_by_league[lid] = items
+                else:
+                    self.games_by_league.pop(lid, None)
+            for c in countries:
+                if league_maps.get(c):
+                    self.leagues_by_country[c] = list(league_maps[c].values())
+                else:
+                    self.leagues_by_country.pop(c, None)
+        self.countries = sorted(self.leagues_by_country)
+        # XOR dos digests por jogo: atualizável em O(jogos alterados), igual entre workers
+        self.digest = f"{self._xor:016x}{len(self.games_by_id):x}"
+
+    @classmethod
+    def derive(cls, prev: "FixturesSnapshot", raw_by_id: Dict[int, bytes], changes: FixtureChanges) -> "FixturesSnapshot":
+        """
+        Novo snapshot a partir do anterior aplicando só o change set: normaliza
+        apenas os jogos alterados, remonta só os índices das ligas/países
+        afetados e reaproveita as views serializadas que não mudaram.
+        """
+        snap = object.__new__(cls)
+        snap._init_meta()
+        games_by_id = dict(prev.games_by_id)
+        digests = dict(prev.game_digests)
+        xor, nbytes = prev._xor, prev.nbytes
+        for gid in list(changes.removed) + list(changes.updated) + list(changes.added):
+            changes.touch(games_by_id.pop(gid, None))
+            d, size = digests.pop(gid, (0, 0))
+            xor ^= d
+            nbytes -= size
+            if gid in changes.removed:
+                continue
+            g = games_by_id[gid] = GameRecord(raw_by_id[gid])
+            changes.touch(g)
+            d, size = digests[gid] = _game_digest(g)
+            xor ^= d
+            nbytes += size
+        snap.games_by_id = games_by_id
+        snap.game_digests = digests
+        snap._xor, snap.nbytes = xor, nbytes
+        # quase ordenada -> Timsort é ~linear
+        snap.games = sorted(games_by_id.values(), key=_game_sort_key)
+        snap.games_by_league = dict(prev.games_by_league)
+        snap.leagues_by_country = dict(prev.leagues_by_country)
+        snap.games_by_league_state = dict(prev.games_by_league_state)
+        snap.games_by_country_state = dict(prev.games_by_country_state)
+        snap._index(snap.games, changes.leagues, changes.countries)
+        countries_same = snap.countries == prev.countries
+
+        def still_valid(variant) -> bool:
+            kind = variant[0]
+            if kind == "countries":
+                return countries_same
+            if kind == "leagues":
+                return variant[1] not in changes.countries
+            return bool(variant[1]) and variant[1] not in changes.leagues
+
+        snap.views = VariantMemo()
+        snap.views.carry_over(prev.views, still_valid)
+        return snap
+
+    def view(self, variant) -> Any:
+        """Conteúdo de uma view: ("countries",), ("leagues", country) ou ("games", league, fields, include_raw)."""
+        kind = variant[0]
+        if kind == "countries":
+            return self.countries
+        if kind == "leagues":
+            return self.leagues_by_country.get(variant[1], [])
+        _kind, league, fields, include_raw = variant
+        items = self.games_by_league.get(league, []) if league else self.games
+        return [g.view(fields, include_raw) if isinstance(g, GameRecord) else project(g, fields, include_raw, ("raw",))
+                for g in items]
+
+    def page(self, after: Optional[tuple], limit: int, leagues: Optional[List[int]] = None, country: Optional[str] = None,
+             states: Optional[List[str]] = None, date_from: Optional[str] = None,
+             date_to: Optional[str] = None) -> Tuple[List[dict], Optional[tuple]]:
+        """
+        Até `limit` jogos depois da posição `after` ((data, id) do último jogo da
+        página anterior), na ordem de `games`, e a posição para a próxima página
+        (None no fim). Os filtros escolhem listas prontas dos índices (nenhum jogo
+        é descartado um a um): cada lista é posicionada por busca binária e as
+        listas são intercaladas com heapq.merge, então o custo depende de `limit`
+        e do número de listas, não do tamanho do snapshot.
+        """
+        states = list(dict.fromkeys(states)) if states else list(GAME_STATES)
+        if leagues:
+            if country:
+                # liga de outro país: nenhum jogo
+                leagues = [l for l in leagues if (self.games_by_league.get(l) or [{}])[0].get("league", {}).get("country") == country]
+            lists = [self.games_by_league_state.get((l, s), []) for l in dict.fromkeys(leagues) for s in states]
+        elif country:
+            lists = [self.games_by_country_state.get((country, s), []) for s in states]
+        elif len(states) < len(GAME_STATES):
+            lists = [self.games_by_state[s] for s in states]
+        else:
+            lists = [self.games]
+        lo = after
+        if date_from and (lo is None or (date_from,) > lo):
+            lo = (date_from,)  # (d,) < (d, id): primeiro jogo com data >= date_from
+        # data sem horário inclui o dia todo ("2025-09-20" < "2025-09-20T15:00..." < "2025-09-20\uffff")
+        hi = date_to + "\uffff" if date_to else None
+
+        def tail(items: List[dict]):
+            for i in range(_bisect_games(items, lo) if lo is not None else 0, len(items)):
+                yield items[i]
+
+        merged = heapq.merge(*(tail(items) for items in lists if items), key=_game_sort_key)
+        out: List[dict] = []
+        for g in merged:
+            if hi is not None and (g.get("date") or "") > hi:
+                return out, None
+            if len(out) == limit:
+                return out, _game_sort_key(out[-1])
+            out.append(g)
+        return out, None
+
+    def respond(self, request: Request, variant) -> Response:
+        # ETag = digest do conteúdo da view (estável entre workers e entre snapshots sem mudança nela)
+        return send_json(request, self.views, variant, lambda: dumps_json(self.view(variant)))
+
+class PreparedJSON:
+    """Payload imutável (ex.: resultado do /analyze) com as variantes serializadas memoizadas."""
+
+    __slots__ = ("data", "digest", "nbytes", "views")
+
+    def __init__(self, data: dict):
+        self.data = data
+        full = dumps_json(data)
+        self.digest = _digest(full)
+        self.nbytes = len(full)
+        self.views = VariantMemo()
+
+    def respond(self, request: Request, fields: Optional[Tuple[str, ...]], include_raw: bool, raw_keys: Tuple[str, ...]) -> Response:
+        variant = (fields, include_raw)
+        return send_json(request, self.views, variant,
+                         lambda: dumps_json(project(self.data, fields, include_raw, raw_keys)),
+                         f'W/"{self.digest}-{_digest(variant)}"')
+
+# dados brutos (bytes JSON de cada fixture) que compõem cada snapshot, por fonte e por fixture id:
+# {days_forward: {"sources": {"live" | "recent" | date: {fid: raw}}, "by_id": {fid: raw}, "snap": FixturesSnapshot, "ts"}}
+_fixture_sources: Dict[int, Dict[str, Any]] = {}
+
+# chamados a cada snapshot novo com (anterior, novo, change set)
+_snapshot_listeners: List[Callable[[FixturesSnapshot, FixturesSnapshot, FixtureChanges], None]] = []
+
+def on_snapshot_change(fn: Callable[[FixturesSnapshot, FixturesSnapshot, FixtureChanges], None]):
+    _snapshot_listeners.append(fn)
+    return fn
+
+def _snapshot_key(days_forward: int) -> str:
+    return f"snapshot:all_fixtures_v4_{days_forward}"
+
+def _window_dates(days_forward: int) -> List[str]:
+    return [(datetime.utcnow().date() + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days_forward + 1)]
+
+async def get_fixtures_snapshot(days_forward: int = SNAPSHOT_DAYS_FORWARD) -> FixturesSnapshot:
+    # em cache miss só um fetch por chave roda (single-flight); depois do TTL
+    # o snapshot anterior é servido na hora enquanto revalida em background.
+    # Com o scheduler ativo o snapshot já está quente e não há I/O aqui.
+    # Com o breaker de fixtures aberto serve o snapshot de qualquer idade; se o
+    # cache já o descartou e o reload falhou, usa o último montado no worker.
+    ck = _snapshot_key(days_forward)
+    snap = await cached_call(ck, lambda: _load_snapshot(days_forward), path="fixtures")
+    if snap is None:
+        snap = (_fixture_sources.get(days_forward) or {}).get("snap")
+    return snap or FixturesSnapshot([])
+
+async def _load_snapshot(days_forward: int) -> Optional[FixturesSnapshot]:
+    if persistent_store is not None:
+        snap = await _snapshot_from_store(days_forward)
+        if snap is not None:
+            return snap
+    return await _load_fixtures_for_dates(days_forward)
+
+async def get_fixtures_for_dates(days_forward: int = SNAPSHOT_DAYS_FORWARD) -> List[dict]:
+    return (await get_fixtures_snapshot(days_forward)).games
+
+def _fixtures_by_id(data: Optional[dict], known: Optional[Dict[int, bytes]] = None) -> Dict[int, bytes]:
+    """
+    fixture id -> JSON da fixture. Fixture igual à de `known` reaproveita o
+    mesmo objeto bytes (uma cópia só em memória e comparação por identidade).
+    """
+    by_id: Dict[int, bytes] = {}
+    known = known or {}
+    for fixture in (data or {}).get("response") or []:
+        fid = fixture.get("fixture", {}).get("id")
+        if fid and fid not in by_id:
+            raw = orjson.dumps(fixture)
+            prev = known.get(fid)
+            by_id[fid] = prev if prev == raw else compact_bytes(raw)
+    return by_id
+
+def _merge_sources(sources: Dict[str, Dict[int, bytes]], dates: List[str]) -> Dict[int, bytes]:
+    # live tem prioridade sobre as datas (o primeiro visto vence)
+    merged: Dict[int, bytes] = {}
+    for name in ["live", "recent", *dates]:
+        for fid, fixture in (sources.get(name) or {}).items():
+            merged.setdefault(fid, fixture)
+    return merged
+
+def _fixture_delta(raw: dict) -> Dict[str, Any]:
+    fixture = raw.get("fixture") or {}
+    status = fixture.get("status") or {}
+    return {"status": status.get("short"), "elapsed": status.get("elapsed"), "goals": raw.get("goals"),
+            "score": raw.get("score"), "date": fixture.get("date")}
+
+def _changed_fields(old: bytes, new: bytes) -> Tuple[str, ...]:
+    """Campos que mudaram entre duas versões brutas de uma fixture ("other" se foi outra coisa)."""
+    a, b = _fixture_delta(orjson.loads(old)), _fixture_delta(orjson.loads(new))
+    fields = tuple(k for k in a if a[k] != b[k])
+    return fields or ("other",)
+
+def _diff_fixtures(old: Dict[int, bytes], new: Dict[int, bytes]) -> FixtureChanges:
+    changes = FixtureChanges()
+    for fid, raw in new.items():
+        prev = old.get(fid)
+        if prev is None:
+            changes.added.add(fid)
+        elif prev is not raw and prev != raw:
+            changes.updated[fid] = _changed_fields(prev, raw)
+    changes.removed = old.keys() - new.keys()
+    return changes
+
+async def _fetch_fixtures_by_ids(ids: List[int], known: Dict[int, bytes]) -> Dict[int, bytes]:
+    """Busca fixtures avulsas em chamadas fixtures?ids= (até FIXTURE_BATCH_MAX_IDS por chamada)."""
+    ids = sorted(ids)
+    chunks = [ids[i:i + FIXTURE_BATCH_MAX_IDS] for i in range(0, len(ids), FIXTURE_BATCH_MAX_IDS)]
+    results = await asyncio.gather(*(api_get_raw("fixtures", params={"ids": "-".join(map(str, c))}) for c in chunks))
+    found: Dict[int, bytes] = {}
+    for data in results:
+        found.update(_fixtures_by_id(data, known))
+    return found
+
+_sources_locks: Dict[int, asyncio.Lock] = {}
+
+def _sources_lock(days_forward: int) -> asyncio.Lock:
+    lock = _sources_locks.get(days_forward)
+    if lock is None:
+        lock = _sources_locks[days_forward] = asyncio.Lock()
+    return lock
+
+async def _load_fixtures_for_dates(days_forward: int, refresh_live: bool = True, refresh_dates: bool = True) -> Optional[FixturesSnapshot]:
+    """
+    Busca live e as datas da janela e aplica o que mudou sobre o snapshot anterior.
+    Com refresh_dates=False (modo incremental) só live e a data de hoje são
+    buscados; jogos que saíram do live sem aparecer hoje (ex.: começaram ontem)
+    são buscados por id, então live -> encerrado não depende de um refresh completo.
+    Refreshes da mesma janela (live e completo) rodam um de cada vez: cada um lê
+    as fontes atuais e grava o resultado sem sobrescrever um refresh mais novo.
+    """
+    async with _sources_lock(days_forward):
+        dates = _window_dates(days_forward)
+        src = _fixture_sources.setdefault(days_forward, {"sources": {}, "by_id": {}, "snap": None})
+        sources: Dict[str, Dict[int, bytes]] = dict(src["sources"])
+        known: Dict[int, bytes] = src["by_id"]
+        if src["snap"] is None or any(d not in sources for d in dates):
+            refresh_dates = True
+        to_fetch = dates if refresh_dates else dates[:1]
+
+        # live + cada data em paralelo (latência ~ da chamada mais lenta)
+        calls = []
+        if refresh_live:
+            calls.append(api_get_raw("fixtures", params={"live": "all"}))
+        calls.extend(api_get_raw("fixtures", params={"date": d}) for d in to_fetch)
+        results = await asyncio.gather(*calls)
+
+        # upstream fora do ar -> não sobrescreve o snapshot anterior
+        if all(r is None for r in results):
+            return None
+
+        if refresh_live:
+            live_data, *results = results
+        fetched = {d: _fixtures_by_id(data, known) for d, data in zip(to_fetch, results) if data is not None}
+        if refresh_live and live_data is not None:
+            sources["live"] = _fixtures_by_id(live_data, known)
+            # saíram do live e não estão em nenhuma data buscada agora -> busca por id
+            gone = set(src["sources"].get("live") or ()) - sources["live"].keys()
+            for by_date in fetched.values():
+                gone -= by_date.keys()
+            if gone and not refresh_dates:
+                recent = dict(sources.get("recent") or {})
+                recent.update(await _fetch_fixtures_by_ids(list(gone), known))
+                sources["recent"] = recent
+        sources.update(fetched)
+        if refresh_dates:
+            # refresh completo: "recent" volta a ser coberto pelas datas; descarta as que saíram da janela
+            sources.pop("recent", None)
+            for d in list(sources):
+                if d not in dates and d != "live":
+                    sources.pop(d, None)
+
+        src["sources"] = sources
+        src["ts"] = time.time()
+        if persistent_store is not None:
+            stored = {k: {str(fid): raw.decode() for fid, raw in v.items()} for k, v in sources.items()}
+            _store_save(f"sources:{days_forward}", {"sources": stored, "ts": src["ts"]})
+
+        return _build_snapshot(days_forward, src)
+
+@timed_stage("snapshot_build")
+def _build_snapshot(days_forward: int, src: Dict[str, Any]) -> FixturesSnapshot:
+    """Aplica o change set (dados brutos anteriores x atuais) sobre o último snapshot montado."""
+    by_id = _merge_sources(src["sources"], _window_dates(days_forward))
+    prev: Optional[FixturesSnapshot] = src.get("snap")
+    if prev is None:
+        snap = FixturesSnapshot([GameRecord(f) for f in by_id.values()])
+    else:
+        changes = _diff_fixtures(src["by_id"], by_id)
+        if not changes:
+            return prev
+        snap = FixturesSnapshot.derive(prev, by_id, changes)
+        for fn in _snapshot_listeners:
+            try:
+                fn(prev, snap, changes)
+            except Exception:
+                log_event(logging.ERROR, "snapshot_listener_error", listener=getattr(fn, "__qualname__", str(fn)), exc_info=True)
+    src["by_id"] = by_id
+    src["snap"] = snap
+    return snap
+
+async def _snapshot_from_store(days_forward: int) -> Optional[FixturesSnapshot]:
+    """Snapshot a partir dos dados brutos gravados por outro worker, se forem mais novos que os locais."""
+    async with _sources_lock(days_forward):
+        rec = await asyncio.to_thread(persistent_store.get, f"sources:{days_forward}")
+        if rec is None:
+            return None
+        _ts, stored = rec
+        src = _fixture_sources.setdefault(days_forward, {"sources": {}, "by_id": {}, "snap": None})
+        if src.get("ts", 0) >= stored.get("ts", 0):
+            return None
+        known = src["by_id"]
+        sources: Dict[str, Dict[int, bytes]] = {}
+        for k, v in (stored.get("sources") or {}).items():
+            if isinstance(v, list):  # formato antigo: lista de fixtures
+                sources[k] = _fixtures_by_id({"response": v}, known)
+                continue
+            sources[k] = {}
+            for fid, raw in v.items():
+                raw = raw.encode()
+                prev = known.get(int(fid))
+                sources[k][int(fid)] = prev if prev == raw else raw
+        src["sources"] = sources
+        src["ts"] = stored["ts"]
+        return _build_snapshot(days_forward, src)
+
+async def load_snapshot_from_store(days_forward: int = SNAPSHOT_DAYS_FORWARD) -> bool:
+    """Atualiza o snapshot local com o que está no cache persistente (sem chamar a API)."""
+    if persistent_store is None:
+        return False
+    snap = await _snapshot_from_store(days_forward)
+    if snap is not None:
+        _cache.set(_snapshot_key(days_forward), snap, ts=_fixture_sources[days_forward]["ts"])
+    return True
+
+async def refresh_fixtures_snapshot(days_forward: int = SNAPSHOT_DAYS_FORWARD, live_only: bool = False) -> bool:
+    """Recarrega o snapshot (completo ou só live) e grava no cache. Retorna False se o upstream falhou."""
+    ck = _snapshot_key(days_forward)
+    if persistent_store is not None:
+        lease_ttl = max(3 * LIVE_REFRESH_SECONDS, 60)
+        if not await asyncio.to_thread(persistent_store.acquire_lease, f"fixtures_refresh_{days_forward}", WORKER_ID, lease_ttl):
+            # outro worker do host faz o upstream; aqui só recarrega o que ele gravou
+            return await load_snapshot_from_store(days_forward)
+    if live_only:
+        loader = lambda: _load_fixtures_for_dates(days_forward, refresh_live=True, refresh_dates=False)
+        data = await singleflight(f"{ck}#live", loader)
+    else:
+        data = await singleflight(ck, lambda: _load_fixtures_for_dates(days_forward))
+    if data is None:
+        return False
+    _cache_set(ck, data)
+    return True
 
-    dates = [(datetime.utcnow().date() + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days_forward + 1)]
-    all_fixtures: List[dict] = []
-    seen_ids = set()
-
-    live_data = api_get_raw("fixtures", params={"live": "all"})
-    if live_data and live_data.get("response"):
-        for fixture in live_data["response"]:
-            fid = fixture.get("fixture", {}).get("id")
-            if fid and fid not in seen_ids:
-                all_fixtures.append(normalize_game(fixture))
-                seen_ids.add(fid)
-
-    for d in dates:
-        fixtures_data = api_get_raw("fixtures", params={"date": d})
-        if fixtures_data and fixtures_data.get("response"):
-            for fixture in fixtures_data["response"]:
-                fid = fixture.get("fixture", {}).get("id")
-                if fid and fid not in seen_ids:
-                    all_fixtures.append(normalize_game(fixture))
-                    seen_ids.add(fid)
-
-    _cache_set(ck, all_fixtures)
-    return all_fixtures
+# ------------- Refresh scheduler -------------
+class RefreshScheduler:
+    """
+    Agenda jobs periódicos no event loop (iniciado no lifespan do FastAPI).
+    Cada job tem cadência própria, jitter e backoff exponencial em falha.
+    """
+
+    def __init__(self, jitter: float = REFRESH_JITTER, max_backoff: float = REFRESH_MAX_BACKOFF):
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval: float, fn: Callable[[], Awaitable[bool]], run_at_start: bool = True):
+        self.jobs[name] = {
+            "interval": interval, "fn": fn, "run_at_start": run_at_start,
+            "runs": 0, "failures": 0, "consecutive_failures": 0,
+            "last_ok": None, "last_error": None, "next_run": None,
+        }
+
+    def _next_delay(self, job: Dict[str, Any]) -> float:
+        delay = job["interval"]
+        if job["consecutive_failures"]:
+            delay = min(job["interval"] * (2 ** job["consecutive_failures"]), max(self.max_backoff, job["interval"]))
+        return max(0.0, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def _run(self, name: str):
+        job = self.jobs[name]
+        delay = 0.0 if job["run_at_start"] else self._next_delay(job)
+        while True:
+            job["next_run"] = time.time() + delay
+            await asyncio.sleep(delay)
+            job["runs"] += 1
+            try:
+                ok = await job["fn"]()
+                job["last_error"] = None if ok else "upstream indisponível"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_event(logging.ERROR, "scheduler_job_failed", job=name, error=str(e), exc_info=True)
+                ok = False
+                job["last_error"] = str(e)
+            if ok:
+                job["consecutive_failures"] = 0
+                job["last_ok"] = time.time()
+            else:
+                job["failures"] += 1
+                job["consecutive_failures"] += 1
+            delay = self._next_delay(job)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.ensure_future(self._run(name)) for name in self.jobs]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "running": bool(self._tasks),
+            "jobs": {
+                name: {
+                    "interval": job["interval"], "runs": job["runs"], "failures": job["failures"],
+                    "consecutive_failures": job["consecutive_failures"], "last_error": job["last_error"],
+                    "last_ok_ago": round(now - job["last_ok"], 1) if job["last_ok"] else None,
+                    "next_run_in": round(job["next_run"] - now, 1) if job["next_run"] else None,
+                }
+                for name, job in self.jobs.items()
+            },
+        }
+
+scheduler = RefreshScheduler()
+
+async def _purge_persistent_store() -> bool:
+    if persistent_store is not None:
+        await asyncio.to_thread(persistent_store.purge, CACHE_STALE_TTL)
+    return True
+
+def start_refresh_scheduler():
+    if not scheduler.jobs:
+        # datas futuras mudam pouco; live muda a cada minuto
+        scheduler.add_job("fixtures_snapshot", DATES_REFRESH_SECONDS, lambda: refresh_fixtures_snapshot())
+        scheduler.add_job("fixtures_live", LIVE_REFRESH_SECONDS, lambda: refresh_fixtures_snapshot(live_only=True), run_at_start=False)
+        if ODDS_SWEEP_ENABLED:
+            scheduler.add_job("odds_sweep", ODDS_SWEEP_SECONDS, lambda: refresh_odds_store())
+        if PERSISTENT_CACHE_PATH:
+            scheduler.add_job("persistent_purge", 600, _purge_persistent_store, run_at_start=False)
+    # jobs do scheduler têm a maior prioridade na cota da API
+    with api_priority("live"):
+        scheduler.start()
 
 # ------------- Listagem endpoints -------------
+# índices e JSON pré-serializados (e comprimidos) vêm do FixturesSnapshot
 @app.get("/countries")
-def countries():
-    games = get_fixtures_for_dates()
-    countries_set = {g.get("league", {}).get("country") for g in games if g.get("league", {}).get("country")}
-    return sorted([c for c in countries_set if c])
+async def countries(request: Request):
+    snap = await get_fixtures_snapshot()
+    return snap.respond(request, ("countries",))
 
 @app.get("/leagues")
-def leagues(country: str = Query(...)):
-    games = get_fixtures_for_dates()
-    league_map = {g.get("league", {}).get("id"): g.get("league") for g in games if g.get("league", {}).get("country") == country}
-    return list(league_map.values())
+async def leagues(request: Request, country: str = Query(...)):
+    snap = await get_fixtures_snapshot()
+    return snap.respond(request, ("leagues", country))
 
 @app.get("/games")
-def games(league: int = Query(None)):
-    all_games = get_fixtures_for_dates()
-    if league:
-        return [g for g in all_games if g.get("league", {}).get("id") == int(league)]
-    return all_games
+async def games(request: Request, league: int = Query(None), fields: Optional[str] = Query(None),
+                include_raw: bool = Query(False), leagues: Optional[str] = Query(None),
+                country: Optional[str] = Query(None), status: Optional[str] = Query(None),
+                date_from: Optional[str] = Query(None), date_to: Optional[str] = Query(None),
+                cursor: Optional[str] = Query(None), limit: Optional[int] = Query(None, ge=1, le=GAMES_PAGE_MAX)):
+    snap = await get_fixtures_snapshot()
+    if all(v is None for v in (leagues, country, status, date_from, date_to, cursor, limit)):
+        # sem paginação/filtros novos: lista completa (bytes prontos do snapshot)
+        return snap.respond(request, ("games", league, parse_fields(fields), include_raw))
+    league_ids = _parse_league_ids(leagues)
+    if league is not None:
+        league_ids.append(league)
+    states = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    if states and not set(states) <= set(GAME_STATES):
+        raise HTTPException(status_code=400, detail=f"status deve ser um de: {', '.join(GAME_STATES)}")
+    items, last = snap.page(_decode_cursor(cursor), limit or GAMES_PAGE_SIZE, league_ids, country, states, date_from, date_to)
+    fields_t = parse_fields(fields)
+    page = {"games": [g.view(fields_t, include_raw) if isinstance(g, GameRecord) else project(g, fields_t, include_raw, ("raw",))
+                      for g in items],
+            "next_cursor": _encode_cursor(last) if last is not None else None}
+    # página é barata de montar: não entra no memo de views do snapshot
+    return send_json(request, VariantMemo(), None, lambda: dumps_json(page))
+
+def _parse_league_ids(leagues: Optional[str]) -> List[int]:
+    try:
+        return [int(l) for l in leagues.split(",") if l.strip()] if leagues else []
+    except ValueError:
+        raise HTTPException(status_code=400, detail="leagues deve ser uma lista de ids separados por vírgula")
+
+def _encode_cursor(key: tuple) -> str:
+    # posição (data, fixture id), não offset: continua válido entre refreshes do snapshot
+    return base64.urlsafe_b64encode(dumps_json(list(key))).decode().rstrip("=")
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    try:
+        date, gid = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(date, str) or not isinstance(gid, int):
+            raise ValueError
+        return date, gid
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor inválido")
 
 # ------------- Stats helpers -------------
-def fetch_football_statistics(fixture_id: int) -> Optional[Dict[str, Any]]:
-    return api_get_raw("fixtures/statistics", params={"fixture": fixture_id})
+async def fetch_football_statistics(fixture_id: int) -> Optional[Dict[str, Any]]:
+    data = await api_get_cached("fixtures/statistics", params={"fixture": fixture_id})
+    value_bets.observe(fixture_id, "stats", data)
+    return data
 
 def safe_int(v):
     try:
@@ -165,6 +2389,7 @@ def safe_int(v):
         except Exception:
             return 0
 
+@timed_stage("build_stats_map")
 def build_stats_map(stats_raw: Optional[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
     out: Dict[int, Dict[str, Any]] = {}
     if not stats_raw or "response" not in stats_raw:
@@ -189,6 +2414,7 @@ def build_stats_map(stats_raw: Optional[Dict[str, Any]]) -> Dict[int, Dict[str,
     return out
 
 # ------------- Heurísticas (mercados completos) -------------
+@timed_stage("heuristics_football")
 def heuristics_football(fixture_raw: dict, stats_map: Dict[int, Dict[str, Any]]) -> Tuple[List[dict], dict]:
     fixture = fixture_raw
     teams = fixture.get("teams", {}) or {}
@@ -404,6 +2630,232 @@ def heuristics_football(fixture_raw: dict, stats_map: Dict[int, Dict[str, Any]])
 
     return deduped_preds, summary
 
+# ------------- Heurísticas em lote (NumPy) -------------
+# (campo, chaves na ordem de prioridade de heuristics_football, conversão)
+# "raw": usado sem safe_int no cálculo de power/gols -> precisa ser int puro
+_STAT_FIELDS = (
+    ("shots", ("Total Shots", "Shots"), "raw"),
+    ("sot", ("Shots on Goal", "Shots on Target"), "raw"),
+    ("corners", ("Corners", "Corner Kicks", "Corner Kicks 1H"), "raw"),
+    ("pos", ("Ball Possession", "Possession"), "pos"),
+    ("fouls", ("Fouls",), "raw"),
+    ("attacks", ("Attacks",), "int"),
+    ("danger", ("Dangerous Attacks",), "int"),
+    ("corners_ht", ("Corners 1st Half", "Corners Half Time", "Corner Kicks 1H"), "int"),
+    ("yellow", ("Yellow Cards",), "int"),
+)
+_BATCH_COLUMNS = [f"{side}_{field}" for side in ("h", "a") for field, _keys, _mode in _STAT_FIELDS] + ["h_goals", "a_goals"]
+_BATCH_INT_LIMIT = 2 ** 31  # fora disso o float64/int64 pode divergir do int do Python
+
+def _norm_pos(x) -> int:
+    if isinstance(x, str) and "%" in x:
+        try:
+            return int(x.replace("%", "").strip())
+        except Exception:
+            return 50
+    try:
+        return int(x)
+    except Exception:
+        return 50
+
+def _fixture_row(fixture: dict, stats_map: Dict[int, Dict[str, Any]]) -> Optional[Tuple[Any, Any, bool, List[int]]]:
+    """
+    Extrai (home_name, away_name, is_pregame, valores em _BATCH_COLUMNS) de um jogo.
+    Retorna None quando algum valor foge do caso numérico simples; esse jogo
+    segue pelo heuristics_football escalar para manter o resultado idêntico.
+    """
+    teams = fixture.get("teams", {}) or {}
+    home = teams.get("home", {}) or {}
+    away = teams.get("away", {}) or {}
+    status = fixture.get("status", {})
+    if not isinstance(status, dict):
+        return None
+    values: List[int] = []
+    for tid in (home.get("id"), away.get("id")):
+        st = stats_map.get(tid, {}) or {}
+        for _field, keys, mode in _STAT_FIELDS:
+            v = 0
+            for k in keys:
+                if k in st:
+                    v = st[k]
+                    break
+            if mode == "raw":
+                if type(v) is not int:
+                    return None
+            elif mode == "pos":
+                v = _norm_pos(v)
+            else:
+                v = safe_int(v)
+            if not -_BATCH_INT_LIMIT <= v <= _BATCH_INT_LIMIT:
+                return None
+            values.append(v)
+    goals = fixture.get("goals", {}) or {}
+    for v in (safe_int(goals.get("home")), safe_int(goals.get("away"))):
+        if not -_BATCH_INT_LIMIT <= v <= _BATCH_INT_LIMIT:
+            return None
+        values.append(v)
+    return home.get("name"), away.get("name"), not bool(status.get("elapsed")), values
+
+def heuristic_signals(col: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Sinais das heurísticas (power, limiares de cada mercado) para colunas
+    `_BATCH_COLUMNS` int64. Usado pelo lote do /analyze e pelo backtest.py.
+    """
+    # mesma ordem de operações do caminho escalar -> floats idênticos
+    h_power = (col["h_sot"] * 1.6) + (col["h_shots"] * 0.6) + (col["h_corners"] * 0.35) + (col["h_pos"] * 0.2) - (col["h_fouls"] * 0.1)
+    a_power = (col["a_sot"] * 1.6) + (col["a_shots"] * 0.6) + (col["a_corners"] * 0.35) + (col["a_pos"] * 0.2) - (col["a_fouls"] * 0.1)
+    power_diff = h_power - a_power
+    total_goals = col["h_goals"] + col["a_goals"]
+    combined_sot = col["h_sot"] + col["a_sot"]
+    combined_shots = col["h_shots"] + col["a_shots"]
+    total_corners = col["h_corners"] + col["a_corners"]
+    corners_diff = col["h_corners"] - col["a_corners"]
+
+    return {
+        "h_power": h_power, "a_power": a_power, "power_diff": power_diff,
+        "total_goals": total_goals, "combined_sot": combined_sot, "combined_shots": combined_shots,
+        "total_corners": total_corners, "corners_ht": col["h_corners_ht"] + col["a_corners_ht"],
+        # 1 = casa, -1 = fora, 0 = sem favorito
+        "strong": np.where(power_diff > 6, 1, np.where(power_diff < -6, -1, 0)),
+        "balanced": ((np.abs(power_diff) < 1) & (np.abs(col["h_pos"] - col["a_pos"]) <= 3)
+                     & (np.abs(col["h_danger"] - col["a_danger"]) <= 1) & (np.abs(col["h_attacks"] - col["a_attacks"]) <= 2)),
+        "leans_home": (col["h_pos"] > col["a_pos"]) | (col["h_danger"] > col["a_danger"]) | (col["h_attacks"] > col["a_attacks"]),
+        "dnb_mid": np.abs(power_diff) >= 3,
+        "over_2_5": (combined_sot >= 4) | (combined_shots >= 12),
+        "over_1_5": (combined_shots >= 8) | (combined_sot >= 3),
+        "over_3_5": (combined_sot >= 7) | (combined_shots >= 18),
+        # 2 = SIM forte, 1 = SIM médio, 0 = NAO
+        "btts": np.where((col["h_sot"] >= 2) & (col["a_sot"] >= 2), 2,
+                         np.where(((col["h_shots"] >= 5) & (col["a_shots"] >= 3)) | ((col["a_shots"] >= 5) & (col["h_shots"] >= 3)), 1, 0)),
+        # handicaps: 2 = linha -1.0, 1 = linha -0.5, 0 = nada
+        "ah_home": np.where(power_diff >= 5, 2, np.where(power_diff >= 3, 1, 0)),
+        "ah_away": np.where(power_diff <= -5, 2, np.where(power_diff <= -3, 1, 0)),
+        "eh": np.where(power_diff >= 4, 1, np.where(power_diff <= -4, -1, 0)),
+        "corners_asian": np.where(corners_diff >= 2, 1, np.where(-corners_diff >= 2, -1, 0)),
+        "cards": (col["h_yellow"] + col["a_yellow"]) >= 2,
+    }
+
+def _confidence(p: dict):
+    return p.get("confidence", 0)
+
+@timed_stage("heuristics_football_batch")
+def heuristics_football_batch(fixtures: List[dict], stats_maps: List[Dict[int, Dict[str, Any]]]) -> List[Tuple[List[dict], dict]]:
+    """
+    Mesmo resultado de heuristics_football para vários jogos de uma vez:
+    as estatísticas viram colunas NumPy e power, power diff e os limiares
+    de cada mercado são calculados para todos os jogos juntos.
+    """
+    results: List[Optional[Tuple[List[dict], dict]]] = [None] * len(fixtures)
+    rows = []
+    row_idx: List[int] = []
+    for i, (fixture, stats_map) in enumerate(zip(fixtures, stats_maps)):
+        row = _fixture_row(fixture, stats_map)
+        if row is None:
+            results[i] = heuristics_football(fixture, stats_map)
+        else:
+            rows.append(row)
+            row_idx.append(i)
+    if not rows:
+        return results
+
+    matrix = np.array([r[3] for r in rows], dtype=np.int64)
+    col = {name: matrix[:, k] for k, name in enumerate(_BATCH_COLUMNS)}
+
+    sig = heuristic_signals(col)
+    columns = zip(
+        rows, row_idx, *(sig[name].tolist() for name in (
+            "power_diff", "h_power", "a_power", "strong", "balanced", "leans_home", "dnb_mid", "combined_sot",
+            "combined_shots", "over_2_5", "over_1_5", "over_3_5", "btts", "corners_ht", "ah_home", "ah_away", "eh")),
+        (sig["total_goals"] == 0).tolist(), sig["total_corners"].tolist(), sig["corners_asian"].tolist(),
+        sig["cards"].tolist(), sig["total_goals"].tolist(),
+    )
+    for (home_name, away_name, is_pregame, _v), i, pdiff, h_pow, a_pow, strong_j, balanced_j, leans_home_j, dnb_mid_j, \
+            cs, csh, o25, o15, o35, btts_j, cht, ah_h, ah_a, eh_j, no_goals, tc, ca, cards_j, tg in columns:
+        # confianças já têm 2 casas, round(conf, 2) do escalar é identidade
+        if strong_j == 1:
+            preds = [
+                {"market": "moneyline", "recommendation": "Vitória Casa", "confidence": 0.85, "reason": f"Power diff {pdiff:.1f}"},
+                {"market": "dnb", "recommendation": "Casa (DNB)", "confidence": 0.7},
+                {"market": "double_chance", "recommendation": "Casa ou Empate", "confidence": 0.6},
+            ]
+        elif strong_j == -1:
+            preds = [
+                {"market": "moneyline", "recommendation": "Vitória Visitante", "confidence": 0.85, "reason": f"Power diff {pdiff:.1f}"},
+                {"market": "dnb", "recommendation": "Fora (DNB)", "confidence": 0.7},
+                {"market": "double_chance", "recommendation": "Fora ou Empate", "confidence": 0.6},
+            ]
+        else:
+            preds = [{"market": "moneyline", "recommendation": "Sem favorito definido", "confidence": 0.35}]
+            if not balanced_j:
+                preds.append({"market": "double_chance", "recommendation": "Casa ou Empate" if leans_home_j else "Fora ou Empate", "confidence": 0.5})
+            # com favorito forte o DNB médio seria duplicata (mesma recomendação) e cairia no dedupe
+            if dnb_mid_j:
+                preds.append({"market": "dnb", "recommendation": "Casa (DNB)" if pdiff > 0 else "Fora (DNB)", "confidence": 0.65})
+
+        if is_pregame:
+            preds.append({"market": "over_1_5", "recommendation": "OVER 1.5", "confidence": 0.65, "reason": "Tendência histórica de gols"})
+            preds.append({"market": "over_2_5", "recommendation": "OVER 2.5", "confidence": 0.55, "reason": "Probabilidade média pré-jogo"})
+            preds.append({"market": "btts", "recommendation": "SIM", "confidence": 0.55, "reason": "Ambas marcam comum em pré-jogo equilibrado"})
+        else:
+            preds.append({"market": "over_2_5", "recommendation": "OVER 2.5", "confidence": 0.75, "reason": f"SOT {cs}, shots {csh}"}
+                         if o25 else {"market": "over_2_5", "recommendation": "UNDER 2.5", "confidence": 0.45})
+            preds.append({"market": "over_1_5", "recommendation": "OVER 1.5", "confidence": 0.7}
+                         if o15 else {"market": "over_1_5", "recommendation": "UNDER 1.5", "confidence": 0.4})
+            preds.append({"market": "over_3_5", "recommendation": "OVER 3.5", "confidence": 0.65}
+                         if o35 else {"market": "over_3_5", "recommendation": "UNDER 3.5", "confidence": 0.45})
+            if btts_j == 2:
+                preds.append({"market": "btts", "recommendation": "SIM", "confidence": 0.8})
+            elif btts_j == 1:
+                preds.append({"market": "btts", "recommendation": "SIM", "confidence": 0.6})
+            else:
+                preds.append({"market": "btts", "recommendation": "NAO", "confidence": 0.45})
+
+        if cht >= 3:
+            preds.append({"market": "corners_ht_over", "recommendation": "OVER 4.5", "confidence": 0.65, "reason": f"1H corners {cht}"})
+        if csh >= 5:
+            preds.append({"market": "over_2_5_ht", "recommendation": "OVER 1.0", "confidence": 0.6})
+
+        if ah_h:
+            preds.append({"market": "asian_handicap_home", "recommendation": f"{home_name} -1.0" if ah_h == 2 else f"{home_name} -0.5", "confidence": 0.7 if ah_h == 2 else 0.6})
+        if ah_a:
+            preds.append({"market": "asian_handicap_away", "recommendation": f"{away_name} -1.0" if ah_a == 2 else f"{away_name} -0.5", "confidence": 0.7 if ah_a == 2 else 0.6})
+        if eh_j:
+            preds.append({"market": "handicap_european", "recommendation": f"{home_name if eh_j == 1 else away_name} -1", "confidence": 0.6})
+
+        if strong_j and no_goals:
+            team = home_name if strong_j == 1 else away_name
+            preds.append({"market": "ht_ft", "recommendation": f"{team} / {team}", "confidence": 0.7})
+
+        if is_pregame:
+            preds.append({"market": "corners_ft_over", "recommendation": "OVER 9.5", "confidence": 0.6, "reason": "Média histórica de escanteios"})
+        elif tc >= 7:
+            preds.append({"market": "corners_ft_over", "recommendation": "OVER 9.5", "confidence": 0.7, "reason": f"Corners {tc}"})
+        else:
+            preds.append({"market": "corners_ft_under", "recommendation": "UNDER 9.5", "confidence": 0.45})
+
+        if ca:
+            preds.append({"market": "corners_asian_ft", "recommendation": f"{home_name if ca == 1 else away_name} -1.5", "confidence": 0.65})
+
+        if is_pregame:
+            preds.append({"market": "cards_over", "recommendation": "OVER 3.5", "confidence": 0.55, "reason": "Tendência média de cartões pré-jogo"})
+        else:
+            preds.append({"market": "cards_over", "recommendation": "OVER 3.5", "confidence": 0.6}
+                         if cards_j else {"market": "cards_over", "recommendation": "UNDER 3.5", "confidence": 0.45})
+
+        preds.sort(key=_confidence, reverse=True)
+        summary = {
+            "home_team": home_name,
+            "away_team": away_name,
+            "home_power": round(h_pow, 2),
+            "away_power": round(a_pow, 2),
+            "combined_shots": csh,
+            "combined_sot": cs,
+            "combined_corners": tc,
+            "total_goals": tg,
+        }
+        results[i] = (preds, summary)
+    return results
+
 # ------------- Odds helpers -------------
 def build_book_odds_map(bookmaker: dict) -> Dict[Tuple[str, str], float]:
     out: Dict[Tuple[str, str], float] = {}
@@ -427,105 +2879,138 @@ def build_book_odds_map(bookmaker: dict) -> Dict[Tuple[str, str], float]:
             out[(bet_name.strip(), v)] = odd_f
     return out
 
-def enhance_predictions_with_preferred_odds(predictions: List[Dict], odds_raw: Optional[Dict]) -> List[Dict]:
+# mapeamento dos mercados internos para os nomes da API.
+# Cada convert recebe (rec, str(rec), str(rec).lower()) e devolve o "value" da API ou None.
+def _has(rec, r: str, *opts) -> bool:
+    return bool(rec) and any(o in r for o in opts)
+
+def _handicap_line(rec, s: str, r: str):
+    return s.split()[-1] if "-" in s else None
+
+ODDS_MARKETS: Dict[str, Tuple[Tuple[str, ...], Callable[[Any, str, str], Any]]] = {
+    "moneyline": (("Match Winner", "Match Result", "1X2"),
+                  lambda rec, s, r: "Home" if _has(rec, r, "casa", "home", "vitória casa", "1") else ("Away" if _has(rec, r, "fora", "away", "vitória visitante", "2") else None)),
+    "dnb": (("Draw No Bet", "Draw No Bet FT", "DNB"),
+            lambda rec, s, r: "Home" if _has(rec, r, "casa", "home") else ("Away" if _has(rec, r, "fora", "away") else None)),
+    "double_chance": (("Double Chance",),
+                      lambda rec, s, r: "Home/Draw" if _has(rec, r, "casa", "home") or "casa ou empate" in r else ("Away/Draw" if _has(rec, r, "fora", "away") or "fora ou empate" in r else None)),
+    "over_2_5": (("Goals Over/Under", "Over/Under"),
+                 lambda rec, s, r: "Over 2.5" if "over" in r else ("Under 2.5" if "under" in r else None)),
+    "over_1_5": (("Goals Over/Under", "Over/Under"),
+                 lambda rec, s, r: "Over 1.5" if "over 1.5" in r or "over" in r and "1.5" in s else ("Under 1.5" if "under" in r else None)),
+    "over_3_5": (("Goals Over/Under", "Over/Under"),
+                 lambda rec, s, r: "Over 3.5" if "over" in r and "3.5" in s else ("Under 3.5" if "under" in r else None)),
+    "over_2_5_ht": (("Half-time Goals Over/Under", "Goals Over/Under - 1st Half"),
+                    lambda rec, s, r: "Over 1.0" if "over" in r else ("Under 1.0" if "under" in r else None)),
+    "btts": (("Both Teams To Score", "Both Teams To Score?"),
+             lambda rec, s, r: "Yes" if _has(rec, r, "sim", "yes") else ("No" if _has(rec, r, "não", "nao", "no") else None)),
+    "asian_handicap_home": (("Asian Handicap", "Asian Handicap Match"), _handicap_line),
+    "asian_handicap_away": (("Asian Handicap", "Asian Handicap Match"), _handicap_line),
+    "handicap_european": (("European Handicap", "Handicap"), _handicap_line),
+    "ht_ft": (("Half Time / Full Time", "HT/FT"), lambda rec, s, r: rec),
+    "corners_ft_over": (("Corners Over/Under", "Corners Total"),
+                        lambda rec, s, r: "Over 9.5" if "over" in r and "9.5" in s else ("Under 9.5" if "under" in r else None)),
+    "corners_ft_under": (("Corners Over/Under", "Corners Total"),
+                         lambda rec, s, r: "Under 9.5" if "under" in r and "9.5" in s else ("Over 9.5" if "over" in r else None)),
+    "corners_ht_over": (("1st Half Corners", "Corners Over/Under - 1st Half"),
+                        lambda rec, s, r: "Over 4.5" if "over" in r and "4.5" in s else None),
+    "corners_asian_ft": (("Asian Corners", "Corners Asian Handicap"), _handicap_line),
+    "cards_over": (("Cards Over/Under", "Total Cards"),
+                   lambda rec, s, r: "Over 3.5" if "over" in r else ("Under 3.5" if "under" in r else None)),
+}
+
+# nome do mercado na API -> [(mercado interno, posição do nome na lista do mercado)]
+_ODDS_NAME_TO_MARKETS: Dict[str, List[Tuple[str, int]]] = {}
+for _market, (_names, _convert) in ODDS_MARKETS.items():
+    for _pos, _name in enumerate(_names):
+        _ODDS_NAME_TO_MARKETS.setdefault(_name, []).append((_market, _pos))
+
+def odds_value_for(market: str, rec) -> Any:
+    """Converte a recomendação interna no "value" usado pela API (ou None)."""
+    mapping = ODDS_MARKETS.get(market)
+    if not mapping:
+        return None
+    s = str(rec)
+    try:
+        return mapping[1](rec, s, s.lower())
+    except Exception:
+        return None
+
+def compile_odds_index(odds_raw: Optional[Dict]) -> Optional[Dict[Tuple[str, Any], Tuple[float, str, str]]]:
     """
-    Para cada predição, busca odds nas casas preferidas e anexa best_odd & bookmaker.
-    Remove duplicados exatos (mesmo mercado + mesma recomendação).
-    Ordena pela confiança final (desc).
+    Compila o payload de odds num índice (mercado interno, value da API) ->
+    (melhor odd, casa, nome do mercado na API), só com as casas preferidas.
+    Empates ficam com a casa que aparece primeiro e, dentro dela, com o
+    primeiro nome do mercado, igual à varredura casa a casa.
+    Retorna None se não houver odds de nenhuma casa preferida.
     """
     if not odds_raw or not odds_raw.get("response"):
-        return predictions
+        return None
 
     try:
         bookmakers = odds_raw["response"][0].get("bookmakers", []) or []
     except Exception:
         bookmakers = []
 
-    # filtra só casas preferidas
-    preferred_books = []
+    index: Dict[Tuple[str, Any], Tuple[float, str, str]] = {}
+    rank: Dict[Tuple[str, Any], Tuple[int, int]] = {}
+    book_idx = 0
     for b in bookmakers:
         name = (b.get("name") or "").lower()
-        if any(pref in name for pref in PREFERRED_BOOKMAKERS):
-            preferred_books.append(b)
-
-    if not preferred_books:
+        if not any(pref in name for pref in PREFERRED_BOOKMAKERS):
+            continue
+        for (bet_name, v), odd in build_book_odds_map(b).items():
+            if not odd or not odd > 0.0:
+                continue
+            for market, pos in _ODDS_NAME_TO_MARKETS.get(bet_name, ()):
+                key = (market, v)
+                cur = index.get(key)
+                if cur is None or odd > cur[0] or (odd == cur[0] and (book_idx, pos) < rank[key]):
+                    index[key] = (odd, b.get("name"), bet_name)
+                    rank[key] = (book_idx, pos)
+        book_idx += 1
+    return index if book_idx else None
+
+# índices compilados por payload (o payload vem do cache e é reaproveitado entre chamadas)
+_ODDS_INDEX_MEMO_SIZE = 256
+_odds_index_memo: "OrderedDict[int, Tuple[Dict, Optional[Dict]]]" = OrderedDict()
+
+def get_odds_index(odds_raw: Optional[Dict]) -> Optional[Dict[Tuple[str, Any], Tuple[float, str, str]]]:
+    if not odds_raw:
+        return None
+    memo = _odds_index_memo.get(id(odds_raw))
+    if memo is not None and memo[0] is odds_raw:
+        _odds_index_memo.move_to_end(id(odds_raw))
+        return memo[1]
+    index = compile_odds_index(odds_raw)
+    _odds_index_memo[id(odds_raw)] = (odds_raw, index)
+    while len(_odds_index_memo) > _ODDS_INDEX_MEMO_SIZE:
+        _odds_index_memo.popitem(last=False)
+    return index
+
+@timed_stage("odds_enrichment")
+def enhance_predictions_with_preferred_odds(predictions: List[Dict], odds_raw: Optional[Dict],
+                                            index: Optional[Dict[Tuple[str, Any], Tuple[float, str, str]]] = None) -> List[Dict]:
+    """
+    Para cada predição, busca odds nas casas preferidas e anexa best_odd & bookmaker.
+    Remove duplicados exatos (mesmo mercado + mesma recomendação).
+    Ordena pela confiança final (desc).
+    `index` já compilado (ex.: do odds_store) dispensa o payload `odds_raw`.
+    """
+    if index is None:
+        if not odds_raw or not odds_raw.get("response"):
+            return predictions
+        index = get_odds_index(odds_raw)
+    if index is None:
         return predictions
 
-    # mapeamento dos mercados internos para os nomes da API
-    def conv_contains(rec: str, *opts):
-        if not rec:
-            return None
-        r = str(rec).lower()
-        for o in opts:
-            if o.lower() in r:
-                return True
-        return False
-
-    market_map = {
-        "moneyline": {
-            "names": ["Match Winner", "Match Result", "1X2"],
-            "convert": lambda rec: ("Home" if conv_contains(rec, "casa", "home", "vitória casa", "1") else ("Away" if conv_contains(rec, "fora", "away", "vitória visitante", "2") else None))
-        },
-        "dnb": {
-            "names": ["Draw No Bet", "Draw No Bet FT", "DNB"],
-            "convert": lambda rec: ("Home" if conv_contains(rec, "casa", "home") else ("Away" if conv_contains(rec, "fora", "away") else None))
-        },
-        "double_chance": {
-            "names": ["Double Chance"],
-            "convert": lambda rec: ("Home/Draw" if conv_contains(rec, "casa") or conv_contains(rec, "home") or "casa ou empate" in str(rec).lower() else ("Away/Draw" if conv_contains(rec, "fora") or conv_contains(rec, "away") or "fora ou empate" in str(rec).lower() else None))
-        },
-        "over_2_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 2.5" if "over" in str(rec).lower() or "over 2.5" in str(rec).lower() or "over2.5" in str(rec).lower() else ("Under 2.5" if "under" in str(rec).lower() else None))},
-        "over_1_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 1.5" if "over 1.5" in str(rec).lower() or "over" in str(rec).lower() and "1.5" in str(rec) else ("Under 1.5" if "under" in str(rec).lower() else None))},
-        "over_3_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 3.5" if "over" in str(rec).lower() and "3.5" in str(rec) else ("Under 3.5" if "under" in str(rec).lower() else None))},
-        "over_2_5_ht": {"names": ["Half-time Goals Over/Under", "Goals Over/Under - 1st Half"], "convert": lambda rec: ("Over 1.0" if "over" in str(rec).lower() else ("Under 1.0" if "under" in str(rec).lower() else None))},
-        "btts": {"names": ["Both Teams To Score", "Both Teams To Score?"], "convert": lambda rec: ("Yes" if conv_contains(rec, "sim", "yes") else ("No" if conv_contains(rec, "não", "nao", "no") else None))},
-        "asian_handicap_home": {"names": ["Asian Handicap", "Asian Handicap Match"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
-        "asian_handicap_away": {"names": ["Asian Handicap", "Asian Handicap Match"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
-        "handicap_european": {"names": ["European Handicap", "Handicap"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
-        "ht_ft": {"names": ["Half Time / Full Time", "HT/FT"], "convert": lambda rec: rec},
-        "corners_ft_over": {"names": ["Corners Over/Under", "Corners Total"], "convert": lambda rec: ("Over 9.5" if "over" in str(rec).lower() and "9.5" in str(rec) else ("Under 9.5" if "under" in str(rec).lower() else None))},
-        "corners_ft_under": {"names": ["Corners Over/Under", "Corners Total"], "convert": lambda rec: ("Under 9.5" if "under" in str(rec).lower() and "9.5" in str(rec) else ("Over 9.5" if "over" in str(rec).lower() else None))},
-        "corners_ht_over": {"names": ["1st Half Corners", "Corners Over/Under - 1st Half"], "convert": lambda rec: ("Over 4.5" if "over" in str(rec).lower() and "4.5" in str(rec) else None)},
-        "corners_asian_ft": {"names": ["Asian Corners", "Corners Asian Handicap"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
-        "cards_over": {"names": ["Cards Over/Under", "Total Cards"], "convert": lambda rec: ("Over 3.5" if "over" in str(rec).lower() else ("Under 3.5" if "under" in str(rec).lower() else None))}
-    }
-
     enhanced = []
     for pred in predictions:
-        market = pred.get("market")
-        rec = pred.get("recommendation")
-        mapping = market_map.get(market)
-        if not mapping:
-            enhanced.append(pred)
-            continue
-
-        try:
-            api_val = mapping["convert"](rec)
-        except Exception:
-            api_val = None
-        if not api_val:
-            enhanced.append(pred)
-            continue
-
-        best_odd = 0.0
-        best_book = None
-        best_market_name = None
-
-        # checa odds nos books preferidos
-        for book in preferred_books:
-            book_map = build_book_odds_map(book)
-            for name in mapping.get("names", []):
-                odd = book_map.get((name, api_val), 0.0)
-                if odd and odd > best_odd:
-                    best_odd = odd
-                    best_book = book.get("name")
-                    best_market_name = name
-
-        if best_odd > 0:
+        api_val = odds_value_for(pred.get("market"), pred.get("recommendation"))
+        found = index.get((pred.get("market"), api_val)) if api_val else None
+        if found:
             p = dict(pred)
-            p["best_odd"] = best_odd
-            p["bookmaker"] = best_book
-            p["market_name_found"] = best_market_name
+            p["best_odd"], p["bookmaker"], p["market_name_found"] = found
             enhanced.append(p)
         else:
             enhanced.append(pred)
@@ -544,15 +3029,328 @@ def enhance_predictions_with_preferred_odds(predictions: List[Dict], odds_raw: O
 
     return deduped
 
+# ------------- Odds em lote (store por fixture) -------------
+def _intern_odds_index(index: Optional[Dict[Tuple[str, Any], Tuple[float, str, str]]]):
+    # casas, mercados e values se repetem em todos os jogos: uma cópia de cada string
+    if not index:
+        return index
+    it = lambda v: sys.intern(v) if isinstance(v, str) else v
+    return {(it(m), it(v)): (odd, it(book), it(bet)) for (m, v), (odd, book, bet) in index.items()}
+
+class OddsStore:
+    """
+    Melhores odds por fixture, alimentado pela varredura paginada de odds?date=.
+    Cada entrada é o índice de compile_odds_index (só casas preferidas e mercados
+    do ODDS_MARKETS) ou None quando a varredura cobriu o jogo e não há odds das
+    casas preferidas. O /analyze lê daqui sem chamada upstream.
+    """
+
+    def __init__(self, max_age: float = ODDS_STORE_MAX_AGE):
+        self.max_age = max_age
+        self._entries: Dict[int, Tuple[float, Optional[Dict]]] = {}  # fixture id -> (ts, índice)
+        self._by_date: Dict[str, set] = {}
+        self._dates: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"sweeps": 0, "pages": 0, "items": 0, "incomplete": 0, "lookups": 0, "hits": 0}
+
+    def get(self, fixture_id: int) -> Tuple[bool, Optional[Dict]]:
+        """(conhecido, índice). conhecido=False: fora da varredura ou vencido -> buscar por fixture."""
+        self._stats["lookups"] += 1
+        rec = self._entries.get(fixture_id)
+        if rec is None or time.time() - rec[0] > self.max_age:
+            return False, None
+        self._stats["hits"] += 1
+        return True, rec[1]
+
+    def peek(self, fixture_id: int) -> Tuple[bool, Optional[Dict]]:
+        """Como get, sem contar nas estatísticas (leituras internas, ex.: ranking de value bets)."""
+        rec = self._entries.get(fixture_id)
+        if rec is None or time.time() - rec[0] > self.max_age:
+            return False, None
+        return True, rec[1]
+
+    def ingest(self, date: str, items: List[dict], pages: int, fixture_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Grava as odds de uma data. Com `fixture_ids` (varredura completa) os jogos
+        da data sem odds viram None e os que saíram da data são descartados.
+        Retorna os ids cujo índice mudou.
+        """
+        now = time.time()
+        changed: List[int] = []
+        seen = set()
+        for item in items:
+            fid = safe_int((item.get("fixture") or {}).get("id"))
+            if not fid:
+                continue
+            seen.add(fid)
+            if self._put(fid, _intern_odds_index(compile_odds_index({"response": [item]})), now):
+                changed.append(fid)
+        if fixture_ids is not None:
+            for fid in fixture_ids:
+                if fid not in seen:
+                    seen.add(fid)
+                    if self._put(fid, None, now):
+                        changed.append(fid)
+            for fid in self._by_date.get(date, set()) - seen:
+                self._entries.pop(fid, None)
+            self._by_date[date] = seen
+        else:
+            self._stats["incomplete"] += 1
+            self._by_date.setdefault(date, set()).update(seen)
+        self._stats["pages"] += pages
+        self._stats["items"] += len(items)
+        self._dates[date] = {"pages": pages, "fixtures": len(self._by_date[date]), "complete": fixture_ids is not None, "ts": now}
+        return changed
+
+    def _put(self, fid: int, index: Optional[Dict], now: float) -> bool:
+        old = self._entries.get(fid)
+        self._entries[fid] = (now, index)
+        return old is None or old[1] != index
+
+    def date_age(self, date: str) -> float:
+        """Segundos desde a última varredura completa da data (inf se nunca houve)."""
+        info = self._dates.get(date)
+        if not info or not info["complete"]:
+            return math.inf
+        return time.time() - info["ts"]
+
+    def export_date(self, date: str) -> Dict[str, Any]:
+        """Índices de uma data em formato JSON, para os outros workers (cache persistente)."""
+        info = self._dates[date]
+        entries = {}
+        for fid in self._by_date.get(date, ()):
+            rec = self._entries.get(fid)
+            if rec is not None:
+                entries[str(fid)] = [[mk, v, odd, book, bet] for (mk, v), (odd, book, bet) in rec[1].items()] if rec[1] is not None else None
+        return {"ts": info["ts"], "pages": info["pages"], "complete": info["complete"], "entries": entries}
+
+    def load_date(self, date: str, payload: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        Aplica a varredura de uma data feita por outro worker (export_date), mantendo
+        a idade original. None se a local já é tão nova quanto; senão os ids que mudaram.
+        """
+        ts = payload["ts"]
+        if ts <= self._dates.get(date, {}).get("ts", 0):
+            return None
+        changed: List[int] = []
+        seen = set()
+        for key, rows in payload["entries"].items():
+            fid = int(key)
+            seen.add(fid)
+            index = _intern_odds_index({(mk, v): (odd, book, bet) for mk, v, odd, book, bet in rows}) if rows is not None else None
+            if self._put(fid, index, ts):
+                changed.append(fid)
+        if payload["complete"]:
+            for fid in self._by_date.get(date, set()) - seen:
+                self._entries.pop(fid, None)
+            self._by_date[date] = seen
+        else:
+            self._by_date.setdefault(date, set()).update(seen)
+        self._dates[date] = {"pages": payload["pages"], "fixtures": len(self._by_date[date]), "complete": payload["complete"], "ts": ts}
+        return changed
+
+    def record_sweep(self):
+        self._stats["sweeps"] += 1
+
+    def retain(self, dates: List[str]):
+        """Esquece as datas que saíram da janela (jogos de ontem)."""
+        for date in [d for d in self._by_date if d not in dates]:
+            for fid in self._by_date.pop(date):
+                self._entries.pop(fid, None)
+            self._dates.pop(date, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with_odds = sum(1 for _ts, index in self._entries.values() if index)
+        return {**self._stats, "fixtures": len(self._entries), "with_odds": with_odds, "dates": dict(self._dates)}
+
+odds_store = OddsStore()
+
+GaugeMetric("tipster_odds_store_fixtures", "Jogos no store de odds em lote", fn=lambda: {(): len(odds_store._entries)})
+
+async def _fetch_odds_pages(date: str) -> Tuple[List[dict], int, bool]:
+    """Todas as páginas de odds?date= (as seguintes em paralelo): (itens, páginas, completo)."""
+    first = await api_get_raw("odds", params={"date": date})
+    if first is None:
+        return [], 0, False
+    total = safe_int((first.get("paging") or {}).get("total")) or 1
+    last = min(total, ODDS_SWEEP_MAX_PAGES)
+    sem = asyncio.Semaphore(ODDS_SWEEP_CONCURRENCY)
+
+    async def page(n: int):
+        async with sem:
+            return await api_get_raw("odds", params={"date": date, "page": n})
+
+    pages = [first] + list(await asyncio.gather(*(page(n) for n in range(2, last + 1))))
+    items = [item for data in pages if data for item in data.get("response") or []]
+    return items, last, total == last and all(data is not None for data in pages)
+
+# chamados após cada varredura com os ids dos jogos cujas odds mudaram
+_odds_listeners: List[Callable[[List[int]], None]] = []
+
+def on_odds_change(fn: Callable[[List[int]], None]):
+    _odds_listeners.append(fn)
+    return fn
+
+def _odds_sweep_key(date: str) -> str:
+    return f"odds_sweep:{date}"
+
+async def _sweep_odds_date(date: str, days_forward: int) -> Tuple[bool, List[int]]:
+    """Varre uma data na API e grava o índice compilado para os outros workers: (ok, ids mudados)."""
+    items, pages, complete = await _fetch_odds_pages(date)
+    if not pages:
+        return False, []
+    # ids dos jogos da data (fonte do snapshot) só quando todas as páginas vieram
+    async with _sources_lock(days_forward):
+        by_id = ((_fixture_sources.get(days_forward) or {}).get("sources") or {}).get(date)
+        fixture_ids = list(by_id) if complete and by_id is not None else None
+    changed = odds_store.ingest(date, items, pages, fixture_ids)
+    if persistent_store is not None:
+        _store_save(_odds_sweep_key(date), odds_store.export_date(date), ODDS_STORE_MAX_AGE)
+    return complete, changed
+
+async def _load_odds_date(date: str) -> Tuple[bool, List[int]]:
+    """Carrega a varredura de uma data gravada pelo worker com a lease: (achou, ids mudados)."""
+    rec = await asyncio.to_thread(persistent_store.get, _odds_sweep_key(date))
+    if rec is None:
+        return False, []
+    return True, odds_store.load_date(date, rec[1]) or []
+
+async def refresh_odds_store(days_forward: int = SNAPSHOT_DAYS_FORWARD) -> bool:
+    """
+    Varre as odds das datas da janela do snapshot (uma chamada por página em vez
+    de uma por jogo) e atualiza o odds_store. Os ids dos jogos cujas odds mudaram
+    vão para os listeners (cache do /analyze, ranking de value bets).
+    Hoje é varrido a cada execução; as datas seguintes só com ODDS_SWEEP_FUTURE_SECONDS
+    de idade. Com cache persistente só o worker com a lease chama a API; os outros
+    carregam o índice que ele gravou.
+    """
+    dates = _window_dates(days_forward)
+    sweep = True
+    if persistent_store is not None:
+        lease_ttl = max(2 * ODDS_SWEEP_SECONDS, 60)
+        sweep = await asyncio.to_thread(persistent_store.acquire_lease, f"odds_sweep_{days_forward}", WORKER_ID, lease_ttl)
+    ok = True
+    changed: List[int] = []
+    swept = 0
+    with api_priority("prefetch"):
+        for i, date in enumerate(dates):
+            if not sweep:
+                found, ids = await _load_odds_date(date)
+                ok = ok and found
+            elif i and odds_store.date_age(date) < ODDS_SWEEP_FUTURE_SECONDS:
+                continue
+            else:
+                swept += 1
+                found, ids = await _sweep_odds_date(date, days_forward)
+                ok = ok and found
+            changed.extend(ids)
+    odds_store.retain(dates)
+    if sweep:
+        odds_store.record_sweep()
+    for fn in _odds_listeners:
+        try:
+            fn(changed)
+        except Exception:
+            log_event(logging.ERROR, "odds_listener_error", listener=getattr(fn, "__qualname__", str(fn)), exc_info=True)
+    log_event(logging.INFO, "odds_sweep", dates=swept, loaded=not sweep, fixtures=len(odds_store._entries), changed=len(changed), ok=ok)
+    return ok
+
+async def fetch_preferred_odds(game_id: int) -> Tuple[bool, Optional[Dict], Optional[Dict]]:
+    """
+    (ok, odds_raw, índice) do jogo: do odds_store sem chamada upstream (odds_raw
+    None) ou, fora dele, via odds?fixture= com cache. ok=False se a busca falhou.
+    """
+    known, index = odds_store.get(game_id)
+    if known:
+        return True, None, index
+    odds_raw = await api_get_cached("odds", params={"fixture": game_id})
+    value_bets.observe(game_id, "odds", odds_raw)
+    return odds_raw is not None, odds_raw, get_odds_index(odds_raw)
+
+# ------------- Analyze result cache -------------
+def _analyze_key(game_id: int) -> str:
+    return f"analyze:{game_id}"
+
+def _analyze_ttl(state: str) -> float:
+    if state == "finished":
+        return ANALYZE_TTL_FINISHED or math.inf
+    if state == "live":
+        return ANALYZE_TTL_LIVE
+    return ANALYZE_TTL_SCHEDULED
+
+# mudanças que alteram a análise de um jogo (minuto corrido não conta)
+ANALYZE_INVALIDATING_FIELDS = {"status", "goals", "score", "other"}
+
+@on_snapshot_change
+def invalidate_changed_analyses(prev: FixturesSnapshot, new: FixturesSnapshot, changes: FixtureChanges) -> int:
+    """
+    Descarta análises em cache dos jogos cujo status/placar mudou no change set
+    do refresh, junto com a fixture e as estatísticas cacheadas desses jogos.
+    """
+    dropped = 0
+    for gid, fields in changes.updated.items():
+        if ANALYZE_INVALIDATING_FIELDS.intersection(fields):
+            dropped += _cache.pop(_analyze_key(gid))
+            _cache.pop(_api_cache_key("fixtures", {"id": gid}))
+            _cache.pop(_api_cache_key("fixtures/statistics", {"fixture": gid}))
+    return dropped
+
+@on_odds_change
+def invalidate_odds_analyses(ids: List[int]) -> int:
+    """Descarta análises em cache dos jogos cujas odds mudaram na varredura."""
+    return sum(_cache.pop(_analyze_key(gid)) for gid in ids)
+
 # ------------- Analyze endpoint -------------
-@app.get("/analyze")
-def analyze(game_id: int = Query(...)):
-    print(f"[ANALYZE] Chamado com game_id={game_id}")  # log para debug
+ANALYZE_RAW_KEYS = ("raw_fixture", "raw_stats", "raw_odds")
 
-    # fixtures
-    fixture_data = api_get_raw("fixtures", params={"id": game_id})
+@app.get("/analyze")
+async def analyze(request: Request, game_id: int = Query(...), fields: Optional[str] = Query(None),
+                  include_raw: bool = Query(False)):
+    log_event(logging.INFO, "analyze_request", sample=LOG_SAMPLE_RATE, game_id=game_id)
+    try:
+        with deadline(ANALYZE_DEADLINE):
+            prepared = await get_analysis(game_id)
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Tempo esgotado consultando a API externa")
+    return prepared.respond(request, parse_fields(fields), include_raw, ANALYZE_RAW_KEYS)
+
+async def get_analysis(game_id: int) -> PreparedJSON:
+    # resultado em cache com TTL pelo status (encerrado: longo; agendado: minutos; ao vivo: segundos)
+    key = _analyze_key(game_id)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    return await singleflight(key, lambda: _analyze_uncached(game_id))
+
+def _fixture_error(timed_out: bool) -> Tuple[int, str]:
+    if timed_out:
+        return 504, "Tempo esgotado consultando a API externa (fixtures)"
+    return 502, "Erro ao consultar API externa (fixtures)"
+
+def _upstream_budget() -> Optional[float]:
+    """Prazo das buscas do /analyze: o da requisição menos a folga para montar a resposta."""
+    left = time_left()
+    return None if left is None else max(left - ANALYZE_DEADLINE_RESERVE, 0.0)
+
+def _degraded_parts(stats_raw, odds_ok: bool) -> List[str]:
+    """Partes que faltaram por falha/prazo upstream; resposta vazia não conta."""
+    degraded = [part for part, missing in (("stats", stats_raw is None), ("odds", not odds_ok)) if missing]
+    for part in degraded:
+        ANALYZE_DEGRADED.inc(part)
+    return degraded
+
+async def _analyze_uncached(game_id: int) -> PreparedJSON:
+    # fixtures, stats e odds são independentes -> busca em paralelo, todas dentro do prazo da requisição;
+    # sem stats/odds a análise sai parcial ("degraded") em vez de esperar ou falhar
+    with deadline(_upstream_budget()):
+        fixture_data, stats_raw, (odds_ok, odds_raw, odds_index) = await asyncio.gather(
+            api_get_cached("fixtures", params={"id": game_id}),
+            fetch_football_statistics(game_id),
+            fetch_preferred_odds(game_id),
+        )
+        timed_out = deadline_passed()
     if fixture_data is None:
-        raise HTTPException(status_code=502, detail="Erro ao consultar API externa (fixtures)")
+        status, detail = _fixture_error(timed_out)
+        raise HTTPException(status_code=status, detail=detail)
 
     if not fixture_data.get("response"):
         raise HTTPException(status_code=404, detail=f"Jogo {game_id} não encontrado")
@@ -560,9 +3358,8 @@ def analyze(game_id: int = Query(...)):
     fixture = fixture_data["response"][0]
 
     # stats
-    stats_raw = fetch_football_statistics(game_id)
     if stats_raw is None:
-        print(f"[analyze] warning: stats fetch returned None for fixture {game_id}")
+        log_event(logging.WARNING, "stats_missing", game_id=game_id)
         stats_map = {}
     else:
         stats_map = build_stats_map(stats_raw)
@@ -571,24 +3368,524 @@ def analyze(game_id: int = Query(...)):
     preds, summary = heuristics_football(fixture, stats_map)
 
     # odds
-    odds_raw = api_get_raw("odds", params={"fixture": game_id})
-    enhanced = enhance_predictions_with_preferred_odds(preds, odds_raw)
+    enhanced = enhance_predictions_with_preferred_odds(preds, odds_raw, odds_index)
 
     # top 3 picks (destacados no front)
     top3 = enhanced[:3]
 
-    return {
+    degraded = _degraded_parts(stats_raw, odds_ok)
+    result = {
         "game_id": game_id,
         "summary": summary,
         "predictions": enhanced,
         "top3": top3,
+        "degraded": degraded,
         "raw_fixture": fixture,
         "raw_stats": stats_raw,
         "raw_odds": odds_raw
     }
+    prepared = PreparedJSON(result)
+    state = game_state((fixture.get("fixture") or {}).get("status"))
+    ttl = _analyze_ttl(state)
+    if degraded:
+        # parcial: guarda pouco, a próxima chamada tenta completar
+        ttl = min(ttl, ANALYZE_TTL_DEGRADED)
+    _cache_set(_analyze_key(game_id), prepared, ttl=ttl)
+    return prepared
+
+class BatchAnalyzeRequest(BaseModel):
+    game_ids: List[int] = []
+    league: Optional[int] = None
+
+@app.post("/analyze/batch")
+async def analyze_batch(body: BatchAnalyzeRequest):
+    """
+    Analisa vários jogos numa chamada (lista de ids e/ou todos os jogos de uma liga
+    no snapshot). As heurísticas rodam vetorizadas sobre todos os jogos.
+    """
+    try:
+        with deadline(ANALYZE_DEADLINE):
+            return await _analyze_batch(body)
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Tempo esgotado consultando a API externa")
+
+async def _analyze_batch(body: BatchAnalyzeRequest) -> Dict[str, Any]:
+    game_ids = list(dict.fromkeys(body.game_ids))
+    if body.league:
+        snap = await get_fixtures_snapshot()
+        for g in snap.games_by_league.get(body.league, []):
+            if g.get("game_id") not in game_ids:
+                game_ids.append(g.get("game_id"))
+    if not game_ids:
+        raise HTTPException(status_code=400, detail="Informe game_ids ou league")
+    if len(game_ids) > BATCH_MAX_FIXTURES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BATCH_MAX_FIXTURES} jogos por lote")
+
+    with deadline(_upstream_budget()):
+        fetched = await asyncio.gather(*(
+            asyncio.gather(
+                api_get_cached("fixtures", params={"id": gid}),
+                fetch_football_statistics(gid),
+                fetch_preferred_odds(gid),
+            )
+            for gid in game_ids
+        ))
+        timed_out = deadline_passed()
+
+    ok_ids, fixtures, stats_maps, odds_list, degraded_list, errors = [], [], [], [], [], []
+    for gid, (fixture_data, stats_raw, (odds_ok, odds_raw, odds_index)) in zip(game_ids, fetched):
+        if fixture_data is None:
+            status, detail = _fixture_error(timed_out)
+            errors.append({"game_id": gid, "status_code": status, "detail": detail})
+            continue
+        if not fixture_data.get("response"):
+            errors.append({"game_id": gid, "status_code": 404, "detail": f"Jogo {gid} não encontrado"})
+            continue
+        ok_ids.append(gid)
+        fixtures.append(fixture_data["response"][0])
+        stats_maps.append(build_stats_map(stats_raw) if stats_raw is not None else {})
+        odds_list.append(odds_index)
+        degraded_list.append(_degraded_parts(stats_raw, odds_ok))
+
+    results = []
+    for gid, (preds, summary), odds_index, degraded in zip(ok_ids, heuristics_football_batch(fixtures, stats_maps), odds_list, degraded_list):
+        enhanced = enhance_predictions_with_preferred_odds(preds, None, odds_index)
+        results.append({"game_id": gid, "summary": summary, "predictions": enhanced, "top3": enhanced[:3], "degraded": degraded})
+
+    return {"results": results, "errors": errors}
+
+# ------------- Value bets (ranking pré-calculado) -------------
+class ValueBetIndex:
+    """
+    Ranking das previsões com odd de todos os jogos do snapshot (agendados e ao
+    vivo) por edge = confidence × best_odd − 1. Só lê o que já está em memória
+    (snapshot, odds_store, stats/odds em cache): nenhuma chamada upstream.
+
+    Cada entrada fica em listas ordenadas por (-edge, jogo, mercado, sugestão):
+    uma global, uma por liga e uma por mercado. Mudanças de fixture (change set
+    do snapshot), de odds (varredura) ou de stats/odds buscadas por jogo só
+    marcam o jogo; o recálculo dele acontece na próxima consulta e mexe só nas
+    suas entradas (bisect), e o top-N percorre a lista mais curta que atende
+    aos filtros, parando no primeiro edge abaixo do mínimo.
+    """
+
+    def __init__(self):
+        self.snap: Optional[FixturesSnapshot] = None
+        self._entries: Dict[tuple, dict] = {}                # chave de ordenação -> entrada
+        self._by_game: Dict[int, List[tuple]] = {}
+        self._rank: List[tuple] = []
+        self._by_league: Dict[Any, List[tuple]] = {}
+        self._by_market: Dict[str, List[tuple]] = {}
+        self._inputs: Dict[int, Dict[str, int]] = {}          # id -> id() dos payloads de stats/odds usados
+        self._dirty: set = set()
+        self._stats = {"rebuilds": 0, "recomputed": 0, "queries": 0}
+
+    # --- entrada ---
+    def on_snapshot(self, prev: FixturesSnapshot, snap: FixturesSnapshot, changes: FixtureChanges):
+        if self.snap is not prev:
+            return  # outra janela (days_forward) ou índice ainda não montado
+        self.snap = snap
+        self._dirty.update(changes.added, changes.removed)
+        # minuto corrido não muda previsões nem odds
+        self._dirty.update(gid for gid, fields in changes.updated.items() if fields != ("elapsed",))
+
+    def on_odds(self, ids: List[int]):
+        self._dirty.update(ids)
+
+    def observe(self, game_id: int, part: str, payload: Optional[dict]):
+        """Payload de stats/odds de um jogo vindo do cache: agenda o recálculo se é outro."""
+        if payload is None or self.snap is None or game_id not in self.snap.games_by_id:
+            return
+        seen = self._inputs.get(game_id)
+        if seen is None or seen.get(part) != id(payload):
+            self._dirty.add(game_id)
+
+    # --- cálculo ---
+    def _inputs_for(self, g: GameRecord) -> Tuple[Optional[dict], Optional[Dict]]:
+        gid = g.get("game_id")
+        stats_raw = _cache.peek(_api_cache_key("fixtures/statistics", {"fixture": gid}))
+        known, index = odds_store.peek(gid)
+        odds_src = index
+        if not known:
+            odds_src = _cache.peek(_api_cache_key("odds", {"fixture": gid}))
+            index = get_odds_index(odds_src)
+        self._inputs[gid] = {"stats": id(stats_raw), "odds": id(odds_src)}
+        return stats_raw, index
+
+    @staticmethod
+    def _make_entries(g: GameRecord, state: str, enhanced: List[dict]) -> List[Tuple[tuple, dict]]:
+        gid = g.get("game_id")
+        teams = g.get("teams")
+        out = []
+        for p in enhanced:
+            odd = p.get("best_odd")
+            if not odd:
+                continue
+            edge = round(p.get("confidence", 0) * odd - 1, 4)
+            entry = {
+                "game_id": gid,
+                "date": g.get("date"),
+                "league": g.get("league", {}).get("id"),
+                "home": (teams.get("home") or {}).get("name"),
+                "away": (teams.get("away") or {}).get("name"),
+                "state": state,
+                "market": p.get("market"),
+                "recommendation": p.get("recommendation"),
+                "confidence": p.get("confidence"),
+                "best_odd": odd,
+                "bookmaker": p.get("bookmaker"),
+                "edge": edge,
+            }
+            out.append(((-edge, gid, entry["market"], str(entry["recommendation"])), entry))
+        return out
+
+    def _candidates(self, games: Iterable[GameRecord]) -> List[Tuple[GameRecord, str, Optional[dict], Dict]]:
+        """Jogos que entram no ranking: não encerrados e com odds das casas preferidas."""
+        out = []
+        for g in games:
+            state = game_state(g.get("status"))
+            if state == "finished":
+                self._inputs.pop(g.get("game_id"), None)
+                continue
+            stats_raw, index = self._inputs_for(g)
+            if index:
+                out.append((g, state, stats_raw, index))
+        return out
+
+    def _game_entries(self, g: GameRecord) -> List[Tuple[tuple, dict]]:
+        cand = self._candidates([g])
+        if not cand:
+            return []
+        _g, state, stats_raw, index = cand[0]
+        preds, _summary = heuristics_football(g.raw, build_stats_map(stats_raw))
+        return self._make_entries(g, state, enhance_predictions_with_preferred_odds(preds, None, index))
+
+    @timed_stage("value_bets_rebuild")
+    def rebuild(self, snap: FixturesSnapshot):
+        """Ranking do zero (primeiro snapshot ou troca fora da sequência de change sets)."""
+        cands = self._candidates(snap.games)
+        results = heuristics_football_batch([g.raw for g, *_ in cands], [build_stats_map(s) for _g, _st, s, _i in cands])
+        self._entries, self._by_game, self._by_league, self._by_market = {}, {}, {}, {}
+        for (g, state, _stats, index), (preds, _summary) in zip(cands, results):
+            for key, entry in self._make_entries(g, state, enhance_predictions_with_preferred_odds(preds, None, index)):
+                self._entries[key] = entry
+                self._by_game.setdefault(entry["game_id"], []).append(key)
+                self._by_league.setdefault(entry["league"], []).append(key)
+                self._by_market.setdefault(entry["market"], []).append(key)
+        self._rank = sorted(self._entries)
+        for keys in (*self._by_league.values(), *self._by_market.values()):
+            keys.sort()
+        self._inputs = {gid: v for gid, v in self._inputs.items() if gid in snap.games_by_id}
+        self._dirty.clear()
+        self.snap = snap
+        self._stats["rebuilds"] += 1
+
+    def _remove_game(self, gid: int):
+        for key in self._by_game.pop(gid, ()):
+            entry = self._entries.pop(key)
+            del self._rank[bisect.bisect_left(self._rank, key)]
+            for index, name in ((self._by_league, entry["league"]), (self._by_market, entry["market"])):
+                keys = index[name]
+                del keys[bisect.bisect_left(keys, key)]
+                if not keys:
+                    del index[name]
+
+    def _apply(self, gid: int):
+        self._remove_game(gid)
+        g = self.snap.games_by_id.get(gid)
+        if g is None:
+            self._inputs.pop(gid, None)
+            return
+        for key, entry in self._game_entries(g):
+            self._entries[key] = entry
+            self._by_game.setdefault(gid, []).append(key)
+            bisect.insort(self._rank, key)
+            bisect.insort(self._by_league.setdefault(entry["league"], []), key)
+            bisect.insort(self._by_market.setdefault(entry["market"], []), key)
+        self._stats["recomputed"] += 1
+
+    def sync(self, snap: FixturesSnapshot):
+        """Deixa o ranking em dia com o snapshot servido: aplica os jogos marcados ou remonta."""
+        if snap is not self.snap:
+            self.rebuild(snap)
+            return
+        while self._dirty:
+            self._apply(self._dirty.pop())
+
+    # --- consulta ---
+    def top(self, limit: int, league: Optional[int] = None, market: Optional[str] = None,
+            min_edge: float = 0.0) -> List[dict]:
+        self._stats["queries"] += 1
+        lists = []
+        if league is not None:
+            lists.append(self._by_league.get(league, []))
+        if market is not None:
+            lists.append(self._by_market.get(market, []))
+        keys = min(lists, key=len) if lists else self._rank
+        out = []
+        for key in keys:
+            if -key[0] < min_edge or len(out) >= limit:
+                break
+            entry = self._entries[key]
+            if (league is None or entry["league"] == league) and (market is None or entry["market"] == market):
+                out.append(entry)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries), "games": len(self._by_game), "pending": len(self._dirty),
+                "snapshot": self.snap.version if self.snap is not None else None}
+
+value_bets = ValueBetIndex()
+on_snapshot_change(value_bets.on_snapshot)
+on_odds_change(value_bets.on_odds)
+
+GaugeMetric("tipster_value_bets_entries", "Entradas no ranking de value bets", fn=lambda: {(): len(value_bets._entries)})
+
+@app.get("/value-bets")
+async def value_bets_ranking(league: Optional[int] = Query(None), market: Optional[str] = Query(None),
+                             min_edge: float = Query(0.0), limit: int = Query(50, ge=1, le=500)):
+    """Top-N previsões por edge (confidence × best_odd − 1) em todo o snapshot, com filtros."""
+    snap = await get_fixtures_snapshot()
+    value_bets.sync(snap)
+    items = value_bets.top(limit, league, market, min_edge)
+    return {"snapshot": snap.version, "count": len(items), "value_bets": items}
+
+# ------------- Live stream (SSE / WebSocket) -------------
+class LiveSubscriber:
+    __slots__ = ("queue", "league", "game_id")
+
+    def __init__(self, league: Optional[int], game_id: Optional[int]):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_STREAM_QUEUE)
+        self.league = league
+        self.game_id = game_id
+
+    def wants(self, league: Optional[int], game_id: int) -> bool:
+        return (self.league is None or self.league == league) and (self.game_id is None or self.game_id == game_id)
+
+class LiveHub:
+    """
+    Distribui deltas dos jogos ao vivo para os clientes conectados.
+    Alimentado pelo change set de cada refresh do snapshot: um único poll
+    upstream atende todos os clientes. As heurísticas só são recalculadas
+    quando a entrada delas (fixture + build_stats_map) mudou de fato, e cada
+    delta é serializado uma vez para todos os clientes.
+    """
+
+    def __init__(self):
+        self._subscribers: set = set()
+        self._backlog: deque = deque(maxlen=LIVE_STREAM_BACKLOG)
+        self._latest: Dict[int, dict] = {}                 # último delta por jogo ao vivo
+        self._computed: Dict[int, Tuple[str, list, dict]] = {}  # id -> (digest da entrada, preds, summary)
+        self._pending: Dict[int, Optional[dict]] = {}      # id -> jogo normalizado (None = removido)
+        self._task: Optional[asyncio.Task] = None
+        self._seq = 0
+        self.recomputed = 0
+        self.reused = 0
+        self.dropped_clients = 0
+
+    # --- entrada: change set do snapshot ---
+    def on_snapshot(self, prev: FixturesSnapshot, snap: FixturesSnapshot, changes: FixtureChanges):
+        for gid in [*changes.added, *changes.updated, *changes.removed]:
+            g = snap.games_by_id.get(gid)
+            if gid in self._latest or (g is not None and game_state(g.get("status")) == "live"):
+                self._pending[gid] = g
+        self._kick()
+
+    def prime(self, snap: FixturesSnapshot):
+        """Agenda o cálculo dos jogos ao vivo ainda sem delta (ex.: primeiro cliente conectou)."""
+        for gid, g in snap.games_by_id.items():
+            if gid not in self._latest and game_state(g.get("status")) == "live":
+                self._pending.setdefault(gid, g)
+        self._kick()
+
+    def _kick(self):
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            if not self._subscribers:
+                # ninguém ouvindo: não gasta quota, só esquece os jogos que saíram
+                for gid, g in batch.items():
+                    if g is None or game_state(g.get("status")) != "live":
+                        self._forget(gid)
+                continue
+            ids = [gid for gid, g in batch.items() if g is not None]
+            try:
+                with api_priority("live"), deadline(None):
+                    stats = await asyncio.gather(*(fetch_football_statistics(gid) for gid in ids))
+            except Exception:
+                log_event(logging.ERROR, "live_stream_stats_error", games=len(ids), exc_info=True)
+                # devolve o lote (sem sobrescrever versões mais novas que chegaram) e
+                # para: o próximo change set do snapshot tenta de novo
+                for gid, g in batch.items():
+                    self._pending.setdefault(gid, g)
+                return
+            stats_by_id = dict(zip(ids, stats))
+            for gid, g in batch.items():
+                self._publish(self._delta(gid, g, stats_by_id.get(gid)))
+
+    def _forget(self, gid: int):
+        self._latest.pop(gid, None)
+        self._computed.pop(gid, None)
+
+    def _delta(self, gid: int, g: Optional[dict], stats_raw: Optional[dict]) -> dict:
+        if g is None:
+            self._forget(gid)
+            return {"game_id": gid, "removed": True}
+        raw = g.get("raw") or {}
+        stats_map = build_stats_map(stats_raw)
+        key = _digest(dumps_json((raw.get("teams"), raw.get("goals"), raw.get("status"), stats_map)))
+        computed = self._computed.get(gid)
+        recomputed = computed is None or computed[0] != key
+        if recomputed:
+            preds, summary = heuristics_football(raw, stats_map)
+            computed = self._computed[gid] = (key, preds, summary)
+            self.recomputed += 1
+        else:
+            self.reused += 1
+        state = game_state(g.get("status"))
+        delta = {
+            "game_id": gid,
+            "league": (g.get("league") or {}).get("id"),
+            "state": state,
+            "status": g.get("status"),
+            "score": raw.get("goals"),
+            "summary": computed[2],
+            "predictions": computed[1],
+            "recomputed": recomputed,
+        }
+        if state == "live":
+            self._latest[gid] = delta
+        else:
+            # encerrado: último delta vai para os clientes e o jogo sai do stream
+            self._forget(gid)
+        return delta
+
+    # --- saída: clientes ---
+    def _publish(self, delta: dict):
+        self._seq += 1
+        data = dumps_json(delta)
+        msg = (self._seq, delta.get("league"), delta["game_id"], data,
+               b"id: %d\nevent: delta\ndata: %s\n\n" % (self._seq, data))
+        self._backlog.append(msg)
+        for sub in list(self._subscribers):
+            if sub.wants(msg[1], msg[2]):
+                try:
+                    sub.queue.put_nowait(msg)
+                except asyncio.QueueFull:
+                    self._drop(sub)
+
+    def _drop(self, sub: LiveSubscriber):
+        # cliente lento: encerra o stream (reconecta com Last-Event-ID)
+        self._subscribers.discard(sub)
+        self.dropped_clients += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def subscribe(self, league: Optional[int], game_id: Optional[int]) -> LiveSubscriber:
+        sub = LiveSubscriber(league, game_id)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: LiveSubscriber):
+        self._subscribers.discard(sub)
+
+    def current(self, sub: LiveSubscriber) -> List[dict]:
+        return [d for d in self._latest.values() if sub.wants(d.get("league"), d["game_id"])]
+
+    def replay(self, sub: LiveSubscriber, last_id: int) -> Optional[list]:
+        """Mensagens após `last_id` ainda no histórico, ou None se o histórico não cobre mais."""
+        if not self._backlog or self._backlog[0][0] > last_id + 1:
+            return None
+        return [m for m in self._backlog if m[0] > last_id and sub.wants(m[1], m[2])]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"clients": len(self._subscribers), "live_games": len(self._latest), "seq": self._seq,
+                "recomputed": self.recomputed, "reused": self.reused, "dropped_clients": self.dropped_clients}
+
+live_hub = LiveHub()
+on_snapshot_change(live_hub.on_snapshot)
+
+GaugeMetric("tipster_live_stream_clients", "Clientes conectados ao stream ao vivo", fn=lambda: {(): len(live_hub._subscribers)})
+
+async def _open_live_subscription(league: Optional[int], game_id: Optional[int]) -> LiveSubscriber:
+    sub = live_hub.subscribe(league, game_id)
+    live_hub.prime(await get_fixtures_snapshot())
+    return sub
+
+@app.get("/live/stream")
+async def live_stream(request: Request, league: Optional[int] = Query(None), game_id: Optional[int] = Query(None)):
+    """
+    Server-Sent Events com os deltas dos jogos ao vivo (placar, status, predictions, summary).
+    Primeiro evento: "snapshot" com o estado atual; depois um "delta" por jogo alterado.
+    """
+    sub = await _open_live_subscription(league, game_id)
+    last_id = request.headers.get("last-event-id")
+    backlog = live_hub.replay(sub, int(last_id)) if last_id and last_id.isdigit() else None
+
+    async def events():
+        try:
+            if backlog is not None:
+                for msg in backlog:
+                    yield msg[4]
+            else:
+                yield b"event: snapshot\ndata: %s\n\n" % dumps_json(live_hub.current(sub))
+            while True:
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), LIVE_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                if msg is None:
+                    break
+                yield msg[4]
+        finally:
+            live_hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/live/ws")
+async def live_ws(websocket: WebSocket, league: Optional[int] = None, game_id: Optional[int] = None):
+    """Mesmo conteúdo do /live/stream via WebSocket (mensagens {"type": "snapshot" | "delta", ...})."""
+    await websocket.accept()
+    sub = await _open_live_subscription(league, game_id)
+    try:
+        await websocket.send_text(dumps_json({"type": "snapshot", "games": live_hub.current(sub)}).decode())
+        while True:
+            try:
+                msg = await asyncio.wait_for(sub.queue.get(), LIVE_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                await websocket.send_text('{"type":"keepalive"}')
+                continue
+            if msg is None:
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text('{"type":"delta","seq":%d,"data":%s}' % (msg[0], msg[3].decode()))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        live_hub.unsubscribe(sub)
 
 # ------------- Health endpoint -------------
 @app.get("/health")
 def health():
     return {"status": "ok", "utc": datetime.utcnow().isoformat()}
 
+@app.get("/metrics")
+def metrics():
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats")
+def stats():
+    return {"cache": _cache.stats(), "singleflight": singleflight_stats(), "scheduler": scheduler.stats(),
+            "fixture_batch": fixture_batcher.stats(), "quota": quota.stats(), "live_stream": live_hub.stats(),
+            "circuit_breakers": breaker_stats(), "odds_store": odds_store.stats(), "value_bets": value_bets.stats(),
+            "profiles": profiles.stats(),
+            "persistent_cache": persistent_store.stats() if persistent_store is not None else None}
+
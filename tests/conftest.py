@@ -0,0 +1,87 @@
+# conftest.py - o app é um módulo solto na raiz do repositório
+import asyncio, os, sys
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+
+import sports_betting_analyzer as m  # noqa: E402
+
+def day(offset: int = 0) -> str:
+    return (datetime.utcnow().date() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+def make_fixture(fid: int, league: int = 10, country: str = "Brazil", date: str = None, hour: int = 12,
+                 short: str = "NS", elapsed=None, goals=(None, None)) -> dict:
+    """Fixture no formato da API-Sports (status também no topo, como o heuristics_football lê)."""
+    status = {"long": short, "short": short, "elapsed": elapsed}
+    return {"fixture": {"id": fid, "date": f"{date or day()}T{hour:02d}:00:00+00:00", "status": status},
+            "status": status,
+            "league": {"id": league, "name": f"Liga {league}", "country": country},
+            "teams": {"home": {"id": fid * 10 + 1, "name": f"Casa {fid}"}, "away": {"id": fid * 10 + 2, "name": f"Fora {fid}"}},
+            "goals": {"home": goals[0], "away": goals[1]}}
+
+class FakeUpstream:
+    """
+    API-Sports falsa atrás do cliente httpx do app (httpx.MockTransport): `routes`
+    path -> fn(params) -> lista "response"; path sem rota (ou `down`) responde 500;
+    `delays` path -> segundos simula upstream travado.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = Counter()
+        self.delays: Dict[str, float] = {}
+        self.down = False
+
+    def serve_fixtures(self, games: List[dict]):
+        """fixtures?date= com os jogos da data; live=all vazio (o estado vem do status)."""
+        by_date: Dict[str, List[dict]] = {}
+        for g in games:
+            by_date.setdefault(g["fixture"]["date"][:10], []).append(g)
+        self.routes["fixtures"] = lambda p: by_date.get(p.get("date"), []) if "date" in p else []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.strip("/")
+        self.calls[path] += 1
+        if self.delays.get(path):
+            await asyncio.sleep(self.delays[path])
+        fn = self.routes.get(path)
+        if self.down or fn is None:
+            return httpx.Response(500, json={"errors": "down"})
+        return httpx.Response(200, json={"response": fn(dict(request.url.params)), "paging": {"current": 1, "total": 1}})
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    """Estado global do módulo zerado: cache, fontes do snapshot, breakers, single-flight, stores."""
+    monkeypatch.setattr(m, "_cache", m.BoundedCache(m.CACHE_MAX_ENTRIES, m.CACHE_MAX_BYTES, m.CACHE_TTLS, m.CACHE_TTL, m.CACHE_STALE_TTL))
+    monkeypatch.setattr(m, "_fixture_sources", {})
+    monkeypatch.setattr(m, "_sources_locks", {})
+    monkeypatch.setattr(m, "_breakers", {})
+    monkeypatch.setattr(m, "_inflight", {})
+    monkeypatch.setattr(m, "QUOTA_ENABLED", False)
+    monkeypatch.setattr(m, "FIXTURE_BATCH_ENABLED", False)
+    # listeners registrados apontam para estas instâncias: zera no lugar
+    m.odds_store.__init__()
+    m.value_bets.__init__()
+    m.live_hub.__init__()
+    yield
+    m.odds_store.__init__()
+    m.value_bets.__init__()
+    m.live_hub.__init__()
+
+@pytest.fixture
+def upstream(fresh_state, monkeypatch):
+    fake = FakeUpstream()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle), base_url=m.API_URL_BASE)
+    monkeypatch.setattr(m, "get_http_client", lambda: client)
+    return fake
+
+def app_client() -> httpx.AsyncClient:
+    """Cliente ASGI do app (sem lifespan: nada de scheduler)."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=m.app), base_url="http://test")
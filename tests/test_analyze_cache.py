@@ -0,0 +1,53 @@
+# test_analyze_cache.py - TTL do resultado do /analyze pelo status e invalidação por snapshot/odds
+import asyncio
+import math
+
+import sports_betting_analyzer as m
+from conftest import app_client, make_fixture
+
+def _odds_item(fid: int, home: str) -> dict:
+    values = [{"value": "Home", "odd": home}, {"value": "Away", "odd": "3.10"}]
+    return {"fixture": {"id": fid}, "bookmakers": [{"name": "Bet365", "bets": [{"name": "Match Winner", "values": values}]}]}
+
+def test_status_and_odds_changes_evict_cached_analysis(upstream):
+    games = {1: make_fixture(1), 2: make_fixture(2, short="1H", elapsed=30), 3: make_fixture(3, short="FT", elapsed=90, goals=(2, 0))}
+    odds = {1: "1.80", 2: "2.00", 3: "1.50"}
+
+    def fixtures(p):
+        if "id" in p:
+            return [games[int(p["id"])]]
+        return [g for g in games.values() if g["fixture"]["date"][:10] == p.get("date")]
+
+    upstream.routes["fixtures"] = fixtures
+    upstream.routes["fixtures/statistics"] = lambda p: []
+    upstream.routes["odds"] = lambda p: [_odds_item(fid, odd) for fid, odd in odds.items()]
+    keys = {gid: m._analyze_key(gid) for gid in games}
+
+    async def analyze_all(c):
+        for gid in games:
+            assert (await c.get("/analyze", params={"game_id": gid})).status_code == 200
+
+    async def main():
+        await m.refresh_fixtures_snapshot()
+        await m.refresh_odds_store()
+        async with app_client() as c:
+            await analyze_all(c)
+            # TTL pelo estado do jogo; encerrado não vence
+            assert [m._cache._data[keys[g]][3] for g in games] == [m.ANALYZE_TTL_SCHEDULED, m.ANALYZE_TTL_LIVE, math.inf]
+            ts, size, data, ttl = m._cache._data[keys[3]]
+            m._cache._data[keys[3]] = (ts - 10 ** 7, size, data, ttl)
+            assert m._cache_get(keys[3]) is data
+
+            # refresh: jogo 1 começou (status), jogo 2 só andou o minuto
+            games[1] = make_fixture(1, short="1H", elapsed=1)
+            games[2] = make_fixture(2, short="1H", elapsed=31)
+            await m.refresh_fixtures_snapshot()
+            assert [keys[g] in m._cache._data for g in games] == [False, True, True]
+
+            # varredura: só as odds do jogo 3 mudaram
+            await analyze_all(c)
+            odds[3] = "1.55"
+            await m.refresh_odds_store()
+            assert [keys[g] in m._cache._data for g in games] == [True, True, False]
+
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+# test_backtest.py - backtest.predict escolhe as mesmas seleções/confianças do heuristics_football_batch
+import numpy as np
+
+import backtest as bt
+import sports_betting_analyzer as m
+
+# coluna do arquivo (sem o prefixo h_/a_) -> nome da estatística na API
+STAT_KEYS = {"shots": "Total Shots", "sot": "Shots on Goal", "corners": "Corner Kicks", "pos": "Ball Possession",
+             "fouls": "Fouls", "attacks": "Attacks", "danger": "Dangerous Attacks", "corners_ht": "Corners 1st Half",
+             "yellow": "Yellow Cards"}
+
+def test_predict_matches_batch_heuristics():
+    n = 3000
+    rng = np.random.default_rng(3)
+    cols = bt.synth(n, seed=5)
+    for name in bt.STAT_COLUMNS:
+        if not name.endswith("_pos"):
+            cols[name][:] = rng.integers(0, 30, n)
+    elapsed = cols["elapsed"].astype(np.int64)
+    assert (elapsed == 0).any() and (elapsed > 0).any()
+    preds = bt.predict({k: cols[k].astype(np.int64) for k in bt.STAT_COLUMNS}, elapsed)
+
+    fixtures, stats_maps = [], []
+    for i in range(n):
+        stats_maps.append({tid: {api: int(cols[f"{side}_{f}"][i]) for f, api in STAT_KEYS.items()}
+                           for tid, side in ((1, "h"), (2, "a"))})
+        fixtures.append({"teams": {"home": {"id": 1, "name": "Casa FC"}, "away": {"id": 2, "name": "Fora FC"}},
+                         "goals": {"home": int(cols["h_goals"][i]), "away": int(cols["a_goals"][i])},
+                         "status": {"elapsed": int(elapsed[i]) or None}})
+
+    for i, (picks, _summary) in enumerate(m.heuristics_football_batch(fixtures, stats_maps)):
+        expected = {}
+        for p in picks:
+            if p["market"] == "moneyline" and p["recommendation"] == "Sem favorito definido":
+                continue  # sem aposta no backtest
+            expected.setdefault(p["market"], (p["recommendation"], p["confidence"]))
+        got = {market: (bt.SELECTIONS[market][code[i]].format(home="Casa FC", away="Fora FC"), round(float(conf[i]), 2))
+               for market, (code, conf) in preds.items() if code[i] >= 0}
+        assert got == expected, i
@@ -0,0 +1,56 @@
+# test_batch_parity.py - heuristics_football_batch (NumPy) == heuristics_football, jogo a jogo
+import random
+
+import sports_betting_analyzer as m
+
+STAT_TYPES = ["Total Shots", "Shots", "Shots on Goal", "Shots on Target", "Corners", "Corner Kicks",
+              "Corner Kicks 1H", "Ball Possession", "Possession", "Fouls", "Attacks", "Dangerous Attacks",
+              "Yellow Cards", "Red Cards", "Passes %"]
+
+def _value(rng: random.Random):
+    # formatos que a API devolve (e alguns quebrados): int, "55%", "12/20", None, string numérica
+    return rng.choice([rng.randint(0, 25), rng.randint(0, 25), rng.randint(0, 25), f"{rng.randint(20, 80)}%",
+                       f"{rng.randint(0, 15)}/{rng.randint(15, 30)}", None, str(rng.randint(0, 25)), "4.0", "x"])
+
+def _stats_payload(rng: random.Random, home_id: int, away_id: int):
+    kind = rng.random()
+    if kind < 0.05:
+        return None  # stats indisponíveis
+    if kind < 0.1:
+        return {"response": []}  # jogo sem stats ainda (pré-jogo)
+    teams = [home_id, away_id] if rng.random() < 0.9 else [home_id]  # às vezes só um time
+    return {"response": [{"team": {"id": tid},
+                          "statistics": [{"type": t, "value": _value(rng)} for t in rng.sample(STAT_TYPES, rng.randint(0, len(STAT_TYPES)))]}
+                         for tid in teams]}
+
+def _fixture(rng: random.Random, i: int) -> dict:
+    home_id, away_id = 2 * i + 1, 2 * i + 2
+    status = rng.choice([{"short": "NS", "elapsed": None}, {"short": "1H", "elapsed": rng.randint(1, 45)},
+                         {"short": "2H", "elapsed": rng.randint(46, 90)}, {"short": "FT", "elapsed": 90}])
+    fixture = {"fixture": {"id": i, "status": status},
+               "teams": {"home": {"id": home_id, "name": f"H{i}"}, "away": {"id": away_id, "name": f"A{i}"}},
+               "goals": {"home": rng.choice([None, 0, 1, 2, 3, "1"]), "away": rng.choice([None, 0, 1, 2])}}
+    if rng.random() < 0.7:
+        fixture["status"] = status  # heuristics_football lê o status no topo do payload
+    return fixture
+
+def test_batch_matches_scalar_on_randomized_fixtures():
+    rng = random.Random(20240917)
+    fixtures, stats_maps = [], []
+    for i in range(3000):
+        f = _fixture(rng, i)
+        fixtures.append(f)
+        stats_maps.append(m.build_stats_map(_stats_payload(rng, f["teams"]["home"]["id"], f["teams"]["away"]["id"])))
+    assert any(not s for s in stats_maps)  # inclui linhas de fallback (sem stats)
+
+    batch = m.heuristics_football_batch(fixtures, stats_maps)
+    assert len(batch) == len(fixtures)
+    for f, s, (preds, summary) in zip(fixtures, stats_maps, batch):
+        exp_preds, exp_summary = m.heuristics_football(f, s)
+        assert [(p["market"], p["recommendation"], p["confidence"]) for p in preds] == \
+               [(p["market"], p["recommendation"], p["confidence"]) for p in exp_preds]
+        assert preds == exp_preds
+        assert summary == exp_summary
+
+def test_batch_empty():
+    assert m.heuristics_football_batch([], []) == []
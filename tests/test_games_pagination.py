@@ -0,0 +1,97 @@
+# test_games_pagination.py - /games paginado por cursor x a lista completa filtrada
+import asyncio
+import random
+
+import sports_betting_analyzer as m
+from conftest import app_client, day, make_fixture
+
+STATUSES = [("NS", None), ("1H", 30), ("FT", 90)]
+COUNTRIES = {10: "Brazil", 11: "Brazil", 20: "Spain", 21: "Spain", 30: "Italy"}
+
+def _games(n: int = 150) -> list:
+    rnd = random.Random(7)
+    out = []
+    for fid in range(1, n + 1):
+        league = rnd.choice(list(COUNTRIES))
+        short, elapsed = rnd.choice(STATUSES)
+        # horários repetidos: a ordem de desempate é pelo id
+        out.append(make_fixture(fid, league=league, country=COUNTRIES[league], date=day(rnd.randint(0, m.SNAPSHOT_DAYS_FORWARD)),
+                                hour=rnd.choice([12, 15, 18]), short=short, elapsed=elapsed))
+    return out
+
+def _expected(snap, leagues, country, states, date_from, date_to) -> list:
+    out = []
+    for g in snap.games:
+        lg = g.get("league")
+        d = g.get("date") or ""
+        if leagues and lg.get("id") not in leagues:
+            continue
+        if country and lg.get("country") != country:
+            continue
+        if states and m.game_state(g.get("status")) not in states:
+            continue
+        if (date_from and d < date_from) or (date_to and d[:len(date_to)] > date_to):
+            continue
+        out.append(g.get("game_id"))
+    return out
+
+async def _walk(c, query: dict) -> list:
+    got, cursor = [], None
+    while True:
+        r = await c.get("/games", params={**query, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert len(body["games"]) <= query["limit"]
+        # cursor só quando a página veio cheia e ainda há jogos
+        assert body["next_cursor"] is None or len(body["games"]) == query["limit"]
+        got += [g["game_id"] for g in body["games"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return got
+
+def test_pages_match_filtered_full_list(upstream):
+    upstream.serve_fixtures(_games())
+    dates = m._window_dates(m.SNAPSHOT_DAYS_FORWARD)
+    cases = [
+        {},
+        {"leagues": [10, 20, 30]},
+        {"leagues": [10, 20], "country": "Brazil"},
+        {"country": "Spain", "states": ["live", "finished"]},
+        {"states": ["scheduled"], "date_from": dates[1]},
+        {"leagues": [11, 21], "states": ["scheduled", "live"], "date_to": dates[0]},
+        {"date_from": dates[0] + "T15:00", "date_to": dates[-1]},
+        {"leagues": [99]},
+    ]
+
+    async def main():
+        snap = await m.get_fixtures_snapshot()
+        async with app_client() as c:
+            for case in cases:
+                query = {"fields": "game_id"}
+                if case.get("leagues"):
+                    query["leagues"] = ",".join(map(str, case["leagues"]))
+                if case.get("states"):
+                    query["status"] = ",".join(case["states"])
+                query.update({k: case[k] for k in ("country", "date_from", "date_to") if k in case})
+                expected = _expected(snap, case.get("leagues"), case.get("country"), case.get("states"),
+                                     case.get("date_from"), case.get("date_to"))
+                for limit in (1, 7, 37, 500):
+                    assert await _walk(c, {**query, "limit": limit}) == expected, (case, limit)
+            # página exata: o fim da lista não gera cursor extra
+            n = len(snap.games)
+            last = (await c.get("/games", params={"limit": n, "fields": "game_id"})).json()
+            assert len(last["games"]) == n and last["next_cursor"] is None
+
+    asyncio.run(main())
+
+def test_bad_cursor_and_status_are_400(upstream):
+    upstream.serve_fixtures(_games(10))
+
+    async def main():
+        async with app_client() as c:
+            return [(await c.get("/games", params=q)).status_code for q in (
+                {"status": "live,foo"}, {"cursor": "zzz"}, {"cursor": m._encode_cursor(("2025-01-01", "x"))},
+                {"leagues": "10,abc"}, {"limit": 2},
+            )]
+
+    assert asyncio.run(main()) == [400, 400, 400, 400, 200]
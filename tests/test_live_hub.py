@@ -0,0 +1,36 @@
+# test_live_hub.py - stream ao vivo: lote cujas estatísticas falharam volta para a fila
+import asyncio
+
+import sports_betting_analyzer as m
+from conftest import make_fixture
+
+def test_failed_stats_batch_is_retried(fresh_state, monkeypatch):
+    calls = []
+    hub = m.LiveHub()
+    old = m.normalize_game(make_fixture(1, short="1H", elapsed=10))
+    new = m.normalize_game(make_fixture(1, short="1H", elapsed=11, goals=(1, 0)))
+
+    async def flaky_stats(fixture_id):
+        calls.append(fixture_id)
+        if len(calls) == 1:
+            # versão mais nova do jogo chega enquanto a busca falha: ela vence
+            hub._pending[1] = new
+            raise RuntimeError("upstream")
+        return {"response": []}
+
+    monkeypatch.setattr(m, "fetch_football_statistics", flaky_stats)
+
+    async def main():
+        sub = hub.subscribe(None, None)
+        hub._pending = {1: old}
+        hub._kick()
+        await hub._task
+        assert sub.queue.empty() and hub._pending == {1: new}
+        hub._kick()
+        await hub._task
+        _seq, _league, gid, data, _sse = sub.queue.get_nowait()
+        return gid, m.orjson.loads(data), hub._pending
+
+    gid, delta, pending = asyncio.run(main())
+    assert gid == 1 and delta["score"] == {"home": 1, "away": 0}
+    assert pending == {} and calls == [1, 1]
@@ -0,0 +1,125 @@
+# test_odds_parity.py - compile_odds_index + enhance == varredura casa a casa original (antes do índice)
+import random
+
+import sports_betting_analyzer as m
+from test_batch_parity import _fixture, _stats_payload
+
+def _baseline_enhance(predictions, odds_raw):
+    """enhance_predictions_with_preferred_odds original: varre casa a casa, nome a nome."""
+    if not odds_raw or not odds_raw.get("response"):
+        return predictions
+    try:
+        bookmakers = odds_raw["response"][0].get("bookmakers", []) or []
+    except Exception:
+        bookmakers = []
+    preferred_books = [b for b in bookmakers if any(pref in (b.get("name") or "").lower() for pref in m.PREFERRED_BOOKMAKERS)]
+    if not preferred_books:
+        return predictions
+
+    def conv_contains(rec: str, *opts):
+        if not rec:
+            return None
+        r = str(rec).lower()
+        for o in opts:
+            if o.lower() in r:
+                return True
+        return False
+
+    market_map = {
+        "moneyline": {
+            "names": ["Match Winner", "Match Result", "1X2"],
+            "convert": lambda rec: ("Home" if conv_contains(rec, "casa", "home", "vitória casa", "1") else ("Away" if conv_contains(rec, "fora", "away", "vitória visitante", "2") else None))
+        },
+        "dnb": {
+            "names": ["Draw No Bet", "Draw No Bet FT", "DNB"],
+            "convert": lambda rec: ("Home" if conv_contains(rec, "casa", "home") else ("Away" if conv_contains(rec, "fora", "away") else None))
+        },
+        "double_chance": {
+            "names": ["Double Chance"],
+            "convert": lambda rec: ("Home/Draw" if conv_contains(rec, "casa") or conv_contains(rec, "home") or "casa ou empate" in str(rec).lower() else ("Away/Draw" if conv_contains(rec, "fora") or conv_contains(rec, "away") or "fora ou empate" in str(rec).lower() else None))
+        },
+        "over_2_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 2.5" if "over" in str(rec).lower() or "over 2.5" in str(rec).lower() or "over2.5" in str(rec).lower() else ("Under 2.5" if "under" in str(rec).lower() else None))},
+        "over_1_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 1.5" if "over 1.5" in str(rec).lower() or "over" in str(rec).lower() and "1.5" in str(rec) else ("Under 1.5" if "under" in str(rec).lower() else None))},
+        "over_3_5": {"names": ["Goals Over/Under", "Over/Under"], "convert": lambda rec: ("Over 3.5" if "over" in str(rec).lower() and "3.5" in str(rec) else ("Under 3.5" if "under" in str(rec).lower() else None))},
+        "over_2_5_ht": {"names": ["Half-time Goals Over/Under", "Goals Over/Under - 1st Half"], "convert": lambda rec: ("Over 1.0" if "over" in str(rec).lower() else ("Under 1.0" if "under" in str(rec).lower() else None))},
+        "btts": {"names": ["Both Teams To Score", "Both Teams To Score?"], "convert": lambda rec: ("Yes" if conv_contains(rec, "sim", "yes") else ("No" if conv_contains(rec, "não", "nao", "no") else None))},
+        "asian_handicap_home": {"names": ["Asian Handicap", "Asian Handicap Match"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
+        "asian_handicap_away": {"names": ["Asian Handicap", "Asian Handicap Match"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
+        "handicap_european": {"names": ["European Handicap", "Handicap"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
+        "ht_ft": {"names": ["Half Time / Full Time", "HT/FT"], "convert": lambda rec: rec},
+        "corners_ft_over": {"names": ["Corners Over/Under", "Corners Total"], "convert": lambda rec: ("Over 9.5" if "over" in str(rec).lower() and "9.5" in str(rec) else ("Under 9.5" if "under" in str(rec).lower() else None))},
+        "corners_ft_under": {"names": ["Corners Over/Under", "Corners Total"], "convert": lambda rec: ("Under 9.5" if "under" in str(rec).lower() and "9.5" in str(rec) else ("Over 9.5" if "over" in str(rec).lower() else None))},
+        "corners_ht_over": {"names": ["1st Half Corners", "Corners Over/Under - 1st Half"], "convert": lambda rec: ("Over 4.5" if "over" in str(rec).lower() and "4.5" in str(rec) else None)},
+        "corners_asian_ft": {"names": ["Asian Corners", "Corners Asian Handicap"], "convert": lambda rec: (str(rec).split()[-1] if "-" in str(rec) else None)},
+        "cards_over": {"names": ["Cards Over/Under", "Total Cards"], "convert": lambda rec: ("Over 3.5" if "over" in str(rec).lower() else ("Under 3.5" if "under" in str(rec).lower() else None))}
+    }
+
+    enhanced = []
+    for pred in predictions:
+        mapping = market_map.get(pred.get("market"))
+        try:
+            api_val = mapping["convert"](pred.get("recommendation")) if mapping else None
+        except Exception:
+            api_val = None
+        if not api_val:
+            enhanced.append(pred)
+            continue
+        best_odd, best_book, best_market_name = 0.0, None, None
+        for book in preferred_books:
+            book_map = m.build_book_odds_map(book)
+            for name in mapping.get("names", []):
+                odd = book_map.get((name, api_val), 0.0)
+                if odd and odd > best_odd:
+                    best_odd, best_book, best_market_name = odd, book.get("name"), name
+        if best_odd > 0:
+            p = dict(pred)
+            p["best_odd"], p["bookmaker"], p["market_name_found"] = best_odd, best_book, best_market_name
+            enhanced.append(p)
+        else:
+            enhanced.append(pred)
+    seen, deduped = set(), []
+    for p in enhanced:
+        key = (p.get("market"), p.get("recommendation"))
+        if key not in seen:
+            deduped.append(p)
+            seen.add(key)
+    deduped.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+    return deduped
+
+BOOKS = ["Bet365", "Betano", "Superbet", "Pinnacle", "bet365 Live", "1xBet", "Unibet", None]
+VALUES = ["Home", "Away", "Draw", "Home/Draw", "Away/Draw", "Home/Away", "Over 1.0", "Under 1.0", "Over 1.5", "Under 1.5",
+          "Over 2.5", "Under 2.5", "Over 3.5", "Under 3.5", "Over 4.5", "Over 9.5", "Under 9.5", "Yes", "No", "-1.5", "+1.5",
+          "Home/Home", 1, None]
+ODDS = ["1.50", "1.80", "2.00", "2.00", "1,95", "3.4", 2.25, "0", "", None, "x"]
+
+def _odds_payload(rng: random.Random, names):
+    kind = rng.random()
+    if kind < 0.05:
+        return None
+    if kind < 0.1:
+        return {"response": []}
+    books = []
+    for book in rng.sample(BOOKS, rng.randint(0, 5)):
+        # nomes repetidos na mesma casa e odds empatadas entre casas exercitam a regra de desempate
+        bets = [{"name": rng.choice(names), "values": [{"value": rng.choice(VALUES), "odd": rng.choice(ODDS)}
+                                                        for _ in range(rng.randint(0, 6))]}
+                for _ in range(rng.randint(0, 12))]
+        books.append({"name": book, "bets": bets})
+    return {"response": [{"fixture": {"id": 1}, "bookmakers": books}]}
+
+def test_index_enhance_matches_bookmaker_scan():
+    rng = random.Random(6)
+    names = sorted({name for api_names, _convert in m.ODDS_MARKETS.values() for name in api_names})
+    names += ["Corners 1x2", "Goals Odd/Even"]  # mercados que nenhuma previsão usa
+    with_odds = 0
+    for i in range(1500):
+        f = _fixture(rng, i)
+        preds, _summary = m.heuristics_football(f, m.build_stats_map(_stats_payload(rng, 2 * i + 1, 2 * i + 2)))
+        odds_raw = _odds_payload(rng, names)
+        expected = _baseline_enhance(preds, odds_raw)
+        assert m.enhance_predictions_with_preferred_odds(preds, odds_raw) == expected
+        # mesmo índice vindo do odds_store (strings internadas)
+        index = m._intern_odds_index(m.compile_odds_index(odds_raw))
+        assert m.enhance_predictions_with_preferred_odds(preds, None, index) == (expected if index is not None else preds)
+        with_odds += any("best_odd" in p for p in expected)
+    assert with_odds > 300
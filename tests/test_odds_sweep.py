@@ -0,0 +1,47 @@
+# test_odds_sweep.py - varredura de odds em lote: lease, índice compartilhado e cadência por data
+import asyncio
+
+import sports_betting_analyzer as m
+
+def _odds_item(fid: int, home: float) -> dict:
+    values = [{"value": "Home", "odd": f"{home:.2f}"}, {"value": "Away", "odd": "3.10"}]
+    return {"fixture": {"id": fid}, "bookmakers": [{"name": "Bet365", "bets": [{"name": "Match Winner", "values": values}]}]}
+
+def test_sweep_lease_shares_index_and_spaces_future_dates(upstream, tmp_path, monkeypatch):
+    store = m.SQLiteCacheStore(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(m, "persistent_store", store)
+    days = m.SNAPSHOT_DAYS_FORWARD
+    dates = m._window_dates(days)
+    ids = {d: [100 * (i + 1) + k for k in range(3)] for i, d in enumerate(dates)}
+    m._fixture_sources[days] = {"sources": {d: {fid: b"{}" for fid in ids[d]} for d in dates}, "by_id": {}, "snap": None}
+    upstream.routes["odds"] = lambda p: [_odds_item(fid, 1.5 + fid % 10 / 10) for fid in ids[p["date"]]]
+
+    async def run(worker: str) -> bool:
+        monkeypatch.setattr(m, "WORKER_ID", worker)
+        ok = await m.refresh_odds_store(days)
+        await asyncio.gather(*list(m._background_tasks))
+        return ok
+
+    async def main():
+        # worker com a lease varre todas as datas
+        assert await run("a")
+        assert upstream.calls["odds"] == len(dates)
+        swept = dict(m.odds_store._entries)
+        assert len(swept) == 3 * len(dates) and all(index for _ts, index in swept.values())
+        # na rodada seguinte só hoje é varrido de novo
+        assert await run("a")
+        assert upstream.calls["odds"] == len(dates) + 1
+        assert m.odds_store.stats()["sweeps"] == 2
+        swept = dict(m.odds_store._entries)
+        # outro worker não chama a API: carrega o índice gravado, com a mesma idade
+        m.odds_store.__init__()
+        assert await run("b")
+        assert upstream.calls["odds"] == len(dates) + 1
+        assert m.odds_store._entries == swept
+        assert m.odds_store.stats()["sweeps"] == 0
+        assert m.odds_store.get(ids[dates[0]][0]) == (True, swept[ids[dates[0]][0]][1])
+
+    try:
+        asyncio.run(main())
+    finally:
+        store.close()
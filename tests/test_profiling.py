@@ -0,0 +1,77 @@
+# test_profiling.py - rotas de admin dos profiles só com PROFILE_TOKEN; captura pelo middleware
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import sports_betting_analyzer as m
+
+def test_admin_profiles_forbidden_without_token(monkeypatch):
+    monkeypatch.setattr(m, "PROFILE_TOKEN", "")
+    monkeypatch.setattr(m, "PROFILE_ENABLED", True)
+    client = TestClient(m.app)
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles/1", headers={"X-Profile-Token": ""}).status_code == 403
+
+def test_admin_profiles_require_matching_token(monkeypatch):
+    monkeypatch.setattr(m, "PROFILE_TOKEN", "s3cret")
+    client = TestClient(m.app)
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": "x"}).status_code == 403
+    r = client.get("/admin/profiles", headers={"X-Profile-Token": "s3cret"})
+    assert r.status_code == 200 and r.json()["profiles"] == []
+    assert client.get("/admin/profiles/999", headers={"X-Profile-Token": "s3cret"}).status_code == 404
+
+def _busy(seconds: float) -> int:
+    n, end = 0, time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+async def _child_work() -> int:
+    return _busy(0.03)
+
+def _profiled_app():
+    inner = FastAPI()
+
+    @inner.get("/work")
+    async def work():
+        # trabalho na task da requisição e numa task filha (vista pela task factory)
+        _busy(0.03)
+        return {"n": await asyncio.ensure_future(_child_work())}
+
+    return m.ProfilingMiddleware(inner)
+
+def test_middleware_captures_profile_and_restores_task_factory(monkeypatch):
+    monkeypatch.setattr(m, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(m, "PROFILE_ENABLED", False)
+    monkeypatch.setattr(m, "profiles", m.ProfileStore())
+    created = []
+
+    def factory(loop, coro, **kwargs):
+        created.append(coro)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(factory)
+        transport = httpx.ASGITransport(app=_profiled_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            plain = await c.get("/work")
+            wrong = await c.get("/work", headers={"X-Profile": "x"})
+            profiled = await c.get("/work", headers={"X-Profile": "s3cret"})
+        return plain, wrong, profiled, loop.get_task_factory()
+
+    plain, wrong, profiled, factory_after = asyncio.run(main())
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in wrong.headers
+    assert profiled.status_code == 200
+    profile = m.profiles.get(int(profiled.headers["x-profile-id"]))
+    assert profile["status"] == 200 and profile["trigger"] == "header" and profile["path"] == "/work"
+    assert profile["samples"] > 0 and sum(profile["stacks"].values()) == profile["samples"]
+    stacks = "\n".join(profile["stacks"])
+    assert "_busy" in stacks and "_child_work" in stacks
+    # factory anterior volta ao fim do profile (e foi encadeada durante ele)
+    assert factory_after is factory and m.profiles.active == 0
+    assert any(getattr(c, "__name__", "") == "_child_work" for c in created)
@@ -0,0 +1,24 @@
+# test_quota.py - ressincronização dos buckets com os headers de cota da API
+import sports_betting_analyzer as m
+
+def test_sync_raises_day_bucket_to_larger_upstream_limit():
+    quota = m.QuotaScheduler(300, 7500)
+    quota.observe({"x-ratelimit-requests-limit": "75000", "x-ratelimit-requests-remaining": "74990"}, 200)
+    assert quota.day.capacity == 75000
+    assert quota.day.available() >= 74990 - 1
+    assert not quota._should_shed("prefetch")
+    assert not quota._should_shed("user")
+
+def test_sync_lowers_day_bucket_to_smaller_upstream_limit():
+    quota = m.QuotaScheduler(300, 7500)
+    quota.observe({"x-ratelimit-requests-limit": "100", "x-ratelimit-requests-remaining": "40"}, 200)
+    assert quota.day.capacity == 100
+    assert 40 <= quota.day.available() < 41
+    quota.observe({"x-ratelimit-requests-limit": "100", "x-ratelimit-requests-remaining": "2"}, 200)
+    assert quota.day.available() < 3
+    assert quota._should_shed("prefetch")
+
+def test_sync_never_exceeds_capacity():
+    bucket = m.TokenBucket(100, 60)
+    bucket.sync(None, "500")
+    assert bucket.available() == 100
@@ -0,0 +1,118 @@
+# test_resilience.py - circuit breaker, prazos e dados vencidos com a API fora do ar
+import asyncio
+import time
+
+import sports_betting_analyzer as m
+from conftest import app_client, day, make_fixture
+from sports_betting_analyzer import safe_int
+
+def _age(key: str, seconds: float):
+    ts, size, data, ttl = m._cache._data[key]
+    m._cache._data[key] = (ts - seconds, size, data, ttl)
+
+def test_listings_keep_last_snapshot_when_upstream_down(upstream):
+    games = [make_fixture(i, league=10 + i % 3, country=("Brazil", "Spain")[i % 2], date=day(i % 2)) for i in range(1, 13)]
+    upstream.serve_fixtures(games)
+
+    async def main():
+        snap = await m.get_fixtures_snapshot()
+        assert len(snap.games) == 12
+        # API fora do ar por mais que TTL + janela stale: o cache descarta a entrada
+        upstream.down = True
+        _age(m._snapshot_key(m.SNAPSHOT_DAYS_FORWARD), m.CACHE_TTL + m.CACHE_STALE_TTL + 1000)
+        async with app_client() as c:
+            games_resp = (await c.get("/games")).json()
+            countries = (await c.get("/countries")).json()
+        return games_resp, countries
+
+    games_resp, countries = asyncio.run(main())
+    assert len(games_resp) == 12
+    assert countries == ["Brazil", "Spain"]
+
+def test_open_fixtures_breaker_serves_expired_snapshot(upstream):
+    upstream.serve_fixtures([make_fixture(1), make_fixture(2)])
+
+    async def main():
+        await m.get_fixtures_snapshot()
+        key = m._snapshot_key(m.SNAPSHOT_DAYS_FORWARD)
+        _age(key, m.CACHE_TTL + m.CACHE_STALE_TTL + 1000)
+        breaker = m.circuit_breaker("fixtures")
+        for _ in range(breaker.max_failures):
+            breaker.record(False)
+        calls = sum(upstream.calls.values())
+        snap = await m.get_fixtures_snapshot()
+        # servido do cache (vencido), sem tentar a API
+        return snap, sum(upstream.calls.values()) - calls, m._cache.peek(key)
+
+    snap, new_calls, cached = asyncio.run(main())
+    assert len(snap.games) == 2 and snap is cached
+    assert new_calls == 0
+
+def test_breaker_transitions():
+    b = m.CircuitBreaker("odds", failures=3, cooldown=0.05)
+    for _ in range(2):
+        b.record(False)
+    assert b.state == "closed" and b.allow()
+    b.record(True)  # sucesso zera a sequência
+    for _ in range(3):
+        b.record(False)
+    assert b.state == "open" and b.is_open() and not b.allow()
+    time.sleep(0.06)
+    # cooldown acabou: uma chamada de teste; as outras seguem recusadas
+    assert b.allow() and b.state == "half_open"
+    assert not b.allow() and b.is_open()
+    b.record(False)  # teste falhou: reabre direto
+    assert b.state == "open" and not b.allow()
+    time.sleep(0.06)
+    assert b.allow()
+    b.record(True)
+    assert b.state == "closed" and b.failures == 0 and not b.is_open()
+    assert b.stats()["opened"] == 2 and b.stats()["rejected"] == 3
+
+def _serve_game(upstream, fixture):
+    fid = fixture["fixture"]["id"]
+    upstream.routes["fixtures"] = lambda p: [fixture] if safe_int(p.get("id")) == fid else []
+    upstream.routes["fixtures/statistics"] = lambda p: []
+    upstream.routes["odds"] = lambda p: []
+
+def test_analyze_degrades_or_times_out_with_stalled_upstream(upstream, monkeypatch):
+    monkeypatch.setattr(m, "ANALYZE_DEADLINE", 0.5)
+    _serve_game(upstream, make_fixture(5))
+    upstream.delays.update({"fixtures/statistics": 5, "odds": 5})
+
+    async def main():
+        async with app_client() as c:
+            partial = await c.get("/analyze", params={"game_id": 5})
+            # só a fixture travada: sem ela não há análise
+            upstream.delays["fixtures"] = 5
+            m._cache.pop(m._analyze_key(6))
+            t0 = time.monotonic()
+            stalled = await c.get("/analyze", params={"game_id": 6})
+            return partial, stalled, time.monotonic() - t0
+
+    partial, stalled, took = asyncio.run(main())
+    assert partial.status_code == 200
+    assert sorted(partial.json()["degraded"]) == ["odds", "stats"]
+    assert m._cache._data[m._analyze_key(5)][3] <= m.ANALYZE_TTL_DEGRADED
+    assert stalled.status_code == 504 and took < 1.5
+    # timeout encurtado pelo prazo não conta como falha da API
+    assert not m.circuit_open("fixtures")
+
+def test_open_breaker_serves_expired_fixture(upstream):
+    _serve_game(upstream, make_fixture(7, short="FT", elapsed=90, goals=(2, 1)))
+
+    async def main():
+        async with app_client() as c:
+            assert (await c.get("/analyze", params={"game_id": 7})).status_code == 200
+            m._cache.pop(m._analyze_key(7))
+            _age(m._api_cache_key("fixtures", {"id": 7}), m.CACHE_TTL + m.CACHE_STALE_TTL + 10 ** 6)
+            upstream.down = True
+            for _ in range(m.BREAKER_FAILURES):
+                m.circuit_breaker("fixtures").record(False)
+            calls = upstream.calls["fixtures"]
+            r = await c.get("/analyze", params={"game_id": 7})
+            return r, upstream.calls["fixtures"] - calls
+
+    r, fixture_calls = asyncio.run(main())
+    assert r.status_code == 200 and r.json()["game_id"] == 7
+    assert fixture_calls == 0
@@ -0,0 +1,66 @@
+# test_send_json.py - ETag/304, compressão negociada e projeção de campos nas respostas JSON
+import asyncio
+
+import pytest
+
+import sports_betting_analyzer as m
+from conftest import app_client, make_fixture
+
+def _get_all(requests):
+    """Roda as requisições (path, params, headers) em sequência no app."""
+    async def main():
+        async with app_client() as c:
+            return [await c.get(path, params=params, headers=headers) for path, params, headers in requests]
+    return asyncio.run(main())
+
+def test_etag_and_if_none_match(upstream):
+    upstream.serve_fixtures([make_fixture(i) for i in range(1, 6)])
+    first, = _get_all([("/games", None, None)])
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and "Accept-Encoding" in first.headers["vary"]
+    same, star, listed, other, variant = _get_all([
+        ("/games", None, {"If-None-Match": etag}),
+        ("/games", None, {"If-None-Match": "*"}),
+        ("/games", None, {"If-None-Match": f'W/"x", {etag}'}),
+        ("/games", None, {"If-None-Match": 'W/"x"'}),
+        ("/games", {"fields": "game_id"}, {"If-None-Match": etag}),
+    ])
+    assert same.status_code == star.status_code == listed.status_code == 304
+    assert same.content == b"" and same.headers["etag"] == etag
+    assert other.status_code == 200 and other.content == first.content
+    # outra variante (projeção) tem outro ETag
+    assert variant.status_code == 200 and variant.headers["etag"] != etag
+
+@pytest.mark.parametrize("accept, encoding", [("gzip", "gzip"), ("br, gzip", "br"), ("identity", None)])
+def test_compression_negotiation(upstream, accept, encoding):
+    if encoding == "br" and m.brotli is None:
+        pytest.skip("brotli não instalado")
+    upstream.serve_fixtures([make_fixture(i) for i in range(1, 30)])
+    big, small, plain = _get_all([
+        ("/games", None, {"Accept-Encoding": accept}),
+        ("/games", {"limit": 1, "fields": "game_id"}, {"Accept-Encoding": accept}),
+        ("/games", None, {"Accept-Encoding": "identity"}),
+    ])
+    assert big.headers.get("content-encoding") == encoding
+    # httpx descomprime: o corpo é o mesmo da resposta sem compressão
+    assert big.content == plain.content and big.headers["etag"] == plain.headers["etag"]
+    # abaixo de COMPRESS_MIN_BYTES vai sem compressão
+    assert len(small.content) < m.COMPRESS_MIN_BYTES and "content-encoding" not in small.headers
+
+def test_analyze_fields_and_include_raw(upstream):
+    fixture = make_fixture(9, short="FT", elapsed=90, goals=(1, 0))
+    upstream.routes["fixtures"] = lambda p: [fixture] if p.get("id") == "9" else []
+    upstream.routes["fixtures/statistics"] = lambda p: []
+    upstream.routes["odds"] = lambda p: []
+    default, raw, fields, raw_field = [r.json() for r in _get_all([
+        ("/analyze", {"game_id": 9}, None),
+        ("/analyze", {"game_id": 9, "include_raw": "true"}, None),
+        ("/analyze", {"game_id": 9, "fields": "game_id,top3,missing"}, None),
+        ("/analyze", {"game_id": 9, "fields": "game_id,raw_fixture"}, None),
+    ])]
+    assert default["game_id"] == 9 and not set(m.ANALYZE_RAW_KEYS) & default.keys()
+    assert set(m.ANALYZE_RAW_KEYS) <= raw.keys() and raw["raw_fixture"]["fixture"]["id"] == 9
+    assert {k: v for k, v in raw.items() if k not in m.ANALYZE_RAW_KEYS} == default
+    assert list(fields) == ["game_id", "top3"] and fields["top3"] == default["top3"]
+    # campo raw pedido explicitamente em `fields` vem mesmo sem include_raw
+    assert list(raw_field) == ["game_id", "raw_fixture"]
@@ -0,0 +1,41 @@
+# test_snapshot_refresh.py - refresh live e completo concorrentes não perdem dados mais novos
+import asyncio
+from datetime import datetime
+
+import sports_betting_analyzer as m
+
+def _fixture(elapsed: int) -> dict:
+    date = datetime.utcnow().strftime("%Y-%m-%d")
+    return {"fixture": {"id": 1, "date": f"{date}T12:00:00+00:00", "status": {"long": "First Half", "short": "1H", "elapsed": elapsed}},
+            "league": {"id": 10, "country": "Brazil"},
+            "teams": {"home": {"id": 1, "name": "A"}, "away": {"id": 2, "name": "B"}},
+            "goals": {"home": 0, "away": 0}}
+
+def test_slow_full_refresh_does_not_roll_back_live_refresh(monkeypatch):
+    state = {"elapsed": 10, "delay": 0.0}
+
+    async def fake_api_get_raw(path, params=None):
+        # o dado é lido na hora da chamada; a resposta chega depois do atraso
+        data = {"response": [_fixture(state["elapsed"])]}
+        await asyncio.sleep(state["delay"])
+        return data
+
+    monkeypatch.setattr(m, "api_get_raw", fake_api_get_raw)
+    monkeypatch.setattr(m, "_fixture_sources", {})
+    monkeypatch.setattr(m, "_sources_locks", {})
+
+    async def main():
+        await m._load_fixtures_for_dates(0)
+        state["delay"] = 0.2
+        full = asyncio.ensure_future(m._load_fixtures_for_dates(0))
+        await asyncio.sleep(0.05)
+        # jogo avançou: o refresh só-live começa depois e responde rápido
+        state["elapsed"], state["delay"] = 20, 0.0
+        live = asyncio.ensure_future(m._load_fixtures_for_dates(0, refresh_live=True, refresh_dates=False))
+        await asyncio.gather(full, live)
+
+    asyncio.run(main())
+    src = m._fixture_sources[0]
+    live_raw = m.orjson.loads(src["sources"]["live"][1])
+    assert live_raw["fixture"]["status"]["elapsed"] == 20
+    assert src["snap"].games_by_id[1].status["elapsed"] == 20
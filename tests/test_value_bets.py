@@ -0,0 +1,83 @@
+# test_value_bets.py - ranking incremental (change sets de snapshot/odds/stats) x remontagem do zero
+import asyncio
+import random
+
+import sports_betting_analyzer as m
+from conftest import day, make_fixture
+
+def _odds_item(fid: int, rnd: random.Random) -> dict:
+    odd = lambda: f"{rnd.uniform(1.3, 4.5):.2f}"
+    bets = [
+        {"name": "Match Winner", "values": [{"value": v, "odd": odd()} for v in ("Home", "Draw", "Away")]},
+        {"name": "Goals Over/Under", "values": [{"value": v, "odd": odd()} for v in ("Over 1.5", "Under 1.5", "Over 2.5", "Under 2.5")]},
+        {"name": "Double Chance", "values": [{"value": v, "odd": odd()} for v in ("Home/Draw", "Draw/Away", "Home/Away")]},
+        {"name": "Both Teams Score", "values": [{"value": v, "odd": odd()} for v in ("Yes", "No")]},
+    ]
+    return {"fixture": {"id": fid}, "bookmakers": [{"name": "Bet365", "bets": bets}]}
+
+def _stats(fid: int, rnd: random.Random) -> dict:
+    kinds = ("Shots on Goal", "Total Shots", "Corner Kicks", "Ball Possession", "Fouls")
+    return {"response": [{"team": {"id": fid * 10 + side}, "statistics": [{"type": k, "value": rnd.randint(0, 15)} for k in kinds]}
+                         for side in (1, 2)]}
+
+def _assert_matches_rebuild(snap):
+    m.value_bets.sync(snap)
+    fresh = m.ValueBetIndex()
+    fresh.rebuild(snap)
+    assert m.value_bets._rank == fresh._rank
+    assert m.value_bets.top(10 ** 6) == fresh.top(10 ** 6)
+    for league in (10, 20, 99):
+        assert m.value_bets.top(25, league=league) == fresh.top(25, league=league)
+    for market in {k[2] for k in fresh._rank}:
+        assert m.value_bets.top(10, market=market, min_edge=0.05) == fresh.top(10, market=market, min_edge=0.05)
+    assert m.value_bets._by_league == fresh._by_league and m.value_bets._by_market == fresh._by_market
+
+def test_incremental_ranking_matches_rebuild(upstream):
+    rnd = random.Random(3)
+    games = {fid: make_fixture(fid, league=(10, 20, 30)[fid % 3], date=day(fid % 2), hour=12 + fid % 6,
+                               short=("NS", "1H")[fid % 2], elapsed=(None, 20)[fid % 2], goals=((None, None), (0, 1))[fid % 2])
+             for fid in range(1, 41)}
+    odds = {fid: _odds_item(fid, rnd) for fid in games if fid % 5}
+
+    def fixtures(p):
+        return [g for g in games.values() if g["fixture"]["date"][:10] == p.get("date")] if "date" in p else []
+
+    upstream.routes["fixtures"] = fixtures
+    upstream.routes["odds"] = lambda p: [odds[fid] for fid in odds if games.get(fid) and games[fid]["fixture"]["date"][:10] == p["date"]]
+
+    async def step():
+        await m.refresh_fixtures_snapshot()
+        await m.refresh_odds_store()
+        return await m.get_fixtures_snapshot()
+
+    async def main():
+        snap = await step()
+        m.value_bets.sync(snap)
+        assert len(m.value_bets._rank) > 50
+        # placar/status: gol, início, fim, jogo novo e jogo que saiu da janela
+        games[2] = make_fixture(2, league=20, date=day(0), hour=14, short="2H", elapsed=60, goals=(2, 1))
+        games[3] = make_fixture(3, league=10, date=day(1), hour=15, short="1H", elapsed=5, goals=(0, 0))
+        games[5] = make_fixture(5, league=20, date=day(1), hour=17, short="FT", elapsed=90, goals=(1, 1))
+        games[41] = make_fixture(41, league=20, date=day(0), hour=13)
+        odds[41] = _odds_item(41, rnd)
+        del games[7]
+        _assert_matches_rebuild(await step())
+        # varredura de odds: novas odds, jogo sem odds e jogo que passou a ter
+        for fid in (4, 8, 12):
+            odds[fid] = _odds_item(fid, rnd)
+        del odds[9]
+        odds[10] = _odds_item(10, rnd)
+        _assert_matches_rebuild(await step())
+        # stats buscadas pelo /analyze de alguns jogos
+        for fid in (1, 3, 11, 13):
+            data = _stats(fid, rnd)
+            m._cache_set(m._api_cache_key("fixtures/statistics", {"fixture": fid}), data)
+            m.value_bets.observe(fid, "stats", data)
+        _assert_matches_rebuild(await m.get_fixtures_snapshot())
+        # só o minuto: nada a recalcular
+        games[11] = make_fixture(11, league=30, date=day(1), hour=17, short="1H", elapsed=21, goals=(0, 1))
+        _assert_matches_rebuild(await step())
+        stats = m.value_bets.stats()
+        assert stats["rebuilds"] == 1 and stats["recomputed"] > 0
+
+    asyncio.run(main())